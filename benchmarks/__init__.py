@@ -0,0 +1,6 @@
+"""
+Benchmarks for pyrameters. Run them from the repository root with eg:
+    python -m benchmarks                # test_cases vs @pytest.mark.parametrize
+    python -m benchmarks.bench_builder
+    python -m benchmarks.bench_records  # test_cases(..., compact=True) memory
+"""
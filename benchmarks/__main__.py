@@ -0,0 +1,5 @@
+import sys
+
+from benchmarks.bench_decorator import main
+
+sys.exit(main())
@@ -0,0 +1,98 @@
+"""
+Compares the compiled Definition.builder() against the per-case loop that
+pyrameters.test_cases used before it, which re-walked the definition fields for
+every case.
+"""
+
+import argparse
+import timeit
+
+from pyrameters import Definition, Field
+
+
+def reference_loop(definition, argvalues):
+    """
+    The original test_cases per-case loop, kept here as the baseline.
+    """
+    arglist = []
+    for case_vals in argvalues:
+        case = []
+        for name, f in definition.fields.items():
+            use_default = True
+            try:
+                val = case_vals[name]
+                use_default = False
+            except KeyError:
+                pass
+            if use_default:
+                val, ok = f.default
+                if not ok:
+                    raise ValueError(name)
+            case.append(val)
+        arglist.append(tuple(case) if len(definition.fields) > 1 else case[0])
+    return arglist
+
+
+def compiled(definition, argvalues):
+    build = definition.builder().build
+    return [build(case) for case in argvalues]
+
+
+def make_definition(num_fields):
+    fields = []
+    for i in range(num_fields):
+        if i % 3 == 1:
+            fields.append(Field("f{}".format(i), default=i))
+        elif i % 3 == 2:
+            fields.append(Field("f{}".format(i), factory=list))
+        else:
+            fields.append(Field("f{}".format(i)))
+    return Definition(*fields)
+
+
+def make_cases(num_fields, num_cases):
+    # Provide every required field, and every other defaulted one.
+    return [
+        {"f{}".format(i): c for i in range(num_fields) if i % 3 == 0 or i % 2 == 0}
+        for c in range(num_cases)
+    ]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--fields", type=int, nargs="+", default=[1, 5, 30])
+    parser.add_argument("--cases", type=int, nargs="+", default=[1000, 100000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    print(
+        "{:>7} {:>8} {:>12} {:>12} {:>8}".format(
+            "fields", "cases", "loop (s)", "builder (s)", "speedup"
+        )
+    )
+    for num_fields in args.fields:
+        definition = make_definition(num_fields)
+        for num_cases in args.cases:
+            cases = make_cases(num_fields, num_cases)
+            assert reference_loop(definition, cases) == compiled(definition, cases)
+            loop = min(
+                timeit.repeat(
+                    lambda: reference_loop(definition, cases),
+                    number=1,
+                    repeat=args.repeat,
+                )
+            )
+            builder = min(
+                timeit.repeat(
+                    lambda: compiled(definition, cases), number=1, repeat=args.repeat
+                )
+            )
+            print(
+                "{:>7} {:>8} {:>12.4f} {:>12.4f} {:>7.1f}x".format(
+                    num_fields, num_cases, loop, builder, loop / builder
+                )
+            )
+
+
+if __name__ == "__main__":
+    main()
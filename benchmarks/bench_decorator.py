@@ -0,0 +1,386 @@
+"""
+Measures what pyrameters.test_cases costs relative to plain @pytest.mark.parametrize.
+
+For each combination of case count, field count, case shape (Mapping or tuple) and
+default style (none, static or factory) this records:
+    - decoration time: applying the decorator to a function, which is when
+      pyrameters expands the cases.
+    - collection time: wall time of `pytest --collect-only` over a generated test
+      module, in a fresh subprocess.
+    - peak memory: max RSS of that subprocess.
+    - per-item overhead: extra collection time per case over the plain
+      @pytest.mark.parametrize baseline.
+
+The collection baseline is a module of ready-made cases, built with plain Python
+and collected without the pyrameters plugin, so that it never runs pyrameters code.
+
+Run from the repository root:
+    python -m benchmarks --cases 1000 10000 --json bench_output.json
+    python -m benchmarks --compare bench_output.json
+"""
+
+import argparse
+import itertools
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import timeit
+
+import pytest
+
+import pyrameters
+from pyrameters import Definition, Field
+from pyrameters.expansion import expand
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SHAPES = ("tuple", "mapping")
+DEFAULTS = ("none", "static", "factory")
+METRICS = ("decorate_s", "collect_s", "peak_rss_kb")
+
+_ROW_FORMAT = "{:>8} {:>6} {:>8} {:>8} {:>12} {:>12} {:>11} {:>11} {:>10} {:>10} {:>9}"
+
+# Only the collection phase is timed, so that pytest startup doesn't drown out the
+# difference between pyrameters and the baseline.
+_COLLECT_SCRIPT = """
+import resource, sys, time
+import pytest
+
+class Timer:
+    elapsed = None
+
+    @pytest.hookimpl(hookwrapper=True)
+    def pytest_collection(self, session):
+        start = time.perf_counter()
+        yield
+        Timer.elapsed = time.perf_counter() - start
+
+ret = pytest.main(sys.argv[1:], plugins=[Timer()])
+print("BENCH", ret, Timer.elapsed, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)
+"""
+
+_TEST_MODULE = """
+import pyrameters
+from benchmarks.bench_decorator import make_definition, make_cases
+
+DEFINITION = make_definition({fields}, {defaults!r})
+CASES = make_cases({fields}, {cases}, {shape!r}, {defaults!r})
+
+@pyrameters.test_cases(DEFINITION, CASES)
+def test_case({argnames}):
+    pass
+"""
+
+_BASELINE_MODULE = """
+import pytest
+
+CASES = [{case} for c in range({cases})]
+
+@pytest.mark.parametrize({argnames!r}, CASES)
+def test_case({argnames}):
+    pass
+"""
+
+
+def make_definition(num_fields, defaults):
+    """
+    Builds a Definition with num_fields fields. Every other field after the first
+    gets a default of the given style.
+    """
+    fields = []
+    for i in range(num_fields):
+        name = "f{}".format(i)
+        if i % 2 == 0 or defaults == "none":
+            fields.append(Field(name))
+        elif defaults == "static":
+            fields.append(Field(name, default=i))
+        else:
+            fields.append(Field(name, factory=dict))
+    return Definition(*fields)
+
+
+def make_cases(num_fields, num_cases, shape, defaults):
+    """
+    Builds num_cases cases for make_definition(num_fields, defaults). Mapping cases
+    leave out every field that has a default.
+    """
+    if shape == "tuple":
+        if num_fields == 1:
+            return list(range(num_cases))
+        return [tuple(c for _ in range(num_fields)) for c in range(num_cases)]
+
+    names = [
+        "f{}".format(i) for i in range(num_fields) if i % 2 == 0 or defaults == "none"
+    ]
+    return [{name: c for name in names} for c in range(num_cases)]
+
+
+def expanded_expression(num_fields, shape, defaults):
+    """
+    Returns a Python expression for the case c of make_cases(num_fields, ..., shape,
+    defaults) once expanded, so that the baseline can build its cases without
+    pyrameters.
+    """
+    values = []
+    for i in range(num_fields):
+        if shape == "tuple" or i % 2 == 0 or defaults == "none":
+            values.append("c")
+        elif defaults == "static":
+            values.append(str(i))
+        else:
+            values.append("dict()")
+    if num_fields == 1:
+        return values[0]
+    return "({},)".format(", ".join(values))
+
+
+def expand_cases(definition, cases):
+    """
+    What a user of plain @pytest.mark.parametrize would have to write by hand.
+    """
+    return list(expand(definition, cases))
+
+
+def bench_decoration(definition, cases, repeat):
+    def pyrameters_decorate():
+        pyrameters.test_cases(definition, cases)(lambda: None)
+
+    expanded = expand_cases(definition, cases)
+
+    def parametrize_decorate():
+        pytest.mark.parametrize(str(definition), expanded)(lambda: None)
+
+    return (
+        min(timeit.repeat(pyrameters_decorate, number=1, repeat=repeat)),
+        min(timeit.repeat(parametrize_decorate, number=1, repeat=repeat)),
+    )
+
+
+def bench_collection(num_fields, num_cases, shape, defaults, baseline, repeat=1):
+    """
+    Collects a generated test module in a subprocess, returning the collection time
+    and peak RSS. With repeat, returns the lowest of each over that many runs, as a
+    single collection is noisy compared to the per-item differences being measured.
+    """
+    argnames = ", ".join("f{}".format(i) for i in range(num_fields))
+    if baseline:
+        module = _BASELINE_MODULE.format(
+            case=expanded_expression(num_fields, shape, defaults),
+            cases=num_cases,
+            argnames=argnames,
+        )
+        plugins = []
+    else:
+        module = _TEST_MODULE.format(
+            fields=num_fields,
+            cases=num_cases,
+            shape=shape,
+            defaults=defaults,
+            argnames=argnames,
+        )
+        plugins = ["-p", "pyrameters.plugin"]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "test_bench.py")
+        with open(path, "w") as f:
+            f.write(module)
+        runs = [_collect(path, plugins) for _ in range(repeat)]
+    return min(elapsed for elapsed, _ in runs), min(rss for _, rss in runs)
+
+
+def _collect(path, plugins):
+    # Don't let unrelated installed plugins add to the measurements.
+    env = dict(os.environ, PYTHONPATH=ROOT, PYTEST_DISABLE_PLUGIN_AUTOLOAD="1")
+    output = subprocess.run(
+        [
+            sys.executable,
+            "-c",
+            _COLLECT_SCRIPT,
+            "--collect-only",
+            "-qq",
+            "-p",
+            "no:cacheprovider",
+        ]
+        + plugins
+        + [path],
+        cwd=os.path.dirname(path),
+        env=env,
+        check=True,
+        stdout=subprocess.PIPE,
+        universal_newlines=True,
+    ).stdout
+
+    _, ret, elapsed, rss = output.strip().splitlines()[-1].split()
+    if ret != "0":
+        raise RuntimeError("Collection failed:\n{}".format(output))
+    return float(elapsed), int(rss)
+
+
+def run(cases, fields, shapes, defaults, repeat, collect):
+    results = []
+    for num_cases, num_fields, shape, default in itertools.product(
+        cases, fields, shapes, defaults
+    ):
+        if num_fields == 1 and default != "none":
+            # The only field never has a default.
+            continue
+
+        definition = make_definition(num_fields, default)
+        case_list = make_cases(num_fields, num_cases, shape, default)
+        decorate, baseline_decorate = bench_decoration(definition, case_list, repeat)
+        del case_list
+
+        row = dict(
+            cases=num_cases,
+            fields=num_fields,
+            shape=shape,
+            defaults=default,
+            decorate_s=decorate,
+            baseline_decorate_s=baseline_decorate,
+        )
+        if collect:
+            collect_s, rss = bench_collection(
+                num_fields, num_cases, shape, default, baseline=False, repeat=repeat
+            )
+            baseline_collect_s, baseline_rss = bench_collection(
+                num_fields, num_cases, shape, default, baseline=True, repeat=repeat
+            )
+            row.update(
+                collect_s=collect_s,
+                baseline_collect_s=baseline_collect_s,
+                peak_rss_kb=rss,
+                baseline_peak_rss_kb=baseline_rss,
+                per_item_us=(collect_s - baseline_collect_s) / num_cases * 1e6,
+            )
+        results.append(row)
+        print_row(row)
+    return results
+
+
+def print_header():
+    print(
+        _ROW_FORMAT.format(
+            "cases",
+            "fields",
+            "shape",
+            "defaults",
+            "decorate(s)",
+            "baseline(s)",
+            "collect(s)",
+            "baseline(s)",
+            "rss(MB)",
+            "baseline",
+            "item(us)",
+        )
+    )
+
+
+def print_row(row):
+    def fmt(key, spec, scale=1):
+        if key not in row:
+            return "-"
+        return format(row[key] * scale, spec)
+
+    print(
+        _ROW_FORMAT.format(
+            row["cases"],
+            row["fields"],
+            row["shape"],
+            row["defaults"],
+            fmt("decorate_s", ".4f"),
+            fmt("baseline_decorate_s", ".4f"),
+            fmt("collect_s", ".3f"),
+            fmt("baseline_collect_s", ".3f"),
+            fmt("peak_rss_kb", ".1f", 1 / 1024),
+            fmt("baseline_peak_rss_kb", ".1f", 1 / 1024),
+            fmt("per_item_us", ".2f"),
+        ),
+        flush=True,
+    )
+
+
+def compare(results, saved, tolerance):
+    """
+    Returns a description of every metric that got worse than the saved results by
+    more than the given fraction.
+    """
+
+    def key(row):
+        return row["cases"], row["fields"], row["shape"], row["defaults"]
+
+    saved = {key(row): row for row in saved}
+    regressions = []
+    for row in results:
+        old = saved.get(key(row))
+        if old is None:
+            continue
+        for metric in METRICS:
+            if (
+                metric in row
+                and old.get(metric)
+                and row[metric] > old[metric] * (1 + tolerance)
+            ):
+                regressions.append(
+                    "{}: {} {:.4g} -> {:.4g}".format(
+                        key(row), metric, old[metric], row[metric]
+                    )
+                )
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument(
+        "--cases",
+        type=int,
+        nargs="+",
+        default=[1000, 10000, 100000],
+        help="Case counts to benchmark. Add 1000000 for the full range.",
+    )
+    parser.add_argument("--fields", type=int, nargs="+", default=[1, 5, 30])
+    parser.add_argument("--shapes", nargs="+", choices=SHAPES, default=SHAPES)
+    parser.add_argument("--defaults", nargs="+", choices=DEFAULTS, default=DEFAULTS)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument(
+        "--no-collect",
+        dest="collect",
+        action="store_false",
+        help="Skip the (slow) collection and memory benchmarks.",
+    )
+    parser.add_argument("--json", help="Write the results to this file.")
+    parser.add_argument(
+        "--compare", help="Fail if results regressed from those in this file."
+    )
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.25,
+        help="Allowed fractional slowdown when comparing. Default: %(default)s",
+    )
+    args = parser.parse_args(argv)
+
+    print_header()
+    results = run(
+        args.cases, args.fields, args.shapes, args.defaults, args.repeat, args.collect
+    )
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        for regression in regressions:
+            print("REGRESSION", regression)
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,177 @@
+"""
+Compares the memory used to hold expanded cases as a list of tuples (the default)
+against compact, column per field pyrameters Records (test_cases(..., compact=True)).
+
+For each combination of case count, field count and default style this records:
+    - held memory: bytes allocated for the expanded cases, measured with
+      tracemalloc, not counting the argvalues they were expanded from.
+    - peak memory: max RSS of `pytest --collect-only` over a generated test module
+      using each, in a fresh subprocess.
+
+Run from the repository root:
+    python -m benchmarks.bench_records --cases 100000 1000000
+"""
+
+import argparse
+import gc
+import itertools
+import os
+import subprocess
+import sys
+import tempfile
+import tracemalloc
+
+from benchmarks.bench_decorator import (
+    _COLLECT_SCRIPT,
+    DEFAULTS,
+    ROOT,
+    make_cases,
+    make_definition,
+)
+
+_ROW_FORMAT = "{:>8} {:>6} {:>8} {:>12} {:>12} {:>7} {:>10} {:>10}"
+
+_TEST_MODULE = """
+import pyrameters
+from benchmarks.bench_decorator import make_definition, make_cases
+
+@pyrameters.test_cases(
+    make_definition({fields}, {defaults!r}),
+    make_cases({fields}, {cases}, "mapping", {defaults!r}),
+    compact={compact},
+)
+def test_case({argnames}):
+    pass
+"""
+
+
+def held_bytes(expand):
+    """
+    Returns the bytes still allocated after calling expand, while its result is
+    alive.
+    """
+    gc.collect()
+    tracemalloc.start()
+    try:
+        result = expand()
+        gc.collect()
+        held, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    del result
+    return held
+
+
+def bench_held(num_fields, num_cases, defaults):
+    definition = make_definition(num_fields, defaults)
+    cases = make_cases(num_fields, num_cases, "mapping", defaults)
+    return (
+        held_bytes(lambda: list(definition.expand(cases))),
+        held_bytes(lambda: definition.records(cases)),
+    )
+
+
+def bench_collection(num_fields, num_cases, defaults, compact):
+    """
+    Collects a generated test module in a subprocess, returning its peak RSS in KB.
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "test_bench.py")
+        with open(path, "w") as f:
+            f.write(
+                _TEST_MODULE.format(
+                    fields=num_fields,
+                    cases=num_cases,
+                    defaults=defaults,
+                    compact=compact,
+                    argnames=", ".join("f{}".format(i) for i in range(num_fields)),
+                )
+            )
+        env = dict(os.environ, PYTHONPATH=ROOT, PYTEST_DISABLE_PLUGIN_AUTOLOAD="1")
+        output = subprocess.run(
+            [
+                sys.executable,
+                "-c",
+                _COLLECT_SCRIPT,
+                "--collect-only",
+                "-qq",
+                "-p",
+                "no:cacheprovider",
+                "-p",
+                "pyrameters.plugin",
+                path,
+            ],
+            cwd=tmp,
+            env=env,
+            check=True,
+            stdout=subprocess.PIPE,
+            universal_newlines=True,
+        ).stdout
+
+    _, ret, _, rss = output.strip().splitlines()[-1].split()
+    if ret != "0":
+        raise RuntimeError("Collection failed:\n{}".format(output))
+    return int(rss)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--cases", type=int, nargs="+", default=[10000, 100000])
+    parser.add_argument("--fields", type=int, nargs="+", default=[1, 5, 30])
+    parser.add_argument("--defaults", nargs="+", choices=DEFAULTS, default=DEFAULTS)
+    parser.add_argument(
+        "--no-collect",
+        dest="collect",
+        action="store_false",
+        help="Skip the (slow) collection memory benchmark.",
+    )
+    args = parser.parse_args(argv)
+
+    print(
+        _ROW_FORMAT.format(
+            "cases",
+            "fields",
+            "defaults",
+            "tuples(MB)",
+            "records(MB)",
+            "saved",
+            "rss(MB)",
+            "compact",
+        )
+    )
+    for num_cases, num_fields, defaults in itertools.product(
+        args.cases, args.fields, args.defaults
+    ):
+        if num_fields == 1 and defaults != "none":
+            # The only field never has a default.
+            continue
+
+        tuples, records = bench_held(num_fields, num_cases, defaults)
+        rss = compact_rss = "-"
+        if args.collect:
+            rss = "{:.1f}".format(
+                bench_collection(num_fields, num_cases, defaults, False) / 1024
+            )
+            compact_rss = "{:.1f}".format(
+                bench_collection(num_fields, num_cases, defaults, True) / 1024
+            )
+        print(
+            _ROW_FORMAT.format(
+                num_cases,
+                num_fields,
+                defaults,
+                "{:.2f}".format(tuples / 2**20),
+                "{:.2f}".format(records / 2**20),
+                "{:.0%}".format(1 - records / tuples) if tuples else "-",
+                rss,
+                compact_rss,
+            ),
+            flush=True,
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
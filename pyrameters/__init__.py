@@ -1,4 +1,17 @@
 # Expose things for usability
-from pyrameters.decorator import test_cases  # noqa
+from pyrameters.types.columns import Columns  # noqa
 from pyrameters.types.definition import Definition  # noqa
 from pyrameters.types.field import Field  # noqa
+from pyrameters.types.group import Group  # noqa
+from pyrameters.types.region import FileRegion  # noqa
+
+
+def __getattr__(name):
+    # test_cases is imported on first use, so that using Definitions without the
+    # decorator (eg: Definition.expand) doesn't import pytest.
+    if name == "test_cases":
+        from pyrameters.decorator import test_cases
+
+        globals()[name] = test_cases
+        return test_cases
+    raise AttributeError("module {!r} has no attribute {!r}".format(__name__, name))
@@ -0,0 +1,177 @@
+"""
+CollectionCache stores expanded cases between pytest runs, so that parametrizations
+whose definition and case source haven't changed are loaded instead of re-expanded.
+
+Entries are keyed on a digest of everything that went into the expansion: the
+Definition fields and defaults, where the cases come from (the source of the module
+defining a case callable, or the contents of a case file), and any extra files the
+cases depend on.
+"""
+
+import functools
+import hashlib
+import inspect
+import os
+import pickle
+
+from pyrameters.types.definition import Definition
+
+# Bump whenever the expanded case format changes, to invalidate old entries.
+_CACHE_VERSION = 1
+
+
+class CollectionCache(object):
+    """
+    A directory of pickled case lists.
+
+    Parameters
+    ----------
+    directory : Union[str, os.PathLike]
+        Where to store cached cases, eg: a directory in .pytest_cache.
+    file_digests : dict = None
+        A memo of `path -> [size, mtime_ns, digest]`, so that files are only
+        re-hashed when they change. Updated in place.
+    """
+
+    __slots__ = "directory", "file_digests"
+
+    def __init__(self, directory, file_digests=None):
+        self.directory = os.fspath(directory)
+        self.file_digests = {} if file_digests is None else file_digests
+
+    def key(self, *parts):
+        """
+        Returns the cache key for the given parts, which may be any nesting of
+        tuples, strings, numbers, pyrameters.Definitions, callables or CacheFiles.
+
+        Raises Uncacheable for callables whose source can't be found, as their
+        cases could change without the key changing.
+        """
+        h = hashlib.blake2b(digest_size=16)
+        h.update(repr(_CACHE_VERSION).encode())
+        for part in parts:
+            h.update(repr(self._describe(part)).encode())
+        return h.hexdigest()
+
+    def load(self, key):
+        """
+        Returns the cases stored under key, or None if there aren't any.
+        """
+        try:
+            with open(self._path(key), "rb") as f:
+                return pickle.load(f)
+        except (OSError, EOFError, pickle.UnpicklingError):
+            return None
+
+    def store(self, key, cases):
+        """
+        Stores cases under key. Returns False if the cases can't be pickled.
+        """
+        try:
+            data = pickle.dumps(cases, protocol=pickle.HIGHEST_PROTOCOL)
+        except (pickle.PicklingError, AttributeError, TypeError):
+            return False
+
+        # Write then rename, so that a concurrent reader never sees a partial file.
+        os.makedirs(self.directory, exist_ok=True)
+        tmp = "{}.{}.tmp".format(self._path(key), os.getpid())
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, self._path(key))
+        return True
+
+    def file_digest(self, path):
+        """
+        Returns a digest of the contents of the file at path, only re-reading the
+        file if its size or modification time has changed.
+        """
+        path = os.path.abspath(os.fspath(path))
+        stat = os.stat(path)
+        memo = self.file_digests.get(path)
+        if memo is not None and memo[:2] == [stat.st_size, stat.st_mtime_ns]:
+            return memo[2]
+
+        h = hashlib.blake2b(digest_size=16)
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                h.update(chunk)
+        self.file_digests[path] = [stat.st_size, stat.st_mtime_ns, h.hexdigest()]
+        return h.hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.directory, "{}.pickle".format(key))
+
+    def _describe(self, part):
+        if isinstance(part, (tuple, list)):
+            return tuple(self._describe(p) for p in part)
+        if isinstance(part, Definition):
+            return tuple(
+                (
+                    (name, (self._describe(f.factory), f.scope))
+                    if f.has_factory
+                    else (name, repr(f.default))
+                )
+                for name, f in part.fields.items()
+            )
+        if isinstance(part, CacheFile):
+            return ("file", part.path, self.file_digest(part.path))
+        if hasattr(part, "cache_key"):
+            return self._describe(part.cache_key())
+        if callable(part):
+            return self._describe_callable(part)
+        return repr(part)
+
+    def _describe_callable(self, fn):
+        if isinstance(fn, functools.partial):
+            return (
+                "partial",
+                self._describe(fn.func),
+                self._describe(fn.args),
+                tuple(sorted((k, self._describe(v)) for k, v in fn.keywords.items())),
+            )
+
+        name = "{}.{}".format(
+            getattr(fn, "__module__", None), getattr(fn, "__qualname__", None)
+        )
+        if inspect.isbuiltin(fn) or getattr(fn, "__module__", None) == "builtins":
+            # Builtins (eg: a list factory) have no source, but can't change either.
+            return ("builtin", name)
+
+        # Bound methods of instances depend on the instance, which can't be keyed.
+        owner = getattr(fn, "__self__", None)
+        if not (
+            inspect.isfunction(fn)
+            or inspect.isclass(fn)
+            or (inspect.ismethod(fn) and inspect.isclass(owner))
+        ):
+            raise Uncacheable("Can't key cases on {!r}".format(fn))
+
+        # The whole module is keyed rather than just the callable's source, as the
+        # cases often come from module level data.
+        try:
+            path = inspect.getsourcefile(fn)
+        except TypeError:
+            path = None
+        if path is None or not os.path.isfile(path):
+            raise Uncacheable("No source file found for {!r}".format(fn))
+        return ("callable", name, self.file_digest(path))
+
+
+class CacheFile(object):
+    """
+    Marks a path as a file whose contents should be part of a cache key.
+    """
+
+    __slots__ = ("path",)
+
+    def __init__(self, path):
+        self.path = os.fspath(path)
+
+    def __repr__(self):
+        return "CacheFile(path={})".format(self.path)
+
+
+class Uncacheable(ValueError):
+    """
+    The cases can't be cached, as there's nothing reliable to key them on.
+    """
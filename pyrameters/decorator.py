@@ -1,17 +1,441 @@
 from collections.abc import Mapping
-from typing import Any, Mapping, Sequence, Tuple, Union
+from enum import Enum
+from typing import Any, Callable, Iterable, Mapping, Sequence, Tuple, Union
 
 import pytest
+from _pytest.mark.structures import ParameterSet
 
-from pyrameters.types.definition import Definition
+from pyrameters import settings, stats
+from pyrameters.cache import CacheFile
+from pyrameters.expansion import expand, grouped, unique
+from pyrameters.hashing import CaseHasher
+from pyrameters.loaders import CaseFile
+from pyrameters.types.definition import Definition, parse_argnames
+from pyrameters.types.records import Records
+
+_DUPLICATES = (None, "drop", "report")
+_EXECUTORS = ("thread", "process")
+_BATCH_ARGS = ("cases", "columns")
+
+
+class Parametrization(object):
+    """
+    Everything pyrameters.test_cases was called with, so that the cases can be
+    expanded either immediately or later on by the pyrameters pytest plugin.
+    """
+
+    __slots__ = (
+        "argnames",
+        "argvalues",
+        "indirect",
+        "ids",
+        "scope",
+        "lazy",
+        "lazy_defaults",
+        "cache",
+        "shard",
+        "id_field",
+        "duplicates",
+        "sample",
+        "seed",
+        "stratify",
+        "workers",
+        "executor",
+        "concurrency",
+        "group_indirect",
+        "batch",
+        "batch_args",
+        "compact",
+    )
+
+    def __init__(
+        self,
+        argnames,
+        argvalues,
+        indirect=False,
+        ids=None,
+        scope=None,
+        lazy=False,
+        lazy_defaults=False,
+        cache=False,
+        shard=True,
+        id_field=None,
+        duplicates=None,
+        sample=None,
+        seed=0,
+        stratify=None,
+        workers=None,
+        executor="thread",
+        concurrency=None,
+        group_indirect=False,
+        batch=None,
+        batch_args="cases",
+        compact=False,
+    ):
+        if duplicates not in _DUPLICATES:
+            raise ValueError(
+                "duplicates must be one of {}, got {}".format(_DUPLICATES, duplicates)
+            )
+
+        self.argnames = argnames
+        self.argvalues = argvalues
+        self.indirect = indirect
+        if ids is not None and not callable(ids) and not isinstance(ids, str):
+            # Held as a tuple, so that a generator of ids can be used more than once.
+            ids = tuple(ids)
+        self.ids = ids
+        self.scope = scope
+        self.lazy = lazy
+        self.lazy_defaults = lazy_defaults
+        self.cache = cache
+        self.shard = shard
+        self.id_field = id_field
+        self.duplicates = duplicates
+        self.sample = _check_sample(sample)
+        self.seed = seed
+        self.stratify = stratify
+        if stratify is not None:
+            if sample is None:
+                raise ValueError("stratify requires a sample")
+            if stratify not in self.names:
+                raise ValueError(
+                    "Unknown stratify field {}, expected one of {}".format(
+                        stratify, self.names
+                    )
+                )
+        if workers is not None and workers < 1:
+            raise ValueError("workers must be at least 1, got {}".format(workers))
+        if executor not in _EXECUTORS:
+            raise ValueError(
+                "executor must be one of {}, got {}".format(_EXECUTORS, executor)
+            )
+        if concurrency is not None and concurrency < 1:
+            raise ValueError(
+                "concurrency must be at least 1, got {}".format(concurrency)
+            )
+        self.workers = workers
+        self.executor = executor
+        self.concurrency = concurrency
+        if group_indirect and not indirect:
+            raise ValueError("group_indirect requires indirect")
+        if group_indirect and scope in (None, "function"):
+            # pytest sets up function scoped fixtures for every case, grouped or not.
+            raise ValueError(
+                'group_indirect requires a scope wider than "function", eg: '
+                'scope="module", got {}'.format(scope)
+            )
+        self.group_indirect = group_indirect
+        if batch is not None and (
+            not isinstance(batch, int) or isinstance(batch, bool) or batch < 1
+        ):
+            raise ValueError(
+                "batch must be a positive number of cases, got {}".format(batch)
+            )
+        if batch is not None and indirect:
+            # Indirect fixtures would receive a whole batch's values at once.
+            raise ValueError("batch can't be used with indirect")
+        if batch_args not in _BATCH_ARGS:
+            raise ValueError(
+                "batch_args must be one of {}, got {}".format(_BATCH_ARGS, batch_args)
+            )
+        self.batch = batch
+        self.batch_args = batch_args
+        self.compact = compact
+
+    @property
+    def definition_str(self):
+        """
+        The pytest.mark.parametrize-compatible argnames string.
+        """
+        if isinstance(self.argnames, str):
+            return self.argnames
+        return str(self.argnames)
+
+    @property
+    def names(self):
+        """
+        The names of the fields of each case, in order.
+        """
+        if isinstance(self.argnames, str):
+            return parse_argnames(self.argnames)
+        return tuple(self.argnames.fields)
+
+    @property
+    def indirect_positions(self):
+        """
+        The positions of the indirectly parametrized fields in each case, in the
+        order they were given to indirect.
+        """
+        if self.indirect is True:
+            return tuple(range(len(self.names)))
+        if not self.indirect:
+            return ()
+        return tuple(self.names.index(n) for n in self.indirect if n in self.names)
+
+    @property
+    def hash_ids(self):
+        """
+        Whether pyrameters generates the case IDs, rather than pytest.
+        """
+        return self.ids == "hash" or self.id_field is not None
+
+    @property
+    def case_ids(self):
+        """
+        The sequence of IDs given to ids, one per case, or None. pyrameters attaches
+        each to its case before any cases are sampled, sharded, dropped or reordered.
+        """
+        if self.hash_ids or not isinstance(self.ids, tuple):
+            return None
+        return self.ids
+
+    @property
+    def parametrize_kwargs(self):
+        """
+        The keyword arguments to pass through to pytest's parametrize.
+        """
+        passed = not (self.hash_ids or self.batch or self.case_ids is not None)
+        return dict(
+            indirect=self.indirect,
+            ids=self.ids if passed else None,
+            scope=self.scope,
+        )
+
+    @property
+    def sampled(self):
+        """
+        Whether only a sample of the cases is expanded, which is unless
+        pyrameters.settings has full runs enabled.
+        """
+        return self.sample is not None and not settings.current.full
+
+    def cases(self, shard=None, name=None):
+        """
+        Expands argvalues into the list of cases to pass to pytest, optionally only
+        those in the given (index, count) shard.
+
+        Any duplicate cases and the time taken are recorded in pyrameters.stats under
+        name, the name of the test function being parametrized.
+        """
+        return stats.current.timed("expansion", name, self._expand, shard, name)
+
+    def _expand(self, shard, name):
+        cases = expand(
+            self.argnames,
+            self.argvalues,
+            lazy_defaults=self.lazy_defaults,
+            shard=shard,
+            sample=self.sample if self.sampled else None,
+            seed=self.seed,
+            stratify=self.stratify,
+            workers=self.workers,
+            executor=self.executor,
+            concurrency=self.concurrency,
+            ids=self.case_ids,
+        )
+        if self.case_ids is not None:
+            cases = self._with_case_ids(cases)
+        if self.duplicates is not None:
+            found = []
+            cases = unique(cases, found.append, drop=self.duplicates == "drop")
+            cases = list(cases)
+            if found:
+                stats.current.add_duplicates(
+                    name, len(found), dropped=self.duplicates == "drop"
+                )
+        if self.group_indirect:
+            cases, saved = grouped(
+                cases, self.indirect_positions, single=len(self.names) == 1
+            )
+            stats.current.add_setups_saved(name, saved)
+        if self.hash_ids:
+            cases = self._with_ids(cases)
+        if self.batch:
+            cases = self._batched(cases)
+        if self.compact:
+            return Records(self.names, cases)
+        return list(cases)
+
+    def _with_ids(self, cases):
+        """
+        Yields each case as a pytest.param with an ID from a CaseHasher, leaving any
+        explicit pytest.param IDs as they are.
+        """
+        hasher = CaseHasher(self.names, key=self.id_field)
+        multiple = len(hasher.names) > 1
+        for case in cases:
+            if isinstance(case, ParameterSet):
+                if case.id is None:
+                    case = case._replace(id=hasher(case.values))
+                yield case
+            else:
+                values = tuple(case) if multiple else (case,)
+                yield pytest.param(*values, id=hasher(values))
+
+    def _with_case_ids(self, cases):
+        """
+        Yields each (case, id) pair from expand as a pytest.param with that ID,
+        leaving any explicit pytest.param IDs as they are, as pytest would.
+        """
+        multiple = len(self.names) > 1
+        for case, case_id in cases:
+            if case_id is None:
+                yield case
+            elif isinstance(case, ParameterSet):
+                yield case if case.id is not None else case._replace(id=str(case_id))
+            else:
+                values = tuple(case) if multiple else (case,)
+                yield pytest.param(*values, id=str(case_id))
+
+    def _batched(self, cases):
+        """
+        Yields the cases in batches of up to self.batch cases, each as a pytest.param
+        of one tuple of values per field, marked with the ID of every case in it.
+
+        Cases with marks (eg: pytest.param(..., marks=pytest.mark.xfail)) are kept
+        in batches of their own, along with their marks, and cases keep their order.
+        """
+        single = len(self.names) == 1
+        values, ids = [], []
+        for i, case in enumerate(cases):
+            marks = ()
+            if isinstance(case, ParameterSet):
+                case_id, marks, case = case.id, case.marks, tuple(case.values)
+            else:
+                case_id, case = None, (case,) if single else tuple(case)
+            if case_id is None:
+                case_id = self._case_id(case, i)
+
+            if marks:
+                if values:
+                    yield self._batch(values, ids)
+                    values, ids = [], []
+                yield self._batch([case], [case_id], marks)
+                continue
+            values.append(case)
+            ids.append(case_id)
+            if len(values) == self.batch:
+                yield self._batch(values, ids)
+                values, ids = [], []
+        if values:
+            yield self._batch(values, ids)
+
+    def _batch(self, values, ids, marks=()):
+        marker = pytest.mark.pyrameters_batch(
+            ids=tuple(ids), names=self.names, call=self.batch_args
+        )
+        return pytest.param(
+            *zip(*values),
+            id=ids[0] if len(ids) == 1 else "{}..{}".format(ids[0], ids[-1]),
+            marks=(marker,) + tuple(marks)
+        )
+
+    def _case_id(self, values, index):
+        """
+        Returns the ID pytest would give the case with the given values at index,
+        for ids that pytest would otherwise apply. A sequence of ids is already
+        attached to the cases by then, see _with_case_ids.
+        """
+        parts = []
+        for name, val in zip(self.names, values):
+            part = self.ids(val) if callable(self.ids) else None
+            parts.append(_value_id(name, val, index) if part is None else str(part))
+        return "-".join(parts)
+
+    def cache_key(self, shard=None, name=None):
+        """
+        Everything that affects the expanded cases of the named test function, for
+        use as a CollectionCache key.
+        """
+        files = () if self.cache is True else tuple(CacheFile(f) for f in self.cache)
+        return (
+            name,
+            self.argnames,
+            self.argvalues,
+            files,
+            self.lazy_defaults,
+            shard,
+            self.hash_ids and (self.ids, self.id_field),
+            self.case_ids,
+            self.duplicates,
+            self.sampled and (self.sample, self.seed, self.stratify),
+            self.group_indirect and self.indirect_positions,
+            self.batch and (self.batch, self.batch_args, self.ids),
+        )
+
+    def register(self, f):
+        """
+        Records the names of this parametrization's fields on the test function f,
+        so that the pyrameters pytest plugin can tell them apart from any other
+        parameters of f, along with any field cost hints.
+        """
+        f._pyrameters_names = getattr(f, "_pyrameters_names", ()) + self.names
+        if isinstance(self.argnames, Definition):
+            costs = {
+                name: field.cost
+                for name, field in self.argnames.fields.items()
+                if field.cost is not None
+            }
+            if costs:
+                f._pyrameters_costs = dict(getattr(f, "_pyrameters_costs", {}), **costs)
+
+    def shard_for(self, f):
+        """
+        Decides whether the cases for the test function f should be sharded, marking
+        f so that any further test_cases decorators applied to it are not.
+
+        Only one parametrization of a function can be sharded, otherwise the
+        combinations of cases in different shards would never run anywhere.
+        """
+        if not self.shard or getattr(f, "_pyrameters_sharded", False):
+            return False
+        f._pyrameters_sharded = True
+        return True
+
+    def parametrize(self, metafunc, cases=None, shard=None):
+        """
+        Parametrizes the given pytest Metafunc with the expanded cases in shard, or
+        with the given already expanded cases.
+
+        Used by the pyrameters pytest plugin to expand lazy parametrizations at
+        collection time.
+        """
+        metafunc.parametrize(
+            self.definition_str,
+            (
+                self.cases(shard=shard, name=stats.function_name(metafunc.function))
+                if cases is None
+                else cases
+            ),
+            **self.parametrize_kwargs
+        )
 
 
 def test_cases(
     argnames: Union[str, Definition],
-    argvalues: Sequence[Union[Any, Tuple[Any], Mapping]],
+    argvalues: Union[
+        Iterable[Union[Any, Tuple[Any], Mapping]],
+        Callable[[], Iterable[Union[Any, Tuple[Any], Mapping]]],
+    ],
     indirect: Union[bool, Sequence[str]] = False,
     ids=None,
     scope=None,
+    lazy: bool = False,
+    lazy_defaults: bool = False,
+    cache: Union[bool, Sequence[str]] = False,
+    shard: bool = True,
+    id_field: str = None,
+    duplicates: str = None,
+    sample: Union[int, float] = None,
+    seed: int = 0,
+    stratify: str = None,
+    workers: int = None,
+    executor: str = "thread",
+    concurrency: int = None,
+    group_indirect: bool = False,
+    batch: int = None,
+    batch_args: str = "cases",
+    compact: bool = False,
 ):
     """
     Add new invocations to the underlying test function according to argnames and
@@ -28,8 +452,10 @@ def test_cases(
         When a string value it is identical to @pytest.mark.parametrize(argnames, ...).
         Otherwise, a pyrameters.Definition describing the test case parameters accepted
         by the wrapped function, including any defaults or default factories etc.
-    argvalues : Sequence[Union[Any, Tuple[Any], Mapping]]
-        Accepts any of the following:
+    argvalues : Union[Iterable, Callable[[], Iterable], pyrameters.Columns]
+        Any iterable (including generators) of cases, a zero-argument callable
+        (eg: a generator function) returning one, or a pyrameters.Columns of values
+        per field. Cases can be any of the following:
             - If argnames only contains a single argument, then it is either a list of
               values (one per test case) eg: `["input_val1", "input_val2", ...], or a
               list of collection.ABC.Mapping objects describing a test case eg:
@@ -40,78 +466,261 @@ def test_cases(
               tuples the same length as the number of arguments eg:
               `[("val1", "val2"), ("val3", "val4")]`, or a list of Mappings eg:
               `[dict(foo="val1", bar="val2"), ...]`.
+            - A pyrameters.Group of any of the above, which provides defaults to the
+              Mapping cases within it, eg: `Group(foo="val1")(dict(bar="val2"))`.
     indirect : Union[bool, Sequence[str]] = False
         Passed through to @pytest.mark.parametrize unchanged. See pytest documentation
         for usage.
     ids = None
-        Passed through to @pytest.mark.parametrize unchanged. See pytest documentation
-        for usage.
+        Passed through to @pytest.mark.parametrize unchanged (see pytest documentation
+        for usage), except for "hash". With ids="hash", each case ID is a short,
+        stable hash of the field names and the case's values (after defaults are
+        filled in), eg: `test_foo[3f2a9c01b7de]`. Hashes are computed once while
+        expanding, rather than pytest building an ID from every value. Explicit
+        pytest.param IDs are kept. A sequence of IDs is attached to the cases (one
+        per case, after flattening any Groups) before any are sampled, sharded,
+        dropped or reordered, so each ID stays with its case.
     scope = None
         Passed through to @pytest.mark.parametrize unchanged. See pytest documentation
         for usage.
+    lazy : bool = False
+        When True, argvalues is not expanded at decoration (ie: import) time. Instead,
+        cases are expanded by the pyrameters pytest plugin when pytest collects the
+        wrapped function. Pass a callable as argvalues if the function may be
+        collected more than once, as a generator can only be consumed once.
+    lazy_defaults : bool = False
+        When True, defaults that come from a Field factory are not evaluated while
+        expanding cases. The pyrameters pytest plugin calls the factory when each
+        selected test is set up instead, so deselected tests and --collect-only runs
+        never call it. Only applies to directly parametrized (non-indirect) args.
+    cache : Union[bool, Sequence[str]] = False
+        When True, the expanded cases are stored in .pytest_cache, and reloaded on
+        later runs for as long as the definition and the source of the cases are
+        unchanged. argvalues must be a callable (keyed on its module's source) or a
+        CaseFile (keyed on its contents). Pass a sequence of paths instead of True to
+        also key on the contents of other files the cases are built from. Values must
+        be picklable to be cached. Implies lazy=True.
+    shard : bool = True
+        Whether these cases are split between shards when a shard is selected with
+        --pyrameters-shard or the PYRAMETERS_SHARD environment variable (eg: 3/16).
+        Only the cases in the selected shard are expanded. When test_cases is applied
+        more than once to the same function, only the first applied (ie: innermost)
+        sharded parametrization is split.
+    id_field : str = None
+        Use the value of this field as each case's ID, eg: a "name" field. Values that
+        aren't strings or numbers are hashed, as with ids="hash".
+    duplicates : str = None
+        What to do with cases that are exact duplicates of an earlier case once their
+        defaults are filled in. "drop" removes them before they reach pytest, and
+        "report" keeps them. Either way, the number found is listed in the pyrameters
+        pytest plugin's terminal summary. Duplicates are kept without a report by
+        default.
+    sample : Union[int, float] = None
+        Only run a sample of the cases: a float between 0 and 1 is the fraction of
+        cases to run, and an int is the most cases to run. Cases are selected before
+        they are built, so unselected cases never have their defaults filled in.
+        Every case runs when --pyrameters-full or the PYRAMETERS_FULL environment
+        variable is set, eg: for nightly runs.
+    seed : int = 0
+        Selects which cases are in the sample. The same seed always selects the same
+        cases, and a case's selection doesn't depend on the other cases.
+    stratify : str = None
+        Sample the cases for each value of this field separately, so that every value
+        is represented by at least one case.
+    workers : int = None
+        Call Field factory defaults concurrently in a pool of this many workers while
+        expanding, eg: for factories that read files. Cases keep their order, and a
+        failing factory raises its own exception. Without workers, factories are
+        called one at a time as each case is built.
+    executor : str = "thread"
+        The kind of pool to use for workers: "thread", or "process" for CPU-bound
+        factories. Factories (and their results) must be picklable to use processes,
+        and their timings aren't recorded.
+    concurrency : int = None
+        The most async Field factories to await at once while expanding. Async
+        factories are always awaited concurrently (unless lazy_defaults is True), at
+        most pyrameters.expansion.DEFAULT_CONCURRENCY at a time by default.
+    group_indirect : bool = False
+        Reorder the cases so that those with the same values for the indirect args
+        run one after another, grouped by each indirect arg in turn. Their fixtures
+        are then set up once per group, rather than each time their value changes.
+        Cases keep their order within each group, and a sequence of ids is reordered
+        along with them. The number of fixture setups saved is listed in the
+        pyrameters pytest plugin's terminal summary. Requires indirect, and a scope
+        wider than "function" (eg: scope="module"), as function scoped fixtures are
+        set up for every case anyway.
+    batch : int = None
+        Run up to this many cases in each pytest test, eg: for cases that take less
+        time to run than pytest takes per test. Cases with marks run on their own.
+        Each test's ID spans the IDs its cases would otherwise have, eg:
+        `test_foo[a-1..z-26]`, and the ID of every failing case is reported. Can't
+        be used with indirect. Fixtures are set up once per batch, not per case, so
+        every case in a batch shares the same function-scoped fixtures (eg: the
+        same tmp_path), and anything a case leaves in them is seen by the next.
+    batch_args : str = "cases"
+        How batched cases are passed to the test function. With "cases" the
+        pyrameters pytest plugin calls it once per case, with that case's values
+        and the batch's fixtures, and the test fails after every case has run if
+        any of them failed. Cases that skip or xfail don't stop the rest of the
+        batch, which is only skipped (or xfailed) when none of its cases passed or
+        failed. With "columns" it is called once per batch, with a tuple of every
+        case's value for each field.
+    compact : bool = False
+        Hold the expanded cases as one compact column per field (see
+        pyrameters.types.records.Records) rather than a tuple per case, which saves
+        memory for parametrizations with many cases. pytest only builds each case's
+        tuple while it collects the test function.
     """
-    # Figure out the pytest.mark.parametrize-compatible list of args to pass
-    if isinstance(argnames, str):
-        definition_str = argnames
-    elif isinstance(argnames, Definition):
-        definition_str = str(argnames)
-
-    # Build arg list, falling back to defaults where necessary
-    # TODO add Groups that change namespacing, allowing you to have groups of defaults.
-    #   eg: Group(x="1")(
-    #           dict(y="2"),
-    #           dict(x="3", y="4"),
-    #       )
-    #   would generate [("1", "2"), ("3", "4")]
-    arglist = []
-    for case_vals in argvalues:
-        if not isinstance(argnames, Definition) or not isinstance(case_vals, Mapping):
-            arglist.append(case_vals)
-            continue
-
-        # Check all the fields in the definition against the fields in the mapping,
-        # Falling back to defaults where they are missing from the provided mapping.
-        case = []
-        for name, f in argnames.fields.items():
-            # Can't use `.get` here because we won't know whether the returned val is
-            # from our default, or whether it was the actual value.
-            # Doing it this way allows a defaultdict provided as a test case to
-            # override a Definition default. This is a weird use case, but logically
-            # it makes sense to support.
-            # TODO could use a custom type (like an enum) as the default value to
-            # achieve this instead.
-            use_default = True
-            try:
-                val = case_vals[name]
-                use_default = False
-            except KeyError:
-                # Don't do the check for a default in here, otherwise we get a
-                # nested exception which isn't a great experience for the user.
-                pass
-            if use_default:
-                val, ok = f.default
-                if not ok:
-                    raise ValueError(
-                        (
-                            "No value provided for {key} in test case {} for test "
-                            "function {}, and test case definition has no default. "
-                            "Either define a default, or add a value for {key} to the "
-                            "test case."
-                        ).format(case_vals, f, key=name)
-                    )
-            case.append(val)
-        arglist.append(tuple(case) if len(argnames.fields) > 1 else case[0])
+    if cache and not (callable(argvalues) or hasattr(argvalues, "cache_key")):
+        raise ValueError(
+            "cache requires argvalues to be a callable or a CaseFile, got {}".format(
+                type(argvalues)
+            )
+        )
+
+    parametrization = Parametrization(
+        argnames,
+        argvalues,
+        indirect=indirect,
+        ids=ids,
+        scope=scope,
+        lazy=lazy or bool(cache),
+        lazy_defaults=lazy_defaults,
+        cache=cache,
+        shard=shard,
+        id_field=id_field,
+        duplicates=duplicates,
+        sample=sample,
+        seed=seed,
+        stratify=stratify,
+        workers=workers,
+        executor=executor,
+        concurrency=concurrency,
+        group_indirect=group_indirect,
+        batch=batch,
+        batch_args=batch_args,
+        compact=compact,
+    )
+
+    if parametrization.lazy:
+
+        def wrapper(f):
+            parametrization.register(f)
+            return pytest.mark.pyrameters.with_args(
+                parametrization, shard=parametrization.shard_for(f)
+            )(f)
 
-    # This requires:
-    # For each value:
-    #    if it's not of type Mapping, just pass as-is.
-    #    if it's of type Mapping then figure out whether it needs any defaults populated
-    #    pass resulting cases on
-    # TODO create tests for the above cases, with hypothesis magic.
+        return wrapper
 
     def wrapper(f):
+        # This requires:
+        # For each value:
+        #    if it's not of type Mapping, just pass as-is.
+        #    if it's of type Mapping then figure out whether it needs any defaults
+        #    populated
+        #    pass resulting cases on
+        # TODO create tests for the above cases, with hypothesis magic.
+        parametrization.register(f)
+        arglist = parametrization.cases(
+            shard=settings.current.shard if parametrization.shard_for(f) else None,
+            name=stats.function_name(f),
+        )
         return pytest.mark.parametrize(
-            definition_str, arglist, indirect=indirect, ids=ids, scope=scope
+            parametrization.definition_str,
+            arglist,
+            **parametrization.parametrize_kwargs
         )(f)
 
     return wrapper
+
+
+def from_file(
+    argnames: Union[str, Definition],
+    path,
+    format: str = None,
+    columns: Mapping = None,
+    deferred: bool = False,
+    **kwargs
+):
+    """
+    Like pyrameters.test_cases, but reads the cases from a CSV or JSON Lines file,
+    one case per row. See pyrameters.loaders.CaseFile for the supported formats.
+
+    Rows are streamed when the cases are expanded, so the whole file is never held
+    in memory at once. Combine with lazy=True to defer reading the file until pytest
+    collects the wrapped function.
+
+    Parameters
+    ----------
+    argnames : Union[str, pyrameters.Definition]
+        The fields of each case. Columns that don't match a field are ignored, and
+        missing columns are filled in from the Definition defaults.
+    path : Union[str, os.PathLike]
+        The file to read cases from.
+    format : str = None
+        Either "csv" or "jsonl". Inferred from the file extension when not provided.
+    columns : Mapping[str, str] = None
+        Renames columns (or JSON keys) to field names, eg: `{"Input Value": "value"}`.
+    deferred : bool = False
+        When True, expanding the cases only indexes the byte offset of each row. Rows
+        are parsed when each selected test is set up, so running a single case never
+        parses the rest of the file. Case IDs are the row's line number, eg:
+        `test_foo[line12]`.
+    **kwargs
+        Passed through to pyrameters.test_cases.
+    """
+    if isinstance(argnames, str):
+        argnames = Definition.intern(argnames)
+    case_file = CaseFile(path, format=format, columns=columns)
+
+    if not deferred:
+        return test_cases(argnames, case_file, **kwargs)
+
+    return test_cases(argnames, _DeferredRows(case_file, argnames), **kwargs)
+
+
+class _DeferredRows(object):
+    """
+    Yields a pytest.param of RowValues for every row of a CaseFile when called.
+    """
+
+    __slots__ = "case_file", "definition"
+
+    def __init__(self, case_file, definition):
+        self.case_file = case_file
+        self.definition = definition
+
+    def __call__(self):
+        for lineno, case in self.case_file.deferred(self.definition):
+            yield pytest.param(*case, id="line{}".format(lineno))
+
+    def cache_key(self):
+        return "deferred", self.case_file
+
+
+test_cases.from_file = from_file
+
+
+def _check_sample(sample):
+    if sample is None:
+        return None
+    if isinstance(sample, float) and 0 < sample <= 1:
+        return sample
+    if isinstance(sample, int) and not isinstance(sample, bool) and sample > 0:
+        return sample
+    raise ValueError(
+        "sample must be a fraction between 0 and 1 or a positive count, got {}".format(
+            sample
+        )
+    )
+
+
+def _value_id(name, val, index):
+    # Matches pytest's IDs for values that it doesn't call the ids function on.
+    if isinstance(val, str):
+        return val.encode("unicode_escape").decode("ascii")
+    if val is None or isinstance(val, (int, float, complex, Enum)):
+        return str(val)
+    if isinstance(getattr(val, "__name__", None), str):
+        return val.__name__
+    return "{}{}".format(name, index)
@@ -0,0 +1,591 @@
+"""
+Expansion turns the argvalues given to pyrameters.test_cases into the
+@pytest.mark.parametrize-compatible cases that are handed to pytest.
+
+Cases are produced one at a time, so argvalues can be any iterable (including
+generators), and nothing is held beyond what the consumer keeps.
+"""
+
+import asyncio
+import heapq
+from collections import deque
+from collections.abc import Iterable, Mapping
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import ExitStack
+from functools import partial
+from itertools import islice
+
+from pyrameters.hashing import _is_parameterset, stable_digest, stable_hash
+from pyrameters.types.columns import Columns
+from pyrameters.types.deferred import DeferredDefault
+from pyrameters.types.definition import Definition, parse_argnames
+from pyrameters.types.group import Group
+
+
+def iter_argvalues(argvalues):
+    """
+    Returns an iterator over argvalues.
+
+    argvalues may also be a zero-argument callable (eg: a generator function) that
+    returns the iterable of cases. This allows the cases to be produced again each
+    time they are expanded, rather than being a single-use generator.
+    """
+    if callable(argvalues) and not isinstance(argvalues, Iterable):
+        argvalues = argvalues()
+    return iter(argvalues)
+
+
+def walk(argvalues):
+    """
+    Yields (case, layers) for every case in argvalues, flattening any Groups into
+    their individual cases. layers is the tuple of Group defaults that apply to the
+    case, innermost first, and is empty for cases that aren't in a Group.
+    """
+    if isinstance(argvalues, Group):
+        argvalues = [argvalues]
+    for case_vals in iter_argvalues(argvalues):
+        if isinstance(case_vals, Group):
+            yield from case_vals.walk()
+        else:
+            yield case_vals, ()
+
+
+def in_shard(cases, shard):
+    """
+    Yields only the (case, layers) pairs from cases that belong to the given
+    (index, count) shard. Anything after the layers (eg: an ID) is passed through.
+
+    Cases are assigned to shards by a stable hash of their value as provided (ie:
+    before any defaults are filled in), so every case lands in exactly one shard, in
+    the same shard on every machine, and no case is built outside its own shard.
+    """
+    index, count = shard
+    for entry in cases:
+        if stable_hash(entry[0]) % count == index - 1:
+            yield entry
+
+
+def sampled(cases, size, seed=0, stratum=None):
+    """
+    Yields a sample of the (case, layers) pairs from cases, without building any of
+    them. Anything after the layers (eg: an ID) is passed through.
+
+    Each case is ranked by a stable hash of the seed and its value as provided, so
+    the same seed always selects the same cases, regardless of the order they come
+    in or what else is in the list.
+
+    Parameters
+    ----------
+    cases : Iterable[Tuple[Any, Tuple[Mapping]]]
+        (case, layers) pairs, eg: from walk.
+    size : Union[int, float]
+        A float is the fraction of cases to keep. Cases are selected as they stream
+        past, so this never holds cases in memory. An int is the most cases to
+        keep, the lowest ranked of which are held until the input is exhausted,
+        then yielded in their original order.
+    seed : int = 0
+        Selects a different sample of cases for each seed.
+    stratum : Callable[[Any, Tuple[Mapping]], Any] = None
+        Returns the stratum of a case. When provided, size applies to each stratum
+        separately, and every stratum keeps at least one case.
+    """
+    if isinstance(size, float):
+        yield from _sampled_fraction(cases, size, seed, stratum)
+        return
+
+    # Keep the size lowest ranked cases per stratum, as a max-heap of
+    # (-rank, -position, entry) so the highest ranked case is popped first. Positions
+    # are unique, so entries themselves are never compared.
+    heaps = {}
+    for i, entry in enumerate(cases):
+        case_vals, layers = entry[0], entry[1]
+        key = None if stratum is None else stable_digest(stratum(case_vals, layers))
+        heap = heaps.setdefault(key, [])
+        ranked = (-_rank(seed, case_vals, layers), -i, entry)
+        if len(heap) < size:
+            heapq.heappush(heap, ranked)
+        elif ranked[:2] > heap[0][:2]:
+            heapq.heapreplace(heap, ranked)
+
+    selected = sorted(
+        ((-i, entry) for heap in heaps.values() for _, i, entry in heap),
+        key=lambda selection: selection[0],
+    )
+    for _, entry in selected:
+        yield entry
+
+
+def _sampled_fraction(cases, fraction, seed, stratum):
+    # The lowest ranked case of each stratum that has nothing selected yet, which
+    # is yielded at the end if nothing in its stratum ever is.
+    fallbacks = {}
+    selected = set()
+    for entry in cases:
+        case_vals, layers = entry[0], entry[1]
+        rank = _rank(seed, case_vals, layers)
+        key = None if stratum is None else stable_digest(stratum(case_vals, layers))
+        if rank < fraction:
+            selected.add(key)
+            fallbacks.pop(key, None)
+            yield entry
+        elif stratum is not None and key not in selected:
+            fallback = fallbacks.get(key)
+            if fallback is None or rank < fallback[0]:
+                fallbacks[key] = (rank, entry)
+
+    for _, entry in fallbacks.values():
+        yield entry
+
+
+def _rank(seed, case_vals, layers):
+    # A stable, uniformly distributed rank in [0, 1).
+    return stable_hash((seed, case_vals, layers)) / _HASH_RANGE
+
+
+_HASH_RANGE = float(1 << 64)
+
+
+def stratum_of(argnames, name, columns=None):
+    """
+    Returns a function that looks up the value of the named field in a
+    (case, layers) pair without building the case, for use as a sampled stratum.
+
+    Mapping cases missing the field fall back to the Group layers, then to the
+    field's static default. Factory defaults are never called, so every case that
+    relies on one is in the same stratum.
+
+    When the cases are rows of pyrameters.Columns, columns is the names of the
+    columns in each row.
+    """
+    definition = argnames if isinstance(argnames, Definition) else None
+    names = parse_argnames(argnames) if definition is None else tuple(argnames.fields)
+    if name not in names:
+        raise ValueError(
+            "Unknown stratify field {}, expected one of {}".format(name, names)
+        )
+    position = names.index(name)
+    single = len(names) == 1
+
+    default = _NO_VALUE
+    if definition is not None and not definition.fields[name].has_factory:
+        value, ok = definition.fields[name].default
+        if ok:
+            default = value
+
+    if columns is not None:
+        if name not in columns:
+            return lambda row, layers: default
+        position = columns.index(name)
+        return lambda row, layers: row[position]
+
+    def stratum(case_vals, layers):
+        if type(case_vals) is tuple or not isinstance(case_vals, Mapping):
+            if _is_parameterset(case_vals):
+                case_vals = case_vals.values if not single else case_vals.values[0]
+            return case_vals if single else case_vals[position]
+        if name in case_vals:
+            return case_vals[name]
+        for layer in layers:
+            if name in layer:
+                return layer[name]
+        return default
+
+    return stratum
+
+
+# The stratum of cases that use a factory default, or have no value at all.
+_NO_VALUE = ("pyrameters", "no value")
+
+
+def expand(
+    argnames,
+    argvalues,
+    lazy_defaults=False,
+    shard=None,
+    sample=None,
+    seed=0,
+    stratify=None,
+    workers=None,
+    executor="thread",
+    concurrency=None,
+    ids=None,
+):
+    """
+    Lazily yields the @pytest.mark.parametrize-compatible case for each of the given
+    argvalues, falling back to defaults from argnames where necessary.
+
+    Parameters
+    ----------
+    argnames : Union[str, pyrameters.Definition]
+        The definition the cases must adhere to. Field defaults are only used when
+        this is a pyrameters.Definition, but Group defaults are used either way.
+    argvalues : Union[Iterable, Callable[[], Iterable], pyrameters.Columns]
+        The cases to expand. See pyrameters.test_cases for accepted case formats.
+    lazy_defaults : bool = False
+        When True, factory-backed defaults are not called. A DeferredDefault is used
+        in their place, which the pyrameters pytest plugin resolves at test setup.
+    shard : Tuple[int, int] = None
+        Only expand the cases in this (index, count) shard. See in_shard.
+    sample : Union[int, float] = None
+        Only expand a sample of the cases, either a fraction or a maximum count. The
+        sample is taken before sharding, so that sharded runs together cover the
+        same sample as an unsharded run. See sampled.
+    seed : int = 0
+        The seed of the sample.
+    stratify : str = None
+        Sample each value of this field separately. See stratum_of.
+    workers : int = None
+        Call factory-backed defaults concurrently in a pool of this many workers,
+        rather than one at a time as each case is built. See resolved. Has no effect
+        with lazy_defaults, as the factories are then called at test setup instead.
+    executor : str = "thread"
+        The kind of pool to use for workers, either "thread" (for factories that do
+        I/O) or "process" (for CPU-bound factories, which must be picklable).
+    concurrency : int = None
+        The most async factories to await at once. Async factories are always
+        awaited concurrently, unless lazy_defaults is True. See resolved.
+    ids : Iterable = None
+        The ID of each case in argvalues (after flattening any Groups), as given to
+        @pytest.mark.parametrize(ids=...). When provided, (case, id) pairs are
+        yielded instead, so that each ID stays with its case however the cases are
+        sampled or sharded.
+
+    Raises
+    ------
+    ValueError
+        If ids is provided, but its length doesn't match the number of cases. Only
+        raised once every case has been read.
+    """
+    row_names = None
+    if isinstance(argvalues, Columns):
+        # Rows are tuples of only the provided column values until they're built.
+        definition = argnames
+        if not isinstance(argnames, Definition):
+            definition = Definition.intern(argnames)
+        row_names = argvalues.names(definition.fields)
+        cases = ((row, ()) for row in argvalues.rows(row_names))
+    else:
+        cases = walk(argvalues)
+    if ids is not None:
+        cases = _tagged(cases, ids)
+    if sample is not None:
+        stratum = (
+            None
+            if stratify is None
+            else stratum_of(argnames, stratify, columns=row_names)
+        )
+        cases = sampled(cases, sample, seed=seed, stratum=stratum)
+    if shard is not None:
+        cases = in_shard(cases, shard)
+    if ids is not None:
+        # Building and resolving keep the cases in order, one for one, so the ID of
+        # each built case is the oldest one not yet handed out.
+        kept = deque()
+        cases = _untagged(cases, kept.append)
+
+    if row_names is not None:
+        build = partial(_build_rows, row_names)
+    else:
+        build = _build
+    if lazy_defaults or not _has_eager_factory(argnames, async_only=workers is None):
+        built = build(argnames, cases, lazy_defaults)
+    else:
+        built = resolved(
+            build(argnames, cases, True),
+            workers=workers,
+            executor=executor,
+            concurrency=concurrency,
+        )
+    if ids is not None:
+        return ((case, kept.popleft()) for case in built)
+    return built
+
+
+def _tagged(cases, ids):
+    ids = list(ids)
+    count = 0
+    for case_vals, layers in cases:
+        if count < len(ids):
+            yield case_vals, layers, ids[count]
+        count += 1
+    if count != len(ids):
+        raise ValueError(
+            "{} cases specified, with a different number of ids: {}".format(
+                count, len(ids)
+            )
+        )
+
+
+def _untagged(cases, keep):
+    for case_vals, layers, case_id in cases:
+        keep(case_id)
+        yield case_vals, layers
+
+
+def _has_eager_factory(argnames, async_only=False):
+    return isinstance(argnames, Definition) and any(
+        f.has_factory and not f.is_scoped and (f.is_async or not async_only)
+        for f in argnames.fields.values()
+    )
+
+
+def _build(argnames, cases, lazy_defaults):
+    # Mappings outside of Groups are passed through as-is without a Definition, so
+    # a builder for Group cases is only created then if there turns out to be one.
+    builder = group_builder = None
+    if isinstance(argnames, Definition):
+        builder = group_builder = argnames.builder(lazy_defaults=lazy_defaults)
+
+    for case_vals, layers in cases:
+        # Checking for a tuple first is much cheaper than the Mapping ABC check, and
+        # tuples are by far the most common non-Mapping case.
+        if type(case_vals) is tuple or not isinstance(case_vals, Mapping):
+            yield case_vals
+        elif layers:
+            if group_builder is None:
+                group_builder = Definition.intern(argnames).builder(
+                    lazy_defaults=lazy_defaults
+                )
+            yield group_builder.build_layered(case_vals, layers)
+        elif builder is not None:
+            yield builder.build(case_vals)
+        else:
+            yield case_vals
+
+
+def _build_rows(names, argnames, rows, lazy_defaults):
+    if not isinstance(argnames, Definition):
+        argnames = Definition.intern(argnames)
+    build_row = argnames.builder(lazy_defaults=lazy_defaults).row_builder(names)
+    for row, _ in rows:
+        yield build_row(row)
+
+
+def resolved(cases, workers=None, executor="thread", concurrency=None, window=None):
+    """
+    Yields the given expanded cases with every (unscoped) DeferredDefault value
+    replaced by its factory's result.
+
+    Cases are read window at a time and yielded in their original order. Within
+    each window, async factories are awaited concurrently on one event loop, and
+    sync factories are called in a pool of workers (or one at a time as each case
+    is yielded, without workers). A factory that raises stops the expansion with its
+    own exception, from the first case with a failing factory.
+
+    Parameters
+    ----------
+    cases : Iterable
+        Expanded cases with deferred defaults, eg: from expand with
+        lazy_defaults=True.
+    workers : int = None
+        The size of the pool for sync factories.
+    executor : str = "thread"
+        Either "thread" or "process".
+    concurrency : int = None
+        The most async factories to await at once. Defaults to DEFAULT_CONCURRENCY.
+    window : int = None
+        The most cases to hold at once. Defaults to 32 per worker, or per awaited
+        factory if that's more.
+    """
+    if executor not in _EXECUTORS:
+        raise ValueError(
+            "executor must be one of {}, got {}".format(tuple(_EXECUTORS), executor)
+        )
+    concurrency = DEFAULT_CONCURRENCY if concurrency is None else concurrency
+    if window is None:
+        window = 32 * max(workers or 1, concurrency)
+
+    cases = iter(cases)
+    with ExitStack() as stack:
+        pool = None
+        if workers is not None:
+            pool = stack.enter_context(_EXECUTORS[executor](max_workers=workers))
+        # Timings can only be recorded from threads in this process.
+        call = _call_factory if executor == "thread" else _factory
+
+        while True:
+            batch = list(islice(cases, window))
+            if not batch:
+                return
+
+            # Replace every deferred value with a function returning its result.
+            awaiting = []
+            for i, case in enumerate(batch):
+                if type(case) is tuple:
+                    if any(_is_deferred(v) for v in case):
+                        batch[i] = tuple(_result(v, pool, call, awaiting) for v in case)
+                elif _is_deferred(case):
+                    batch[i] = _result(case, pool, call, awaiting)
+            if awaiting:
+                asyncio.run(_gather(awaiting, concurrency))
+
+            for case in batch:
+                if type(case) is tuple:
+                    yield tuple(v() if type(v) is _Result else v for v in case)
+                elif type(case) is _Result:
+                    yield case()
+                else:
+                    yield case
+
+
+DEFAULT_CONCURRENCY = 16
+
+
+class _Result(object):
+    """
+    The pending result of a deferred value.
+    """
+
+    __slots__ = ("get",)
+
+    def __init__(self, get):
+        self.get = get
+
+    def __call__(self):
+        return self.get()
+
+
+class _Awaited(object):
+    """
+    The outcome of an async factory, filled in by _gather.
+    """
+
+    __slots__ = "field", "value", "error"
+
+    def __init__(self, field):
+        self.field = field
+        self.value = self.error = None
+
+    def get(self):
+        if self.error is not None:
+            raise self.error
+        return self.value
+
+
+def _result(val, pool, call, awaiting):
+    if not _is_deferred(val):
+        return val
+    field = val.field
+    if field.is_async:
+        awaited = _Awaited(field)
+        awaiting.append(awaited)
+        return _Result(awaited.get)
+    if pool is None:
+        return _Result(field.call_factory)
+    return _Result(pool.submit(call, field).result)
+
+
+async def _gather(awaiting, concurrency):
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def run(awaited):
+        async with semaphore:
+            try:
+                awaited.value = await awaited.field.await_factory()
+            except Exception as e:
+                awaited.error = e
+
+    await asyncio.gather(*(run(awaited) for awaited in awaiting))
+
+
+def _is_deferred(val):
+    return type(val) is DeferredDefault and not val.field.is_scoped
+
+
+def _call_factory(field):
+    return field.call_factory()
+
+
+def _factory(field):
+    return field.factory()
+
+
+_EXECUTORS = {"thread": ThreadPoolExecutor, "process": ProcessPoolExecutor}
+
+
+def unique(cases, on_duplicate, drop=True):
+    """
+    Yields the expanded cases that aren't exact duplicates of an earlier case,
+    calling on_duplicate with each duplicate that is found.
+
+    Cases are compared by a stable digest of their fully built values, so a Mapping
+    case that only differs from another in providing a value equal to the default
+    is a duplicate. pytest.param IDs and marks are ignored. Only the digests are
+    kept, not the cases themselves.
+
+    Parameters
+    ----------
+    cases : Iterable
+        Expanded cases, eg: from expand.
+    on_duplicate : Callable[[Any], None]
+        Called with every duplicate case.
+    drop : bool = True
+        When False, duplicates are reported to on_duplicate but still yielded.
+    """
+    seen = set()
+    for case in cases:
+        values = tuple(case.values) if _is_parameterset(case) else case
+        digest = stable_digest(values)
+        if digest in seen:
+            on_duplicate(case)
+            if drop:
+                continue
+        else:
+            seen.add(digest)
+        yield case
+
+
+def grouped(cases, positions, single=False):
+    """
+    Returns the expanded cases reordered so that cases with the same values in the
+    fields at the given positions run one after another, and the number of fixture
+    setups this saves.
+
+    Cases are grouped by the value of the first position, then within that by the
+    second, and so on. Groups are ordered by their first case, and cases keep their
+    order within each group, so already grouped cases aren't moved. A fixture
+    parametrized indirectly with one of these fields is set up once per run of
+    consecutive cases with the same value, as long as the parametrization's scope is
+    wider than the test function's.
+
+    Parameters
+    ----------
+    cases : Iterable
+        Expanded cases, eg: from expand.
+    positions : Sequence[int]
+        The positions of the fields to group by, outermost first.
+    single : bool = False
+        Whether each case is a single field's value, rather than a tuple of values.
+    """
+    cases = list(cases)
+    digests = []
+    for case in cases:
+        values = tuple(case.values) if _is_parameterset(case) else case
+        if single and not _is_parameterset(case):
+            values = (values,)
+        digests.append(tuple(stable_digest(values[p]) for p in positions))
+
+    # Rank each case's value at every position by the first case with the same
+    # values at that position and all of those before it.
+    firsts = {}
+    keys = [
+        tuple(firsts.setdefault(d[: i + 1], len(firsts)) for i in range(len(d)))
+        for d in digests
+    ]
+    order = sorted(range(len(cases)), key=keys.__getitem__)
+
+    saved = _setups(digests, range(len(cases))) - _setups(digests, order)
+    return [cases[i] for i in order], saved
+
+
+def _setups(digests, order):
+    # The number of times a value differs from the previous case's, per position.
+    setups = 0
+    previous = None
+    for i in order:
+        if previous is None:
+            setups += len(digests[i])
+        else:
+            setups += sum(a != b for a, b in zip(digests[i], previous))
+        previous = digests[i]
+    return setups
@@ -0,0 +1,219 @@
+"""
+Stable hashing of test case values.
+
+Unlike the builtin hash(), these hashes are the same in every process and on every
+machine, so they can be used to identify cases between runs and across CI nodes.
+"""
+
+import hashlib
+import struct
+from collections.abc import Mapping, Set
+from enum import Enum
+
+from pyrameters.types.deferred import Deferred
+
+_FLOAT = struct.Struct("<d")
+
+
+def stable_digest(value, digest_size=16):
+    """
+    Returns a stable digest of value, as bytes.
+
+    Supports the builtin scalar and container types, pytest.param() cases, Deferred
+    values (by their stable_key, without resolving them), and falls back to an
+    object's type and attributes (or its repr, for objects without any). Mappings
+    and sets hash the same regardless of their iteration order.
+
+    Raises
+    ------
+    ValueError
+        If value (or a value it contains) can only be described by a repr that
+        includes its memory address, which would differ between runs, or if it
+        contains itself.
+    """
+    h = hashlib.blake2b(digest_size=digest_size)
+    _update(h, value, set())
+    return h.digest()
+
+
+def stable_hash(value):
+    """
+    Returns a stable 64 bit hash of value, as an int.
+    """
+    return int.from_bytes(stable_digest(value, digest_size=8), "little")
+
+
+def _update(h, value, active):
+    # Every value is prefixed with a tag, so that eg: the string "1" and the int 1
+    # don't hash the same. active holds the ids of the values being hashed that
+    # contain this one, to catch values that contain themselves.
+    t = type(value)
+    if value is None or t is bool:
+        h.update(b"c" + repr(value).encode())
+    elif t is int:
+        h.update(b"i" + str(value).encode() + b";")
+    elif t is float:
+        h.update(b"f" + _FLOAT.pack(value))
+    elif t is str:
+        encoded = value.encode("utf-8", "surrogatepass")
+        h.update(b"s" + str(len(encoded)).encode() + b":" + encoded)
+    elif t is bytes or t is bytearray:
+        h.update(b"b" + str(len(value)).encode() + b":" + value)
+    elif id(value) in active:
+        raise ValueError(
+            "Can't stably hash {}, as it contains itself".format(t.__qualname__)
+        )
+    else:
+        active.add(id(value))
+        try:
+            _update_object(h, value, t, active)
+        finally:
+            active.discard(id(value))
+
+
+def _update_object(h, value, t, active):
+    if t is tuple or t is list:
+        h.update(b"t" + str(len(value)).encode() + b":")
+        for v in value:
+            _update(h, v, active)
+    elif _is_parameterset(value):
+        h.update(b"p" + repr(value.id).encode())
+        _update(h, tuple(value.values), active)
+    elif isinstance(value, Enum):
+        h.update(b"e" + type(value).__qualname__.encode() + b"." + value.name.encode())
+    elif isinstance(value, Mapping):
+        _update_unordered(h, b"m", (_digest(item, active) for item in value.items()))
+    elif isinstance(value, Set):
+        _update_unordered(h, b"u", (_digest(v, active) for v in value))
+    elif isinstance(value, tuple):
+        # Namedtuples and other tuple subclasses.
+        h.update(b"n" + t.__qualname__.encode())
+        _update(h, tuple(value), active)
+    elif isinstance(value, Deferred):
+        # Hashing a deferred value's attributes could mean hashing eg: a whole file
+        # index for every case, so it provides its own identity instead.
+        h.update(b"d" + _name(t).encode())
+        _update(h, value.stable_key(), active)
+    elif callable(value) and hasattr(value, "__qualname__"):
+        # Functions and classes, which would otherwise repr with their address.
+        h.update(b"q" + _name(value).encode())
+    elif hasattr(value, "__dict__") or hasattr(t, "__slots__"):
+        h.update(b"o" + _name(t).encode())
+        _update(h, _attributes(value), active)
+    else:
+        text = repr(value)
+        if t.__repr__ is object.__repr__ or " at 0x" in text:
+            raise ValueError(
+                "Can't stably hash {}, as its repr includes its memory address. Give "
+                "{} a __repr__ that only depends on its value.".format(
+                    text, t.__qualname__
+                )
+            )
+        h.update(b"r" + text.encode())
+
+
+def _digest(value, active):
+    h = hashlib.blake2b(digest_size=16)
+    _update(h, value, active)
+    return h.digest()
+
+
+def _name(value):
+    # Code that is exec'd (eg: compiled case builders) has no __module__.
+    return "{}.{}".format(getattr(value, "__module__", None) or "", value.__qualname__)
+
+
+def _attributes(value):
+    """
+    Returns the attributes of an object, from both its __dict__ and __slots__.
+    """
+    attributes = dict(getattr(value, "__dict__", {}))
+    for cls in type(value).__mro__:
+        slots = cls.__dict__.get("__slots__", ())
+        for name in (slots,) if isinstance(slots, str) else slots:
+            if name in ("__dict__", "__weakref__"):
+                continue
+            if name.startswith("__") and not name.endswith("__"):
+                name = "_{}{}".format(cls.__name__.lstrip("_"), name)
+            if hasattr(value, name):
+                attributes[name] = getattr(value, name)
+    return attributes
+
+
+def _update_unordered(h, tag, digests):
+    digests = sorted(digests)
+    h.update(tag + str(len(digests)).encode() + b":")
+    for d in digests:
+        h.update(d)
+
+
+def _is_parameterset(value):
+    # Checked by name so that hashing doesn't need to import pytest.
+    return type(value).__name__ == "ParameterSet" and hasattr(value, "marks")
+
+
+class CaseHasher(object):
+    """
+    Derives short, stable IDs for test cases from a stable hash of their values.
+
+    The field names are hashed along with each case, so that the same values in
+    differently named fields get different IDs. Digests of non-scalar values are
+    memoized by identity, so a large value shared between many cases (eg: a
+    default) is only hashed once for as long as it stays in the (bounded) memo.
+
+    Parameters
+    ----------
+    names : Sequence[str]
+        The field names of each case, in order.
+    key : str = None
+        A field whose value is used as the ID instead of the hash, eg: a "name"
+        field. Values that aren't strings or numbers are hashed.
+    size : int = 6
+        The number of bytes of the hash to use. IDs are twice this length.
+    """
+
+    __slots__ = "names", "key", "size", "_prefix", "_memo"
+
+    def __init__(self, names, key=None, size=6):
+        self.names = tuple(names)
+        if key is not None and key not in self.names:
+            raise ValueError(
+                "Unknown id field {}, expected one of {}".format(key, self.names)
+            )
+        self.key = None if key is None else self.names.index(key)
+        self.size = size
+        self._prefix = stable_digest(self.names)
+        self._memo = {}
+
+    def __call__(self, values):
+        """
+        Returns the ID for the case with the given values, in field order.
+        """
+        if self.key is not None:
+            val = values[self.key]
+            if type(val) in (str, int, float):
+                return str(val)
+            return self._digest(val).hex()[: self.size * 2]
+
+        h = hashlib.blake2b(self._prefix, digest_size=self.size)
+        for val in values:
+            h.update(self._digest(val))
+        return h.hexdigest()
+
+    def _digest(self, value):
+        if type(value) in _SCALARS:
+            return stable_digest(value)
+
+        memo = self._memo.get(id(value))
+        if memo is None or memo[0] is not value:
+            if len(self._memo) >= _MEMO_SIZE:
+                # Values that are shared between cases are quickly memoized again.
+                self._memo.clear()
+            # The value is kept alongside its digest, so that its id can't be reused
+            # by another object while it's in the memo.
+            memo = self._memo[id(value)] = (value, stable_digest(value))
+        return memo[1]
+
+
+_SCALARS = {type(None), bool, int, float, str}
+_MEMO_SIZE = 1024
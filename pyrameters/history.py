@@ -0,0 +1,161 @@
+"""
+History records how pyrameters cases did in previous runs, so that later runs can
+skip the cases that haven't changed since they last passed (see ChangedCases), or
+run the cases most likely to fail first (see CaseHistory).
+
+ChangedCases identifies cases by a fingerprint of their values and the source of
+their test function, so editing a case, or the test it is passed to, makes it a new
+case. CaseHistory identifies them by their pytest node ID.
+"""
+
+import inspect
+
+from pyrameters.hashing import stable_digest
+from pyrameters.types.deferred import Deferred
+
+
+def fingerprint(source, values):
+    """
+    Returns the fingerprint of a case, from the source digest of its test function
+    and its (name, value) pairs, as a hex string.
+
+    Deferred values are fingerprinted without being resolved, see
+    Deferred.fingerprint.
+    """
+    return stable_digest(
+        (source, tuple((name, _fingerprint_value(v)) for name, v in values))
+    ).hex()
+
+
+def source_digest(f):
+    """
+    Returns a digest of the source of the function f, or of its name when the
+    source isn't available.
+    """
+    try:
+        source = inspect.getsource(f)
+    except (OSError, TypeError):
+        source = "{}.{}".format(f.__module__, f.__qualname__)
+    return stable_digest(source).hex()
+
+
+def _fingerprint_value(value):
+    if isinstance(value, Deferred):
+        return value.fingerprint()
+    return value
+
+
+class ChangedCases(object):
+    """
+    The fingerprints of the cases of each test function that passed in previous
+    runs.
+
+    Parameters
+    ----------
+    passed : Mapping[str, Iterable[str]] = None
+        Fingerprints of passed cases by test function name, as returned by dump.
+    """
+
+    __slots__ = "passed", "_seen"
+
+    def __init__(self, passed=None):
+        self.passed = {name: set(fps) for name, fps in (passed or {}).items()}
+        # Fingerprints of this run's cases that passed (or are unchanged), by test
+        # function name. None for cases that failed.
+        self._seen = {}
+
+    def unchanged(self, name, fp):
+        """
+        Returns whether the case with fingerprint fp of the named test function
+        passed before, in which case it's kept as passed.
+        """
+        if fp in self.passed.get(name, ()):
+            self._seen.setdefault(name, {})[fp] = True
+            return True
+        return False
+
+    def record(self, name, fp, passed):
+        """
+        Records whether the case with fingerprint fp of the named test function
+        passed. A case only counts as passed if every phase of it passes.
+        """
+        seen = self._seen.setdefault(name, {})
+        seen[fp] = passed and seen.get(fp, True)
+
+    def dump(self):
+        """
+        Returns the passed fingerprints to store for the next run. The cases of test
+        functions that ran replace those from previous runs, so cases that no
+        longer exist are forgotten.
+        """
+        passed = dict(self.passed)
+        for name, seen in self._seen.items():
+            passed[name] = {fp for fp, ok in seen.items() if ok}
+        return {name: sorted(fps) for name, fps in passed.items()}
+
+
+class CaseHistory(object):
+    """
+    Whether each case failed the last time it ran, and how long its test took, by
+    case (pytest node) ID.
+
+    Parameters
+    ----------
+    cases : Mapping[str, Tuple[bool, float]] = None
+        (failed, duration) by node ID, as returned by dump. The duration is None for
+        cases that didn't get as far as running their test.
+    """
+
+    __slots__ = "cases", "_seen"
+
+    def __init__(self, cases=None):
+        self.cases = {nodeid: tuple(case) for nodeid, case in (cases or {}).items()}
+        self._seen = {}
+
+    def failed(self, nodeid):
+        """
+        Returns whether the case failed the last time it ran.
+        """
+        return self.cases.get(nodeid, (False, None))[0]
+
+    def duration(self, nodeid, default=None):
+        """
+        Returns how long the case's test took the last time it ran, or default.
+        """
+        duration = self.cases.get(nodeid, (False, None))[1]
+        return default if duration is None else duration
+
+    def order(self, nodeids):
+        """
+        Returns the indices of nodeids, ordered by cases that failed last time first,
+        then by fastest first. Cases without a recorded duration count as instant,
+        as new cases are as likely to fail as anything. Ties keep their order.
+        """
+        return sorted(
+            range(len(nodeids)),
+            key=lambda i: (not self.failed(nodeids[i]), self.duration(nodeids[i], 0)),
+        )
+
+    def record(self, nodeid, when, failed, duration):
+        """
+        Records the outcome of one phase ("setup", "call" or "teardown") of a case.
+        The case counts as failed if any phase fails, and its duration is that of the
+        "call" phase.
+        """
+        seen = self._seen.get(nodeid, (False, None))
+        self._seen[nodeid] = (
+            seen[0] or failed,
+            duration if when == "call" else seen[1],
+        )
+
+    def dump(self):
+        """
+        Returns the history to store for the next run, updated with this run's
+        cases. Durations of cases that didn't run their test this time are kept.
+        """
+        cases = dict(self.cases)
+        for nodeid, (failed, duration) in self._seen.items():
+            if duration is None:
+                duration = self.duration(nodeid)
+            cases[nodeid] = (failed, duration)
+        return {nodeid: list(case) for nodeid, case in cases.items()}
@@ -0,0 +1,209 @@
+"""
+Loaders stream test cases from data files, one row per case.
+
+Supported formats are CSV (with a header row) and JSON Lines (one JSON object per
+line). Every row becomes a Mapping, so any fields missing from a row are filled in
+from the Definition defaults like any other Mapping test case.
+"""
+
+import csv
+import io
+import json
+import os
+from array import array
+
+from pyrameters.cache import CacheFile
+from pyrameters.types.deferred import Deferred
+
+_FORMATS = {".csv": "csv", ".jsonl": "jsonl", ".ndjson": "jsonl"}
+
+_UNKNOWN_FORMAT_ERROR = (
+    "Unable to infer the format of {}. Pass format='csv' or format='jsonl'."
+)
+
+
+class CaseFile(object):
+    """
+    A CSV or JSON Lines file of test cases.
+
+    Iterating over a CaseFile streams its rows as Mappings, without holding more than
+    one row in memory at a time. index() returns the byte offset of every row, which
+    load() uses to parse a single row without reading the rest of the file.
+
+    Parameters
+    ----------
+    path : Union[str, os.PathLike]
+        The file to read cases from.
+    format : str = None
+        Either "csv" or "jsonl". Inferred from the file extension when not provided.
+    columns : Mapping[str, str] = None
+        Renames columns (or JSON keys) to Definition field names, eg:
+        `{"Input Value": "value"}`. Columns that aren't renamed keep their name.
+    """
+
+    __slots__ = "path", "format", "columns", "_index", "_last"
+
+    def __init__(self, path, format=None, columns=None):
+        self.path = os.fspath(path)
+        if format is None:
+            format = _FORMATS.get(os.path.splitext(self.path)[1].lower())
+            if format is None:
+                raise ValueError(_UNKNOWN_FORMAT_ERROR.format(self.path))
+        if format not in _FORMATS.values():
+            raise ValueError("Unsupported format {}".format(format))
+
+        self.format = format
+        self.columns = dict(columns or {})
+        self._index = None
+        self._last = None
+
+    def __repr__(self):
+        return "CaseFile(path={}, format={})".format(self.path, self.format)
+
+    def __iter__(self):
+        with open(self.path, newline="", encoding="utf-8") as f:
+            if self.format == "csv":
+                reader = csv.reader(f)
+                header = self._rename(next(reader, []))
+                for row in reader:
+                    if row:
+                        yield dict(zip(header, row))
+            else:
+                for line in f:
+                    if line.strip():
+                        yield self._parse_json(line)
+
+    def index(self):
+        """
+        Returns the (line numbers, byte offsets) of every row in the file, as a pair
+        of arrays.
+
+        Building the index only scans for line breaks, it doesn't parse any rows. It
+        is cached until the file's size or modification time changes.
+        """
+        stat = os.stat(self.path)
+        key = (stat.st_size, stat.st_mtime_ns)
+        if self._index is not None and self._index[0] == key:
+            return self._index[1]
+
+        linenos, offsets = array("q"), array("q")
+        with open(self.path, "rb") as f:
+            offset = 0
+            for lineno, line in enumerate(f, start=1):
+                if self.format == "csv" and line.count(b'"') % 2:
+                    # Quoted fields spanning lines can't be indexed by line.
+                    raise ValueError(
+                        "Multi-line CSV records are not supported: {} line {}".format(
+                            self.path, lineno
+                        )
+                    )
+                if line.strip() and not (self.format == "csv" and lineno == 1):
+                    linenos.append(lineno)
+                    offsets.append(offset)
+                offset += len(line)
+
+        self._index = (key, (linenos, offsets))
+        return linenos, offsets
+
+    def load(self, offset):
+        """
+        Parses the single row starting at the given byte offset into a Mapping.
+        """
+        with open(self.path, "rb") as f:
+            if self.format == "csv":
+                header = self._rename(_parse_csv_line(f.readline()))
+                f.seek(offset)
+                return dict(zip(header, _parse_csv_line(f.readline())))
+
+            f.seek(offset)
+            return self._parse_json(f.readline().decode("utf-8"))
+
+    def raw(self, offset):
+        """
+        Returns the unparsed bytes of the row starting at the given byte offset, and
+        the header row for CSV files.
+        """
+        with open(self.path, "rb") as f:
+            header = f.readline() if self.format == "csv" else b""
+            f.seek(offset)
+            return header + f.readline()
+
+    def build(self, offset, definition):
+        """
+        Loads the row at the given byte offset, and builds it into a case with the
+        given Definition.
+
+        The most recently built row is kept, so that resolving every field of one
+        case only parses its row once.
+        """
+        if self._last is None or self._last[0] != offset:
+            self._last = (offset, definition.builder()(self.load(offset)))
+        return self._last[1]
+
+    def deferred(self, definition):
+        """
+        Yields (line number, case) for every row in the file, where each value of the
+        case is a RowValue that only loads its row when resolved.
+        """
+        linenos, offsets = self.index()
+        size = len(definition.fields)
+        for lineno, offset in zip(linenos, offsets):
+            yield lineno, tuple(
+                RowValue(self, offset, definition, None if size == 1 else i)
+                for i in range(size)
+            )
+
+    def cache_key(self):
+        """
+        Identifies this file and its contents in a pyrameters collection cache key.
+        """
+        return CacheFile(self.path), self.format, sorted(self.columns.items())
+
+    def _rename(self, names):
+        return [self.columns.get(name, name) for name in names]
+
+    def _parse_json(self, line):
+        row = json.loads(line)
+        if not isinstance(row, dict):
+            raise ValueError(
+                "Expected a JSON object per line in {}, got {}".format(
+                    self.path, type(row).__name__
+                )
+            )
+        if not self.columns:
+            return row
+        return {self.columns.get(k, k): v for k, v in row.items()}
+
+
+class RowValue(Deferred):
+    """
+    A single field value from a CaseFile row, which is loaded when resolved.
+    """
+
+    __slots__ = "case_file", "offset", "definition", "position"
+
+    def __init__(self, case_file, offset, definition, position):
+        self.case_file = case_file
+        self.offset = offset
+        self.definition = definition
+        self.position = position
+
+    def __repr__(self):
+        return "RowValue(path={}, offset={}, position={})".format(
+            self.case_file.path, self.offset, self.position
+        )
+
+    def resolve(self):
+        case = self.case_file.build(self.offset, self.definition)
+        return case if self.position is None else case[self.position]
+
+    def fingerprint(self):
+        return self.position, self.case_file.columns, self.case_file.raw(self.offset)
+
+    def stable_key(self):
+        # Only identifies the row, as reading it would defeat deferring it.
+        return self.case_file.path, self.offset, self.position
+
+
+def _parse_csv_line(line):
+    return next(csv.reader(io.StringIO(line.decode("utf-8"), newline="")), [])
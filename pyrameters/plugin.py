@@ -0,0 +1,619 @@
+"""
+The pyrameters pytest plugin.
+
+This is registered automatically via the pytest11 entry point when pyrameters is
+installed, and can otherwise be enabled with `-p pyrameters.plugin`.
+"""
+
+import inspect
+import itertools
+import json
+import traceback
+import warnings
+
+import pytest
+
+from pyrameters import scopes, settings, stats
+from pyrameters.cache import CollectionCache, Uncacheable
+from pyrameters.history import CaseHistory, ChangedCases, fingerprint, source_digest
+from pyrameters.types.deferred import Deferred
+
+_FILE_DIGESTS_KEY = "pyrameters/file-digests"
+_PASSED_KEY = "pyrameters/passed"
+_HISTORY_KEY = "pyrameters/history"
+_COSTS_KEY = "pyrameters/costs/{}"
+_TIMINGS_OUTPUT = "pyrameters_timings"
+
+_collection_cache = pytest.StashKey()
+_previous_settings = pytest.StashKey()
+_previous_stats = pytest.StashKey()
+_resolved = pytest.StashKey()
+_changed_cases = pytest.StashKey()
+_fingerprint = pytest.StashKey()
+_case_history = pytest.StashKey()
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup("pyrameters")
+    group.addoption(
+        "--pyrameters-shard",
+        metavar="INDEX/COUNT",
+        default=None,
+        help="Only expand and run the pyrameters cases in this shard, eg: 3/16. "
+        "Cases are assigned to shards by a stable hash. "
+        "Defaults to the {} environment variable.".format(settings.SHARD_ENV),
+    )
+    group.addoption(
+        "--pyrameters-full",
+        action="store_true",
+        default=None,
+        help="Run every case of sampled parametrizations, instead of their sample. "
+        "Defaults to the {} environment variable.".format(settings.FULL_ENV),
+    )
+    group.addoption(
+        "--pyrameters-timings",
+        action="store_true",
+        default=False,
+        help="Time case expansion, Field factories and test cases, and list the "
+        "slowest in the terminal summary.",
+    )
+    group.addoption(
+        "--pyrameters-timings-file",
+        metavar="PATH",
+        default=None,
+        help="Write every pyrameters timing to this file, as JSON. Implies "
+        "--pyrameters-timings.",
+    )
+    group.addoption(
+        "--pyrameters-changed",
+        action="store_true",
+        default=False,
+        help="Only run the pyrameters cases that are new, have changed, or haven't "
+        "passed since the last run with this option. Other tests always run.",
+    )
+    group.addoption(
+        "--pyrameters-order",
+        choices=("given", "history"),
+        default="given",
+        help="The order to run the cases of each test_cases parametrization in. "
+        '"history" runs the cases that failed last time first, then the fastest '
+        "first, using the outcomes and durations recorded by earlier runs with this "
+        'option. Default: "given", the order of argvalues.',
+    )
+    group.addoption(
+        "--pyrameters-balance",
+        action="store_true",
+        default=False,
+        help="With pytest-xdist, assign tests to workers so that each has about the "
+        "same total duration, using the durations recorded by earlier runs with "
+        "this option, or Field cost hints for tests that haven't run before.",
+    )
+    parser.addini(
+        "pyrameters_factory_cache_size",
+        "The most scoped Field factory results to keep at once. Default: {}".format(
+            scopes.DEFAULT_MAXSIZE
+        ),
+        default=str(scopes.DEFAULT_MAXSIZE),
+    )
+
+
+def pytest_configure(config):
+    config.addinivalue_line(
+        "markers",
+        "pyrameters(parametrization): cases to expand at collection time. "
+        "Added by pyrameters.test_cases(..., lazy=True), not intended for direct use.",
+    )
+    config.addinivalue_line(
+        "markers",
+        "pyrameters_batch(ids, names, call): a batch of cases. Added by "
+        "pyrameters.test_cases(..., batch=N), not intended for direct use.",
+    )
+
+    # Settings are module state so that they also apply to test_cases decorators
+    # evaluated at import time, so the previous settings are restored afterwards.
+    try:
+        current = settings.Settings.from_env()
+        shard = config.getoption("pyrameters_shard")
+        if shard is not None:
+            current.shard = settings.parse_shard(shard)
+        if config.getoption("pyrameters_full"):
+            current.full = True
+    except ValueError as e:
+        raise pytest.UsageError(str(e))
+    config.stash[_previous_settings] = settings.current
+    settings.current = current
+    config.stash[_previous_stats] = stats.current
+    stats.current = stats.Stats(
+        timing=bool(
+            config.getoption("pyrameters_timings")
+            or config.getoption("pyrameters_timings_file")
+        )
+    )
+
+    if config.getoption("pyrameters_order") == "history" or config.getoption(
+        "pyrameters_balance"
+    ):
+        if getattr(config, "cache", None) is None:
+            raise pytest.UsageError(
+                "--pyrameters-order=history and --pyrameters-balance require the "
+                "cacheprovider"
+            )
+        history = config.stash[_case_history] = CaseHistory(
+            config.cache.get(_HISTORY_KEY, {})
+        )
+        # Reports from pytest-xdist workers are also logged by the controller, so
+        # only the controller (or a run without xdist) records them.
+        if not _is_worker(config):
+            config.pluginmanager.register(_HistoryRecorder(history))
+
+
+def pytest_sessionstart(session):
+    try:
+        maxsize = int(session.config.getini("pyrameters_factory_cache_size"))
+    except ValueError as e:
+        raise pytest.UsageError(
+            "Invalid pyrameters_factory_cache_size: {}".format(e)
+        ) from None
+    scopes.cache = scopes.FactoryCache(maxsize)
+
+
+def pytest_unconfigure(config):
+    if _previous_settings in config.stash:
+        settings.current = config.stash[_previous_settings]
+    if _previous_stats in config.stash:
+        stats.current = config.stash[_previous_stats]
+
+
+def pytest_sessionfinish(session):
+    scopes.cache.clear()
+
+    changed = session.config.stash.get(_changed_cases, None)
+    if changed is not None:
+        session.config.cache.set(_PASSED_KEY, changed.dump())
+    history = session.config.stash.get(_case_history, None)
+    if history is not None and not _is_worker(session.config):
+        session.config.cache.set(_HISTORY_KEY, history.dump())
+
+    path = session.config.getoption("pyrameters_timings_file")
+    if _is_worker(session.config):
+        # The controller reports every worker's timings, see pytest_testnodedown.
+        if stats.current.timing:
+            session.config.workeroutput[_TIMINGS_OUTPUT] = stats.current.timings
+    elif path is not None:
+        with open(path, "w") as f:
+            json.dump(
+                {
+                    kind: [
+                        dict(name=name, calls=calls, seconds=seconds)
+                        for name, calls, seconds in stats.current.slowest(kind)
+                    ]
+                    for kind in stats.KINDS
+                },
+                f,
+                indent=2,
+            )
+
+    cache = session.config.stash.get(_collection_cache, None)
+    if cache is not None:
+        session.config.cache.set(_FILE_DIGESTS_KEY, cache.file_digests)
+
+
+@pytest.hookimpl(optionalhook=True)
+def pytest_testnodedown(node, error):
+    # Collects the timings of each pytest-xdist worker on the controller.
+    timings = getattr(node, "workeroutput", {}).get(_TIMINGS_OUTPUT)
+    if timings is not None:
+        stats.current.merge_timings(timings)
+
+
+def pytest_generate_tests(metafunc):
+    for mark in metafunc.definition.iter_markers(name="pyrameters"):
+        parametrization = mark.args[0]
+        shard = settings.current.shard if mark.kwargs.get("shard") else None
+        parametrization.parametrize(
+            metafunc,
+            cases=_cached_cases(metafunc, parametrization, shard),
+            shard=shard,
+        )
+
+
+def pytest_collection_modifyitems(config, items):
+    if config.getoption("pyrameters_changed"):
+        _deselect_unchanged(config, items)
+    if config.getoption("pyrameters_order") == "history":
+        _order_by_history(config, items)
+    if config.getoption("pyrameters_balance") and _is_worker(config):
+        # Only workers collect, so they pass the cost hints on to the scheduler.
+        config.cache.set(
+            _COSTS_KEY.format(config.workerinput["workerid"]), _cost_hints(items)
+        )
+
+
+@pytest.hookimpl(optionalhook=True)
+def pytest_xdist_make_scheduler(config, log):
+    if not config.getoption("pyrameters_balance"):
+        return None
+
+    from pyrameters.scheduling import DurationScheduling
+
+    return DurationScheduling(
+        config,
+        log,
+        history=config.stash[_case_history],
+        hints=lambda workerids: _read_cost_hints(config, workerids),
+    )
+
+
+class _HistoryRecorder(object):
+    """
+    Records the outcome and duration of every test in a CaseHistory.
+    """
+
+    __slots__ = ("history",)
+
+    def __init__(self, history):
+        self.history = history
+
+    def pytest_runtest_logreport(self, report):
+        self.history.record(report.nodeid, report.when, report.failed, report.duration)
+
+
+def _cost_hints(items):
+    """
+    Returns the expected duration of each pyrameters case with Field cost hints, by
+    node ID.
+    """
+    hints = {}
+    for item in items:
+        costs = getattr(getattr(item, "function", None), "_pyrameters_costs", None)
+        if not costs or not _is_case(item):
+            continue
+        params = item.callspec.params
+        # Batches have a tuple of each case's value per field.
+        batch = item.get_closest_marker("pyrameters_batch") is not None
+        hints[item.nodeid] = sum(
+            _cost(cost, params[name] if batch else (params[name],))
+            for name, cost in costs.items()
+            if name in params
+        )
+    return hints
+
+
+def _cost(cost, values):
+    if not callable(cost):
+        return cost * len(values)
+    # Deferred values aren't known until the case runs.
+    return sum(cost(v) for v in values if not isinstance(v, Deferred))
+
+
+def _read_cost_hints(config, workerids):
+    for workerid in workerids:
+        hints = config.cache.get(_COSTS_KEY.format(workerid), None)
+        if hints is not None:
+            return hints
+    return {}
+
+
+def _is_worker(config):
+    return hasattr(config, "workerinput")
+
+
+def _order_by_history(config, items):
+    """
+    Reorders each run of consecutive items from the same test_cases test function
+    by their history.
+    """
+    history = config.stash[_case_history]
+    ordered = []
+    for key, run in itertools.groupby(items, key=_case_function_key):
+        run = list(run)
+        if key is not None:
+            run = [run[i] for i in history.order([item.nodeid for item in run])]
+        ordered.extend(run)
+    items[:] = ordered
+
+
+def _is_case(item):
+    """
+    Whether item is a case from a pyrameters.test_cases parametrization.
+    """
+    return bool(
+        getattr(getattr(item, "function", None), "_pyrameters_names", ())
+    ) and hasattr(item, "callspec")
+
+
+def _case_function_key(item):
+    return _function_key(item) if _is_case(item) else None
+
+
+def _deselect_unchanged(config, items):
+    if getattr(config, "cache", None) is None:
+        raise pytest.UsageError("--pyrameters-changed requires the cacheprovider")
+
+    changed = config.stash[_changed_cases] = ChangedCases(
+        config.cache.get(_PASSED_KEY, {})
+    )
+    sources = {}
+    selected, deselected = [], []
+    for item in items:
+        if not _is_case(item):
+            selected.append(item)
+            continue
+
+        name = stats.function_name(item.function)
+        if name not in sources:
+            sources[name] = source_digest(item.function)
+        # Every parameter is included, so that cases that only differ in another
+        # parametrization of the function (eg: a plain parametrize) are told apart.
+        try:
+            fp = fingerprint(sources[name], sorted(item.callspec.params.items()))
+        except ValueError:
+            # Values that can't be fingerprinted are always treated as changed.
+            selected.append(item)
+            continue
+        item.stash[_fingerprint] = name, fp
+        if changed.unchanged(name, fp):
+            deselected.append(item)
+        else:
+            selected.append(item)
+
+    if deselected:
+        config.hook.pytest_deselected(items=deselected)
+        items[:] = selected
+
+
+def pytest_terminal_summary(terminalreporter):
+    _summarise_duplicates(terminalreporter)
+    _summarise_setups_saved(terminalreporter)
+    if stats.current.timing:
+        _summarise_timings(terminalreporter)
+
+
+def _summarise_timings(terminalreporter):
+    for kind, title in _TIMING_TITLES:
+        slowest = stats.current.slowest(kind, _SLOWEST)
+        if not slowest:
+            continue
+        terminalreporter.section("pyrameters slowest {}".format(title))
+        for name, calls, seconds in slowest:
+            terminalreporter.write_line(
+                "{:10.4f}s {:>8}x {}".format(seconds, calls, name)
+            )
+
+
+_TIMING_TITLES = (
+    ("expansion", "expansions"),
+    ("factory", "factories"),
+    ("case", "cases"),
+)
+_SLOWEST = 10
+
+
+def _summarise_duplicates(terminalreporter):
+    duplicates = stats.current.duplicates
+    if not duplicates:
+        return
+
+    terminalreporter.section("pyrameters duplicate cases")
+    dropped = 0
+    for name, (count, was_dropped) in sorted(duplicates.items()):
+        terminalreporter.write_line(
+            "{}: {} {}".format(name, count, "dropped" if was_dropped else "found")
+        )
+        if was_dropped:
+            dropped += count
+    terminalreporter.write_line(
+        "{} duplicate cases found, {} redundant runs saved".format(
+            sum(count for count, _ in duplicates.values()), dropped
+        )
+    )
+
+
+def _summarise_setups_saved(terminalreporter):
+    setups_saved = stats.current.setups_saved
+    if not setups_saved:
+        return
+
+    terminalreporter.section("pyrameters indirect fixture grouping")
+    for name, count in sorted(setups_saved.items()):
+        terminalreporter.write_line("{}: {} setups saved".format(name, count))
+    terminalreporter.write_line(
+        "{} indirect fixture setups saved".format(sum(setups_saved.values()))
+    )
+
+
+def _cached_cases(metafunc, parametrization, shard):
+    """
+    Returns the cases for parametrization from the collection cache, expanding and
+    caching them first if necessary. Returns None if caching is disabled.
+    """
+    config = metafunc.config
+    if not parametrization.cache or getattr(config, "cache", None) is None:
+        return None
+
+    cache = config.stash.get(_collection_cache, None)
+    if cache is None:
+        cache = CollectionCache(
+            config.cache.mkdir("pyrameters") / "cases",
+            file_digests=config.cache.get(_FILE_DIGESTS_KEY, {}),
+        )
+        config.stash[_collection_cache] = cache
+
+    name = stats.function_name(metafunc.function)
+    try:
+        key = cache.key(parametrization.cache_key(shard=shard, name=name))
+    except Uncacheable as e:
+        warnings.warn(
+            pytest.PytestWarning(
+                "pyrameters could not cache the cases for {}: {}".format(
+                    metafunc.definition.nodeid, e
+                )
+            )
+        )
+        return None
+
+    cases = cache.load(key)
+    if cases is None:
+        cases = parametrization.cases(shard=shard, name=name)
+        if not cache.store(key, cases):
+            warnings.warn(
+                pytest.PytestWarning(
+                    "pyrameters could not cache the cases for {}, as they can't be "
+                    "pickled".format(metafunc.definition.nodeid)
+                )
+            )
+    return cases
+
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_runtest_setup(item):
+    outcome = yield
+    if outcome.excinfo is not None:
+        return
+
+    # Fixtures are all set up by now, so swap any deferred case values for their
+    # actual values right before the test function receives them.
+    funcargs = getattr(item, "funcargs", {})
+    resolved = item.stash[_resolved] = []
+    batch = item.get_closest_marker("pyrameters_batch")
+    columns = () if batch is None else batch.kwargs["names"]
+    with scopes.active(function=_function_key(item), module=_module_key(item)):
+        for name, val in funcargs.items():
+            if isinstance(val, Deferred):
+                funcargs[name] = _resolve(val, resolved)
+            elif name in columns and any(isinstance(v, Deferred) for v in val):
+                # Batches have a tuple of each case's value per field.
+                funcargs[name] = tuple(_resolve(v, resolved) for v in val)
+
+
+def _resolve(val, resolved):
+    # A resolved value can be deferred itself, eg: a scoped default of a deferred
+    # from_file row.
+    while isinstance(val, Deferred):
+        value = val.resolve()
+        resolved.append((val, value))
+        val = value
+    return val
+
+
+@pytest.hookimpl(tryfirst=True)
+def pytest_pyfunc_call(pyfuncitem):
+    """
+    Calls the test function once per case of a batch of cases, failing after they
+    have all run if any of them failed. Every case gets the same fixture values, as
+    fixtures are set up once per test.
+
+    Cases that call pytest.skip() or pytest.xfail() are recorded as such, and the
+    rest of the batch still runs. The batch is skipped (or xfailed) when none of
+    its cases passed or failed.
+    """
+    __tracebackhide__ = True
+    batch = pyfuncitem.get_closest_marker("pyrameters_batch")
+    if batch is None or batch.kwargs["call"] != "cases":
+        return None
+    if inspect.iscoroutinefunction(pyfuncitem.obj):
+        # Left to pytest, which reports that async tests need a plugin.
+        return None
+
+    funcargs = pyfuncitem.funcargs
+    args = {name: funcargs[name] for name in pyfuncitem._fixtureinfo.argnames}
+    names = batch.kwargs["names"]
+    columns = [args[name] for name in names]
+    ids = batch.kwargs["ids"]
+    failures, skipped, xfailed = [], [], []
+    for i, case_id in enumerate(ids):
+        args.update(zip(names, (column[i] for column in columns)))
+        try:
+            pyfuncitem.obj(**args)
+        except pytest.skip.Exception as e:
+            skipped.append((case_id, e))
+        except pytest.xfail.Exception as e:
+            # Checked before failures, as XFailed is a kind of Failed.
+            xfailed.append((case_id, e))
+        except (Exception, pytest.fail.Exception) as e:
+            failures.append((case_id, e))
+
+    for key, cases in (
+        ("pyrameters_failed_cases", failures),
+        ("pyrameters_skipped_cases", skipped),
+        ("pyrameters_xfailed_cases", xfailed),
+    ):
+        if cases:
+            pyfuncitem.user_properties.append((key, [case_id for case_id, _ in cases]))
+
+    if failures:
+        others = ", ".join(
+            "{} {}".format(len(cases), outcome)
+            for outcome, cases in (("skipped", skipped), ("xfailed", xfailed))
+            if cases
+        )
+        raise _BatchFailure(
+            "{} of {} cases failed{}:\n{}".format(
+                len(failures),
+                len(ids),
+                " ({})".format(others) if others else "",
+                "\n".join(
+                    "[{}] {}".format(case_id, _describe_error(e))
+                    for case_id, e in failures
+                ),
+            )
+        ) from failures[0][1]
+    if len(skipped) + len(xfailed) == len(ids):
+        reason = "; ".join(
+            "[{}] {}".format(case_id, e.msg) for case_id, e in skipped + xfailed
+        )
+        if skipped:
+            pytest.skip(reason)
+        pytest.xfail(reason)
+    return True
+
+
+class _BatchFailure(AssertionError):
+    """
+    Some of the cases in a batch failed.
+    """
+
+
+def _describe_error(e):
+    return "".join(traceback.format_exception_only(type(e), e)).strip()
+
+
+def pytest_runtest_makereport(item, call):
+    if _fingerprint in item.stash:
+        name, fp = item.stash[_fingerprint]
+        item.config.stash[_changed_cases].record(name, fp, call.excinfo is None)
+
+    if call.when != "call" or not stats.current.timing:
+        return
+    if not hasattr(item, "callspec"):
+        return
+
+    name = stats.function_name(item.function)
+    if (
+        name in stats.current.timings["expansion"]
+        or item.get_closest_marker("pyrameters") is not None
+    ):
+        stats.current.add_timing("case", item.nodeid, call.duration)
+
+
+@pytest.hookimpl(trylast=True)
+def pytest_runtest_teardown(item, nextitem):
+    # Release resolved values (eg: unmap FileRegions) now that the test is done.
+    for deferred, value in item.stash.get(_resolved, ()):
+        deferred.release(value)
+    item.stash[_resolved] = []
+
+    # Tear down scoped factory results once the last test sharing them is done.
+    function, module = _function_key(item), _module_key(item)
+    if nextitem is None or _function_key(nextitem) != function:
+        scopes.cache.release("function", function)
+    if nextitem is None or _module_key(nextitem) != module:
+        scopes.cache.release("module", module)
+
+
+def _function_key(item):
+    return item.nodeid.split("[", 1)[0]
+
+
+def _module_key(item):
+    return item.nodeid.split("::", 1)[0]
@@ -0,0 +1,106 @@
+"""
+Duration-balanced scheduling of tests across pytest-xdist workers.
+
+Enabled with `--pyrameters-balance`, this replaces xdist's load scheduling with one
+that assigns every test to a worker up front, so that each worker gets about the
+same total expected duration. Importing this module requires pytest-xdist.
+"""
+
+import heapq
+import statistics
+
+from xdist.scheduler import LoadScheduling
+
+# The expected duration of tests, in seconds, when nothing is known about any test.
+DEFAULT_COST = 1.0
+
+
+def balance(costs, count):
+    """
+    Splits the indices of costs into count lists with about the same total cost,
+    by assigning the most expensive remaining index to the least loaded list.
+
+    Each list is returned in index order.
+    """
+    loads = [(0.0, i) for i in range(count)]
+    assigned = [[] for _ in range(count)]
+    for index in sorted(range(len(costs)), key=lambda i: -costs[i]):
+        load, i = heapq.heappop(loads)
+        assigned[i].append(index)
+        heapq.heappush(loads, (load + costs[index], i))
+    for indices in assigned:
+        indices.sort()
+    return assigned
+
+
+def expected_costs(nodeids, history, hints):
+    """
+    Returns the expected duration of each test in nodeids: its last recorded
+    duration, or else its cost hint from its Fields, or else the median duration of
+    the tests that have one.
+
+    Parameters
+    ----------
+    nodeids : Sequence[str]
+        The tests.
+    history : pyrameters.history.CaseHistory
+        Recorded durations.
+    hints : Mapping[str, float]
+        Cost hints by node ID.
+    """
+    durations = [history.duration(nodeid) for nodeid in nodeids]
+    known = [d for d in durations if d is not None]
+    default = statistics.median(known) if known else DEFAULT_COST
+    return [
+        d if d is not None else hints.get(nodeid, default)
+        for nodeid, d in zip(nodeids, durations)
+    ]
+
+
+class DurationScheduling(LoadScheduling):
+    """
+    xdist LoadScheduling that balances the expected duration of each worker's
+    tests, rather than their number.
+
+    Tests that crash their worker are rescheduled by LoadScheduling as usual.
+
+    Parameters
+    ----------
+    config : pytest.Config
+    log : xdist.remote.Producer = None
+    history : pyrameters.history.CaseHistory
+        Recorded durations by node ID.
+    hints : Callable[[Sequence[str]], Mapping[str, float]]
+        Returns the cost hints of the collected tests by node ID, given the IDs of
+        the workers that collected them. Only called once every worker has
+        collected.
+    """
+
+    def __init__(self, config, log=None, history=None, hints=None):
+        super().__init__(config, log)
+        self.history = history
+        self.hints = hints
+
+    def schedule(self):
+        assert self.collection_is_completed
+
+        # Initial distribution already happened, or the collections differ, which
+        # LoadScheduling handles.
+        if self.collection is not None or not self._check_nodes_have_same_collection():
+            return super().schedule()
+
+        self.collection = next(iter(self.node2collection.values()))
+        if not self.collection:
+            return
+
+        costs = expected_costs(
+            self.collection,
+            self.history,
+            self.hints([node.gateway.id for node in self.nodes]),
+        )
+        for node, indices in zip(self.nodes, balance(costs, len(self.nodes))):
+            if indices:
+                self.node2pending[node].extend(indices)
+                node.send_runtest_some(indices)
+        for node in self.nodes:
+            node.shutdown()
@@ -0,0 +1,107 @@
+"""
+Scoped memoization of Field factory results.
+
+A Field with a scope other than "case" shares one factory result between every
+test in the same scope. Results are kept in a bounded LRU cache, and passed to the
+Field's teardown hook when their scope ends or when they're evicted.
+"""
+
+from collections import OrderedDict
+from contextlib import contextmanager
+
+SCOPES = ("case", "function", "module", "session")
+
+DEFAULT_MAXSIZE = 128
+
+
+class FactoryCache(object):
+    """
+    A bounded LRU cache of factory results, keyed by Field and scope key.
+
+    Parameters
+    ----------
+    maxsize : int = DEFAULT_MAXSIZE
+        The most results to keep at once. The least recently used result is torn
+        down and dropped to make room for a new one.
+    """
+
+    __slots__ = "maxsize", "_entries"
+
+    def __init__(self, maxsize=DEFAULT_MAXSIZE):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, field, key):
+        """
+        Returns the cached factory result for field in the scope with the given key,
+        calling the factory if there isn't one.
+        """
+        entry = (field, key)
+        try:
+            self._entries.move_to_end(entry)
+            return self._entries[entry]
+        except KeyError:
+            pass
+
+        val = field.call_factory()
+        self._entries[entry] = val
+        while len(self._entries) > self.maxsize:
+            (evicted, _), evicted_val = self._entries.popitem(last=False)
+            _teardown(evicted, evicted_val)
+        return val
+
+    def release(self, scope, key):
+        """
+        Tears down and drops every result for fields with the given scope and key.
+        """
+        released = [
+            entry
+            for entry in self._entries
+            if entry[0].scope == scope and entry[1] == key
+        ]
+        for entry in released:
+            _teardown(entry[0], self._entries.pop(entry))
+
+    def clear(self):
+        """
+        Tears down and drops every result, most recently used first.
+        """
+        while self._entries:
+            (field, _), val = self._entries.popitem()
+            _teardown(field, val)
+
+
+def _teardown(field, val):
+    if field.teardown is not None:
+        field.teardown(val)
+
+
+cache = FactoryCache()
+
+# The key of the currently active function and module scopes. There is only ever
+# one session, so it has no key.
+_active = {"function": None, "module": None, "session": None}
+
+
+def key(scope):
+    """
+    Returns the key of the currently active scope of the given kind.
+    """
+    return _active[scope]
+
+
+@contextmanager
+def active(function=None, module=None):
+    """
+    Activates the given function and module scope keys, so that scoped factory
+    results are shared with other tests using the same keys.
+    """
+    previous = dict(_active)
+    _active.update(function=function, module=module)
+    try:
+        yield
+    finally:
+        _active.update(previous)
@@ -0,0 +1,73 @@
+"""
+Settings that apply to every pyrameters parametrization in a test session.
+
+The pyrameters pytest plugin reads these from environment variables and the pytest
+command line when pytest is configured, so that invalid values are reported as usage
+errors rather than failing on import.
+"""
+
+import os
+
+SHARD_ENV = "PYRAMETERS_SHARD"
+FULL_ENV = "PYRAMETERS_FULL"
+
+
+class Settings(object):
+    """
+    Parameters
+    ----------
+    shard : Tuple[int, int] = None
+        (index, count) of the shard of cases to run, where index is 1-based. None to
+        run every case.
+    full : bool = False
+        When True, parametrizations that would only run a sample of their cases run
+        every case instead.
+    """
+
+    __slots__ = "shard", "full"
+
+    def __init__(self, shard=None, full=False):
+        self.shard = shard
+        self.full = full
+
+    def __repr__(self):
+        return "Settings(shard={}, full={})".format(self.shard, self.full)
+
+    @classmethod
+    def from_env(cls, environ=None):
+        environ = os.environ if environ is None else environ
+        return cls(
+            shard=parse_shard(environ.get(SHARD_ENV)),
+            full=parse_flag(environ.get(FULL_ENV)),
+        )
+
+
+def parse_shard(spec):
+    """
+    Parses a shard spec like "3/16" into (3, 16). Returns None for an empty spec.
+    """
+    if not spec:
+        return None
+
+    try:
+        index, count = (int(x) for x in spec.split("/"))
+    except ValueError:
+        raise ValueError(
+            'Invalid shard "{}". Expected INDEX/COUNT, eg: 3/16'.format(spec)
+        ) from None
+    if count < 1 or not 1 <= index <= count:
+        raise ValueError(
+            'Invalid shard "{}". INDEX must be between 1 and COUNT'.format(spec)
+        )
+    return index, count
+
+
+def parse_flag(value):
+    """
+    Parses an environment variable flag, where unset, empty, "0", "false" and "no"
+    are False.
+    """
+    return (value or "").strip().lower() not in ("", "0", "false", "no")
+
+
+current = Settings()
@@ -0,0 +1,136 @@
+"""
+Statistics gathered while expanding cases, for the pyrameters pytest plugin to
+report at the end of a test session.
+
+Like pyrameters.settings, these are module state so that test_cases decorators
+evaluated at import time can record them. The plugin replaces them with a fresh
+Stats for each session.
+
+Timings are only recorded once enabled, with the plugin's --pyrameters-timings
+option or by setting `pyrameters.stats.current.timing = True`. Functions added with
+add_listener are called with every timing as it is recorded, eg:
+
+    def pytest_configure(config):
+        pyrameters.stats.current.timing = True
+        pyrameters.stats.add_listener(lambda kind, name, seconds: ...)
+"""
+
+from time import perf_counter
+
+# What timings are recorded for: the expansion of each test function's cases, each
+# Field factory, and each test case's run time.
+KINDS = ("expansion", "factory", "case")
+
+
+class Stats(object):
+    """
+    Parameters
+    ----------
+    duplicates : Dict[str, Tuple[int, bool]] = None
+        The number of duplicate cases found in each test function's
+        parametrizations, and whether they were dropped, by function name.
+    timing : bool = False
+        Whether to record timings.
+    setups_saved : Dict[str, int] = None
+        The number of indirect fixture setups saved by grouping each test
+        function's cases, by function name.
+    """
+
+    __slots__ = "duplicates", "timing", "timings", "setups_saved"
+
+    def __init__(self, duplicates=None, timing=False, setups_saved=None):
+        self.duplicates = {} if duplicates is None else duplicates
+        self.timing = timing
+        self.setups_saved = {} if setups_saved is None else setups_saved
+        # kind -> name -> [count, total seconds]
+        self.timings = {kind: {} for kind in KINDS}
+
+    def __repr__(self):
+        return "Stats(duplicates={}, timing={})".format(self.duplicates, self.timing)
+
+    def add_duplicates(self, name, count, dropped):
+        """
+        Records count duplicate cases for the named test function.
+        """
+        previous, _ = self.duplicates.get(name, (0, dropped))
+        self.duplicates[name] = (previous + count, dropped)
+
+    def add_setups_saved(self, name, count):
+        """
+        Records that grouping the named test function's cases saved count indirect
+        fixture setups.
+        """
+        self.setups_saved[name] = self.setups_saved.get(name, 0) + count
+
+    def add_timing(self, kind, name, seconds):
+        """
+        Records that name (eg: a test function, for the "expansion" kind) took the
+        given number of seconds, and passes the timing on to every listener.
+        """
+        entry = self.timings[kind].setdefault(name, [0, 0.0])
+        entry[0] += 1
+        entry[1] += seconds
+        for listener in listeners:
+            listener(kind, name, seconds)
+
+    def merge_timings(self, timings):
+        """
+        Adds timings recorded elsewhere (eg: by a pytest-xdist worker), in the form
+        of Stats.timings, to these. Listeners aren't called, as they were called
+        where the timings were recorded.
+        """
+        for kind, names in timings.items():
+            for name, (calls, seconds) in names.items():
+                entry = self.timings[kind].setdefault(name, [0, 0.0])
+                entry[0] += calls
+                entry[1] += seconds
+
+    def slowest(self, kind, count=None):
+        """
+        Returns (name, calls, total seconds) for the count names of the given kind
+        with the highest total time, slowest first.
+        """
+        slowest = sorted(
+            (
+                (name, calls, seconds)
+                for name, (calls, seconds) in self.timings[kind].items()
+            ),
+            key=lambda t: t[2],
+            reverse=True,
+        )
+        return slowest if count is None else slowest[:count]
+
+    def timed(self, kind, name, fn, *args):
+        """
+        Returns fn(*args), recording how long it took if timings are enabled.
+        """
+        if not self.timing:
+            return fn(*args)
+        start = perf_counter()
+        try:
+            return fn(*args)
+        finally:
+            self.add_timing(kind, name, perf_counter() - start)
+
+
+def add_listener(listener):
+    """
+    Calls listener(kind, name, seconds) with every timing recorded from now on.
+    """
+    listeners.append(listener)
+
+
+def remove_listener(listener):
+    listeners.remove(listener)
+
+
+def function_name(f):
+    """
+    Returns the name test functions are recorded under, eg: "tests.test_foo.test_bar".
+    """
+    return "{}.{}".format(f.__module__, f.__qualname__)
+
+
+listeners = []
+
+current = Stats()
@@ -0,0 +1,185 @@
+"""
+CaseBuilder turns Mapping test cases into @pytest.mark.parametrize-compatible cases
+for a given Definition.
+
+The field order, defaults and factories are all looked up once, when the builder
+is created, and baked into a generated function so that the per-case work is just
+the key lookups.
+"""
+
+from pyrameters.types.deferred import DeferredDefault
+
+_MISSING_VALUE_ERROR = (
+    "No value provided for {key} in test case {} for test "
+    "function {}, and test case definition has no default. "
+    "Either define a default, or add a value for {key} to the "
+    "test case."
+)
+
+
+class CaseBuilder(object):
+    """
+    A compiled, callable case builder for a Definition.
+
+    Calling the builder with a Mapping test case returns the case as a tuple of
+    values in field order (or the bare value, for single field definitions), falling
+    back to field defaults where the Mapping doesn't contain a field.
+
+    The generated function itself is available as `build`, for callers that want to
+    skip the extra call through __call__ in tight loops. `build_layered` additionally
+    takes a sequence of Mappings (eg: Group defaults) to check, in order, for any
+    fields missing from the case before falling back to the field defaults.
+
+    When timed, factories are called through Field.call_factory so that their
+    timings are recorded. Async factories always are, so that they're awaited.
+
+    row_builder returns a similar function for cases given as tuples of column
+    values (see pyrameters.Columns) rather than as Mappings.
+    """
+
+    __slots__ = (
+        "names",
+        "lazy_defaults",
+        "timed",
+        "source",
+        "build",
+        "build_layered",
+        "_parts",
+        "_row_builders",
+    )
+
+    def __init__(self, fields, lazy_defaults=False, timed=False):
+        self.names = tuple(fields)
+        self.lazy_defaults = lazy_defaults
+        self.timed = timed
+
+        # Everything the generated functions need is bound as a default arg, which
+        # makes it a local (and so a fast) lookup inside the function.
+        namespace = {"_missing": _missing, "_NOT_FOUND": _NOT_FOUND}
+        bindings = ["_missing=_missing", "_NOT_FOUND=_NOT_FOUND"]
+        defaults = []
+        for i, (name, f) in enumerate(fields.items()):
+            # Scoped factory results depend on which test is running, so they can
+            # only be looked up when the test is set up.
+            if f.has_factory and (lazy_defaults or f.is_scoped):
+                bindings.append("d{i}=d{i}".format(i=i))
+                namespace["d{}".format(i)] = DeferredDefault(f)
+                defaults.append("v{i} = d{i}".format(i=i))
+            elif f.has_factory:
+                bindings.append("d{i}=d{i}".format(i=i))
+                if timed or f.is_async:
+                    namespace["d{}".format(i)] = f.call_factory
+                else:
+                    namespace["d{}".format(i)] = f.factory
+                defaults.append("v{i} = d{i}()".format(i=i))
+            else:
+                default, ok = f.default
+                if ok:
+                    bindings.append("d{i}=d{i}".format(i=i))
+                    namespace["d{}".format(i)] = default
+                    defaults.append("v{i} = d{i}".format(i=i))
+                else:
+                    bindings.append("f{i}=f{i}".format(i=i))
+                    namespace["f{}".format(i)] = f
+                    defaults.append("_missing(case, {!r}, f{})".format(name, i))
+
+        if len(self.names) > 1:
+            ret = "    return ({},)".format(
+                ", ".join("v{}".format(i) for i in range(len(self.names)))
+            )
+        else:
+            ret = "    return v0"
+
+        # build(case) looks each field up in the case, falling back to the field
+        # default.
+        lines = []
+        for i, name in enumerate(self.names):
+            lines.append("    try:")
+            lines.append("        v{} = case[{!r}]".format(i, name))
+            lines.append("    except KeyError:")
+            lines.append("        " + defaults[i])
+        lines.append(ret)
+        build = "def build(case, *, {}):\n{}\n".format(
+            ", ".join(bindings), "\n".join(lines)
+        )
+
+        # build_layered(case, layers) also checks each Mapping in layers, in order,
+        # before falling back to the field default.
+        lines = []
+        for i, name in enumerate(self.names):
+            lines.append("    try:")
+            lines.append("        v{} = case[{!r}]".format(i, name))
+            lines.append("    except KeyError:")
+            lines.append("        for layer in layers:")
+            lines.append(
+                "            v{} = layer.get({!r}, _NOT_FOUND)".format(i, name)
+            )
+            lines.append("            if v{} is not _NOT_FOUND:".format(i))
+            lines.append("                break")
+            lines.append("        else:")
+            lines.append("            " + defaults[i])
+        lines.append(ret)
+        build_layered = "def build_layered(case, layers, *, {}):\n{}\n".format(
+            ", ".join(bindings), "\n".join(lines)
+        )
+
+        self.source = build + "\n" + build_layered
+        exec(compile(self.source, "<pyrameters CaseBuilder>", "exec"), namespace)
+        self.build = namespace["build"]
+        self.build_layered = namespace["build_layered"]
+        self._parts = namespace, bindings, defaults, ret
+        self._row_builders = {}
+
+    def row_builder(self, columns):
+        """
+        Returns a compiled function that builds a case from a tuple of values for the
+        given column names, in order, falling back to the field defaults for every
+        field that isn't a column.
+
+        Raises ValueError if a field without a default isn't one of the columns.
+        """
+        columns = tuple(columns)
+        row_builder = self._row_builders.get(columns)
+        if row_builder is not None:
+            return row_builder
+
+        namespace, bindings, defaults, ret = self._parts
+        lines = []
+        for i, name in enumerate(self.names):
+            if name in columns:
+                lines.append("    v{} = row[{}]".format(i, columns.index(name)))
+            elif defaults[i].startswith("_missing"):
+                raise ValueError(
+                    "No column for {}, which has no default. Columns: {}".format(
+                        name, columns
+                    )
+                )
+            else:
+                lines.append("    " + defaults[i])
+        lines.append(ret)
+        source = "def build_row(row, *, {}):\n{}\n".format(
+            ", ".join(bindings), "\n".join(lines)
+        )
+        namespace = dict(namespace)
+        exec(compile(source, "<pyrameters CaseBuilder>", "exec"), namespace)
+        row_builder = self._row_builders[columns] = namespace["build_row"]
+        return row_builder
+
+    def __call__(self, case):
+        return self.build(case)
+
+    def __repr__(self):
+        return "CaseBuilder(names={}, lazy_defaults={}, timed={})".format(
+            self.names, self.lazy_defaults, self.timed
+        )
+
+
+# Marks a field missing from a layer, as None is a valid value.
+_NOT_FOUND = object()
+
+
+def _missing(case, name, f):
+    # Raised from a separate function so that the KeyError from the lookup in the
+    # generated function isn't chained onto this, which isn't a great experience for
+    # the user.
+    raise ValueError(_MISSING_VALUE_ERROR.format(case, f, key=name)) from None
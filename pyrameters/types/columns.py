@@ -0,0 +1,61 @@
+"""
+Columns represents test cases given as one sequence of values per field.
+"""
+
+
+class Columns(object):
+    """
+    Test cases given as columns of values, eg:
+
+        Columns(x=[1, 2, 3], y=numpy.array([4, 5, 6]))
+
+    expands to [(1, 4), (2, 5), (3, 6)] for Definition("x,y"). Columns can be any
+    sequences with a length, and must all be the same length. Fields that don't
+    have a column are filled in from their defaults, and columns that don't match a
+    field are ignored.
+
+    Cases are built straight from the column values, one row at a time, without
+    creating a Mapping per case.
+
+    Parameters
+    ----------
+    columns : Mapping[str, Sequence] = None
+        Columns by field name, for field names that can't be passed as kwargs.
+    **kwargs
+        Columns by field name.
+    """
+
+    __slots__ = ("columns",)
+
+    def __init__(self, columns=None, **kwargs):
+        self.columns = dict(columns or {}, **kwargs)
+        if not self.columns:
+            raise ValueError("Columns requires at least one column")
+
+        lengths = {name: len(column) for name, column in self.columns.items()}
+        if len(set(lengths.values())) > 1:
+            raise ValueError(
+                "Columns must all be the same length, got {}".format(lengths)
+            )
+
+    def __len__(self):
+        return len(next(iter(self.columns.values())))
+
+    def __repr__(self):
+        return "Columns({})".format(
+            ", ".join("{}=<{}>".format(k, len(v)) for k, v in self.columns.items())
+        )
+
+    def names(self, fields):
+        """
+        Returns the names of the columns that match one of the given field names, in
+        field order.
+        """
+        return tuple(name for name in fields if name in self.columns)
+
+    def rows(self, names):
+        """
+        Returns an iterator over tuples of the values of the named columns, one per
+        row.
+        """
+        return zip(*(self.columns[name] for name in names))
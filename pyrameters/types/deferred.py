@@ -0,0 +1,62 @@
+"""
+Deferred represents a case value that is only resolved when the test using it is
+set up, rather than when its cases are expanded.
+"""
+
+
+class Deferred(object):
+    """
+    Base class for case values that are resolved by the pyrameters pytest plugin
+    during test setup.
+    """
+
+    __slots__ = ()
+
+    def resolve(self):
+        raise NotImplementedError
+
+    def fingerprint(self):
+        """
+        Returns a value that changes whenever the resolved value would, without
+        resolving it. Used by pyrameters.history to tell when a case has changed.
+        """
+        return repr(self)
+
+    def stable_key(self):
+        """
+        Returns a value that identifies this deferred value without resolving it,
+        which is hashed in its place (eg: to pick its case's shard or sample).
+        """
+        return repr(self)
+
+    def release(self, value):
+        """
+        Called with the resolved value once the test using it has been torn down.
+        """
+
+
+class DeferredDefault(Deferred):
+    """
+    The default value of a factory-backed Field, which calls the factory on resolve.
+
+    A single instance is shared between every case that relies on the default, so
+    that deferring a default costs nothing per case.
+    """
+
+    __slots__ = ("field",)
+
+    def __init__(self, field):
+        self.field = field
+
+    def __repr__(self):
+        return "DeferredDefault(field={})".format(self.field.name)
+
+    def resolve(self):
+        val, _ = self.field.default
+        return val
+
+    def fingerprint(self):
+        return "default", self.field.name, self.field.factory_name
+
+    def stable_key(self):
+        return self.field.name, self.field.factory_name
@@ -3,7 +3,13 @@ Definition represents the definition of a pyrameters test, by which each provide
 test case must adhere.
 """
 
+from functools import lru_cache
+from types import MappingProxyType
+
+from pyrameters import stats
+from pyrameters.types.builder import CaseBuilder
 from pyrameters.types.field import Field
+from pyrameters.types.records import Records
 
 # TODO setup logging
 
@@ -15,11 +21,41 @@ _NAMELESS_FIELD_ERROR = (
 _UNSUPPORTED_TYPE_ERROR = "Unsupported type. Expected str or pyrameters.Field, got {}"
 
 
+@lru_cache(maxsize=1024)
+def parse_argnames(argnames):
+    """
+    Splits a pytest.mark.parametrize-style argnames string into a tuple of names.
+
+    Results are cached, as the same string is often used for many test functions.
+    """
+    # Perhaps surprisingly, this isn't as intelligent as I expected.
+    # I initially expected this to support complex CSV (eg: quoted fields),
+    # but looking at the pytest source revealed it only supports basic
+    # CSV and makes no attempt to do anything but strip whitespace:
+    # https://github.com/pytest-dev/pytest/blob/8ccc0177c8be85c0725981b3a9e867baeebfbe33/src/_pytest/mark/structures.py#L97-L104
+    # Oh well, makes life easier here!
+    names = tuple(x.strip() for x in argnames.split(",") if x.strip())
+    if len(set(names)) != len(names):
+        duplicate = next(n for n in names if names.count(n) > 1)
+        raise ValueError('Duplicate field name "{}"'.format(duplicate))
+    return names
+
+
 class Definition(object):
-    __slots__ = ("fields",)
+    """
+    The fields accepted by a test function, and their defaults.
+
+    Frozen definitions (see freeze and intern) can't have their fields changed, and
+    are hashable. Two frozen definitions are equal when their fields have the same
+    names, defaults and factories.
+    """
+
+    __slots__ = "fields", "_builders", "_key"
 
     def __init__(self, *args, **kwargs):
         self.fields = {}
+        self._builders = (None, {})
+        self._key = None
 
         if args:
             skip_first_arg = True
@@ -29,16 +65,7 @@ class Definition(object):
                 # Looks like:
                 #     "foo,bar,baz"
                 # Contains no other information.
-                # Perhaps surprisingly, this isn't as intelligent as I expected.
-                # I initially expected this to support complex CSV (eg: quoted fields),
-                # but looking at the pytest source revealed it only supports basic
-                # CSV and makes no attempt to do anything but strip whitespace:
-                # https://github.com/pytest-dev/pytest/blob/8ccc0177c8be85c0725981b3a9e867baeebfbe33/src/_pytest/mark/structures.py#L97-L104
-                # Oh well, makes life easier here!
-                argnames = [x.strip() for x in args[0].split(",") if x.strip()]
-                for arg in argnames:
-                    if arg in self.fields:
-                        raise ValueError('Duplicate field name "{}"'.format(arg))
+                for arg in parse_argnames(args[0]):
                     self.fields[arg] = Field.empty(name=arg)
 
             elif isinstance(args[0], self.__class__):
@@ -90,6 +117,127 @@ class Definition(object):
         if not self.fields:
             raise ValueError("No fields provided")
 
+    def __getstate__(self):
+        # Compiled builders can't be pickled, and are cheap to rebuild.
+        return dict(self.fields), self.frozen
+
+    def __setstate__(self, state):
+        fields, frozen = state
+        self.fields = fields
+        self._builders = (None, {})
+        self._key = None
+        if frozen:
+            self._freeze()
+
+    def __eq__(self, other):
+        if not isinstance(other, Definition) or not (self.frozen and other.frozen):
+            return self is other
+        return self._key == other._key
+
+    def __hash__(self):
+        if not self.frozen:
+            return object.__hash__(self)
+        return hash(self._key)
+
+    @property
+    def frozen(self):
+        """
+        Whether the fields of this definition can no longer be changed.
+        """
+        return self._key is not None
+
+    def freeze(self):
+        """
+        Returns a frozen copy of this definition, or the definition itself if it is
+        already frozen.
+        """
+        if self.frozen:
+            return self
+        frozen = Definition(self)
+        frozen._freeze()
+        return frozen
+
+    def _freeze(self):
+        self.fields = MappingProxyType(self.fields)
+        self._key = tuple(f.key for f in self.fields.values())
+
+    @classmethod
+    def intern(cls, *args, **kwargs):
+        """
+        Returns a frozen Definition of the given args and kwargs (see Definition),
+        which is the same object for every call with an equal definition.
+
+        Parsed string definitions are cached, so interning a definition string that
+        has been seen before is a single dict lookup. Interned definitions share their
+        compiled CaseBuilders, and live as long as the process.
+        """
+        by_string = not kwargs and len(args) == 1 and isinstance(args[0], str)
+        if by_string and args[0] in _interned_strings:
+            return _interned_strings[args[0]]
+
+        definition = cls(*args, **kwargs).freeze()
+        definition = _interned.setdefault(definition, definition)
+        if by_string:
+            _interned_strings[args[0]] = definition
+        return definition
+
+    def builder(self, lazy_defaults=False):
+        """
+        Returns the compiled CaseBuilder for this definition.
+
+        Builders are cached, and rebuilt only if the fields have changed since the
+        cached one was compiled. Factory timings are recorded by the builder while
+        pyrameters.stats timings are enabled.
+        """
+        cached_snapshot, builders = self._builders
+        if not self.frozen:
+            snapshot = tuple(self.fields.items())
+            if cached_snapshot != snapshot:
+                builders = {}
+                self._builders = (snapshot, builders)
+
+        key = lazy_defaults, stats.current.timing
+        if key not in builders:
+            builders[key] = CaseBuilder(self.fields, *key)
+        return builders[key]
+
+    def expand(self, argvalues, lazy_defaults=False, **kwargs):
+        """
+        Returns an iterator over the @pytest.mark.parametrize-compatible case for
+        each of argvalues, with any missing fields filled in from the defaults.
+
+        This is what pyrameters.test_cases hands to pytest, but it doesn't import or
+        need pytest, so cases can be expanded (eg: counted or inspected) outside of
+        a test run. Cases are built one at a time as the iterator is consumed.
+
+        Parameters
+        ----------
+        argvalues : Union[Iterable, Callable[[], Iterable], pyrameters.Columns]
+            The cases to expand. See pyrameters.test_cases for accepted formats.
+        lazy_defaults : bool = False
+            When True, factory-backed defaults are not called, and a DeferredDefault
+            is used in their place.
+        **kwargs
+            Passed to pyrameters.expansion.expand, eg: shard, sample or workers.
+        """
+        # Imported here, as expansion depends on this module.
+        from pyrameters.expansion import expand
+
+        return iter(expand(self, argvalues, lazy_defaults=lazy_defaults, **kwargs))
+
+    def records(self, argvalues, lazy_defaults=False, **kwargs):
+        """
+        Expands argvalues like expand, into a compact, column per field
+        pyrameters.types.records.Records.
+
+        Records take less memory to hold than a list of cases, and can be passed to
+        @pytest.mark.parametrize in place of one.
+        """
+        return Records(
+            tuple(self.fields),
+            self.expand(argvalues, lazy_defaults=lazy_defaults, **kwargs),
+        )
+
     def __str__(self):
         """
         This string representation is used as the arglist string that is passed to
@@ -107,3 +255,9 @@ class Definition(object):
         )
         output += ")"
         return output
+
+
+# Interned definitions, keyed by themselves (ie: by their fields), and by definition
+# string for those made from one.
+_interned = {}
+_interned_strings = {}
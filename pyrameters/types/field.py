@@ -1,7 +1,13 @@
 """
 Field represents an individual field in a Definition.
 """
+
+import asyncio
+import inspect
 from enum import Enum, unique
+from time import perf_counter
+
+from pyrameters import scopes, stats
 
 
 @unique
@@ -10,30 +16,78 @@ class defaultValues(Enum):
 
 
 class Field(object):
-    __slots__ = "name", "_default", "_factory"
+    __slots__ = "name", "_default", "_factory", "scope", "teardown", "cost"
 
     def __init__(
-        self, name: str = None, default=defaultValues.NO_DEFAULT, factory=None
+        self,
+        name: str = None,
+        default=defaultValues.NO_DEFAULT,
+        factory=None,
+        scope: str = "case",
+        teardown=None,
+        cost=None,
     ):
+        """
+        Parameters
+        ----------
+        name : str = None
+            The name of the field, which must match the test function argument.
+        default = NO_DEFAULT
+            The value to use when a Mapping test case doesn't provide this field.
+        factory : Callable[[], Any] = None
+            Called to make the default value, instead of a static default. May be an
+            async function, in which case pyrameters.test_cases awaits the factories
+            of many cases concurrently.
+        scope : str = "case"
+            How widely a factory result is shared. One of "case" (call the factory
+            for every case), "function", "module" or "session". Results for other
+            scopes are made when a test using them is set up, kept in a bounded LRU
+            cache shared by all fields, and torn down once their scope ends. Needs
+            the pyrameters pytest plugin.
+        teardown : Callable[[Any], None] = None
+            Called with each factory result that is dropped from the cache, for
+            fields with a scope other than "case".
+        cost : Union[float, Callable[[Any], float]] = None
+            A hint of how many seconds this field adds to a test, or a function
+            returning that from the field's value (eg: `lambda v: len(v) / 1e6`).
+            Used to balance tests between pytest-xdist workers with
+            --pyrameters-balance, for tests that haven't run before.
+        """
         if default != defaultValues.NO_DEFAULT and factory is not None:
             raise ValueError("Field cannot have both a default value and a factory.")
 
         if name is not None and not isinstance(name, str):
             raise ValueError("Name must be a string if provided.")
 
+        if scope not in scopes.SCOPES:
+            raise ValueError(
+                "Scope must be one of {}, got {}".format(scopes.SCOPES, scope)
+            )
+
+        if (scope != "case" or teardown is not None) and factory is None:
+            raise ValueError("Field scope and teardown require a factory.")
+
         self.name = name
         self._default = default
         self._factory = factory
+        self.scope = scope
+        self.teardown = teardown
+        self.cost = cost
 
     def __repr__(self):
         output = "Field("
         output += "name={}".format(self.name)
 
-        default_val, has_default = self.default
-        output += ", has_default={}".format(has_default)
-        if has_default:
-            output += ", default={}".format(default_val)
-            output += ", from_factory={}".format(self._factory is not None)
+        if self.is_scoped:
+            # Don't make (and cache) a shared value just to describe the field.
+            output += ", has_default=True, from_factory=True"
+            output += ", scope={}".format(self.scope)
+        else:
+            default_val, has_default = self.default
+            output += ", has_default={}".format(has_default)
+            if has_default:
+                output += ", default={}".format(default_val)
+                output += ", from_factory={}".format(self._factory is not None)
 
         output += ")"
         return output
@@ -44,13 +98,117 @@ class Field(object):
             return self._default, True
 
         if self._factory is not None:
-            return self._factory(), True
+            if self.scope == "case":
+                return self.call_factory(), True
+            return scopes.cache.get(self, scopes.key(self.scope)), True
 
         return None, False
 
+    @property
+    def factory(self):
+        """
+        The default value factory for this field, or None.
+        """
+        return self._factory
+
+    def call_factory(self):
+        """
+        Calls the factory, recording how long it took in pyrameters.stats when
+        timings are enabled. Async factories are run to completion in a new event
+        loop.
+        """
+        if self.is_async:
+            return asyncio.run(self.await_factory())
+        return stats.current.timed("factory", self.factory_name, self._factory)
+
+    async def await_factory(self):
+        """
+        Awaits the async factory, recording how long it took in pyrameters.stats
+        when timings are enabled.
+        """
+        if not stats.current.timing:
+            return await self._factory()
+        start = perf_counter()
+        try:
+            return await self._factory()
+        finally:
+            stats.current.add_timing(
+                "factory", self.factory_name, perf_counter() - start
+            )
+
+    @property
+    def key(self):
+        """
+        Everything that determines how this field behaves, for comparing frozen
+        Definitions. Defaults are compared by type and value, or by identity if they
+        are unhashable.
+        """
+        default = self._default
+        try:
+            hash(default)
+        except TypeError:
+            default = _Identity(default)
+        return (
+            self.name,
+            type(default),
+            default,
+            self._factory,
+            self.scope,
+            self.teardown,
+            self.cost,
+        )
+
+    @property
+    def is_async(self):
+        """
+        Whether the factory is an async function.
+        """
+        return inspect.iscoroutinefunction(self._factory)
+
+    @property
+    def factory_name(self):
+        """
+        The name that factory timings are recorded under.
+        """
+        return "{}.{}".format(
+            getattr(self._factory, "__module__", None),
+            getattr(self._factory, "__qualname__", repr(self._factory)),
+        )
+
+    @property
+    def is_scoped(self):
+        """
+        Whether factory results for this field are shared between cases.
+        """
+        return self.scope != "case"
+
+    @property
+    def has_factory(self):
+        """
+        Whether the default value for this field comes from a factory.
+        """
+        return self._factory is not None
+
     @staticmethod
     def empty(name=None):
         """
         Returns a field with (optionally a name), no default, and no factory.
         """
         return Field(name=name)
+
+
+class _Identity(object):
+    """
+    Compares a value by identity, so that unhashable values can be part of a key.
+    """
+
+    __slots__ = ("value",)
+
+    def __init__(self, value):
+        self.value = value
+
+    def __eq__(self, other):
+        return isinstance(other, _Identity) and self.value is other.value
+
+    def __hash__(self):
+        return id(self.value)
@@ -0,0 +1,62 @@
+"""
+Group represents a set of test cases that share defaults.
+"""
+
+
+class Group(object):
+    """
+    Defaults that apply to every case in the group, overriding Definition defaults.
+
+    Calling a group with cases returns a new group of those cases, eg:
+
+        Group(x="1")(
+            dict(y="2"),
+            dict(x="3", y="4"),
+        )
+
+    expands to [("1", "2"), ("3", "4")] for Definition("x,y"). Groups can be nested,
+    in which case the innermost group's defaults take precedence. Cases that aren't
+    Mappings are passed through as-is, like they are outside of a group.
+
+    Defaults are looked up layer by layer when each case is built, so no merged
+    Mapping is created per group or per case.
+
+    Parameters
+    ----------
+    defaults : Mapping = None
+        Defaults for the group, for field names that can't be passed as kwargs.
+    **kwargs
+        Defaults for the group, by field name.
+    """
+
+    __slots__ = "defaults", "cases"
+
+    def __init__(self, defaults=None, **kwargs):
+        self.defaults = dict(defaults or {}, **kwargs)
+        self.cases = ()
+
+    def __call__(self, *cases):
+        group = Group(self.defaults)
+        group.cases = cases
+        return group
+
+    def __repr__(self):
+        return "Group({})({})".format(
+            ", ".join("{}={!r}".format(k, v) for k, v in self.defaults.items()),
+            ", ".join(repr(c) for c in self.cases),
+        )
+
+    def walk(self, layers=()):
+        """
+        Yields (case, layers) for every case in this group and its nested groups,
+        where layers is a tuple of the group defaults that apply to the case, from
+        innermost to outermost.
+
+        Every case in a group shares the same layers tuple.
+        """
+        layers = (self.defaults,) + layers
+        for case in self.cases:
+            if isinstance(case, Group):
+                yield from case.walk(layers)
+            else:
+                yield case, layers
@@ -0,0 +1,120 @@
+"""
+Records stores expanded test cases as one compact column per field.
+"""
+
+from collections.abc import Sequence
+from itertools import repeat
+
+from pyrameters.hashing import _is_parameterset
+
+
+class Records(Sequence):
+    """
+    A sequence of expanded test cases, stored as one column per field rather than
+    a tuple per case, eg: from Definition.records or test_cases(..., compact=True).
+
+    Iterating over (or indexing) Records produces each case just as expand would,
+    so Records can be passed to @pytest.mark.parametrize in place of a list. pytest
+    only builds each case's tuple while it parametrizes the test function, so the
+    cases it holds on to for the rest of the session are the columns.
+
+    Columns whose values are all the same object (eg: a static default) hold that
+    object once, and other columns are lists. Values are never copied (eg: into an
+    array), as pytest keeps a reference to each value for every test anyway.
+    pytest.param() cases are kept as they are.
+
+    Parameters
+    ----------
+    names : Sequence[str]
+        The field names of each case, in order.
+    cases : Iterable = ()
+        Expanded cases, eg: from expand.
+    """
+
+    __slots__ = "names", "columns", "params", "_length"
+
+    def __init__(self, names, cases=()):
+        self.names = tuple(names)
+        single = len(self.names) == 1
+        columns = [[] for _ in self.names]
+        self.params = {}
+
+        length = 0
+        for case in cases:
+            if _is_parameterset(case):
+                # Kept whole for their marks and ID. Their values are also added
+                # to the columns, so that every column is the same length.
+                self.params[length] = case
+                case = case.values
+            elif single:
+                case = (case,)
+            for column, val in zip(columns, case):
+                column.append(val)
+            length += 1
+
+        self._length = length
+        self.columns = tuple(_compact(column) for column in columns)
+
+    def __len__(self):
+        return self._length
+
+    def __repr__(self):
+        return "Records(names={}, length={})".format(self.names, self._length)
+
+    def __getitem__(self, index):
+        if not isinstance(index, int):
+            raise TypeError(
+                "Records indices must be integers, not {}".format(type(index).__name__)
+            )
+        if index < 0:
+            index += self._length
+        if not 0 <= index < self._length:
+            raise IndexError("Records index out of range")
+        if index in self.params:
+            return self.params[index]
+        if len(self.columns) == 1:
+            return self.columns[0][index]
+        return tuple(column[index] for column in self.columns)
+
+    def __iter__(self):
+        if len(self.columns) == 1:
+            rows = iter(self.columns[0])
+        else:
+            rows = zip(*self.columns)
+        params = self.params
+        for i, row in enumerate(rows):
+            yield params[i] if i in params else row
+
+
+class Constant(object):
+    """
+    A column of the same value, repeated.
+    """
+
+    __slots__ = "value", "length"
+
+    def __init__(self, value, length):
+        self.value = value
+        self.length = length
+
+    def __repr__(self):
+        return "Constant(value={!r}, length={})".format(self.value, self.length)
+
+    def __len__(self):
+        return self.length
+
+    def __getitem__(self, index):
+        return self.value
+
+    def __iter__(self):
+        return repeat(self.value, self.length)
+
+
+def _compact(column):
+    """
+    Returns a Constant if every value in the given list is the same object, or else
+    the list.
+    """
+    if column and all(val is column[0] for val in column):
+        return Constant(column[0], len(column))
+    return column
@@ -0,0 +1,94 @@
+"""
+FileRegion represents a large binary case value that is read straight from a file.
+"""
+
+import mmap
+import os
+
+from pyrameters.types.deferred import Deferred
+
+
+class FileRegion(Deferred):
+    """
+    A region of a file, which the test receives as a read-only memoryview over a
+    memory map of the file, eg:
+
+        @pyrameters.test_cases("payload", [FileRegion("blobs.bin", 0, 4 << 20)])
+        def test_decode(payload):
+            assert decode(payload)
+
+    Only the path, offset and length are held until the test is set up. The file is
+    then mapped, and unmapped again once the test has been torn down, so memory use
+    doesn't grow with the number or size of the regions. Requires the pyrameters
+    pytest plugin.
+
+    The memoryview (and any views or slices made from it) must not be used after the
+    test. Copy what needs to be kept, eg: with bytes(payload).
+
+    Parameters
+    ----------
+    path : Union[str, os.PathLike]
+        The file to read.
+    offset : int = 0
+        The byte offset of the start of the region.
+    length : int = None
+        The length of the region in bytes. Defaults to the rest of the file.
+    """
+
+    __slots__ = "path", "offset", "length"
+
+    def __init__(self, path, offset=0, length=None):
+        if offset < 0:
+            raise ValueError("offset must not be negative, got {}".format(offset))
+        if length is not None and length < 0:
+            raise ValueError("length must not be negative, got {}".format(length))
+
+        self.path = os.fspath(path)
+        self.offset = offset
+        self.length = length
+
+    def __repr__(self):
+        return "FileRegion(path={}, offset={}, length={})".format(
+            self.path, self.offset, self.length
+        )
+
+    def resolve(self):
+        with open(self.path, "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            length = size - self.offset if self.length is None else self.length
+            if self.offset + length > size:
+                raise ValueError(
+                    "{!r} is past the end of the file, which is {} bytes".format(
+                        self, size
+                    )
+                )
+            if length == 0:
+                return memoryview(b"")
+
+            # Maps have to start on an allocation boundary.
+            start = self.offset - self.offset % mmap.ALLOCATIONGRANULARITY
+            skip = self.offset - start
+            mapped = mmap.mmap(
+                f.fileno(), skip + length, offset=start, access=mmap.ACCESS_READ
+            )
+        return memoryview(mapped)[skip : skip + length]
+
+    def fingerprint(self):
+        # Hashing the region itself would read it, so this relies on the file's
+        # size and modification time changing with its contents.
+        stat = os.stat(self.path)
+        return repr(self), stat.st_size, stat.st_mtime_ns
+
+    def stable_key(self):
+        return self.path, self.offset, self.length
+
+    def release(self, value):
+        mapped = value.obj
+        value.release()
+        if isinstance(mapped, mmap.mmap):
+            try:
+                mapped.close()
+            except BufferError:
+                # The test kept a view of the map, so it's unmapped once that view
+                # is garbage collected instead.
+                pass
@@ -14,9 +14,10 @@ setup(
     author_email="hi@tonylykke.com",
     url="https://github.com/roganartu/pyrameters",
     license="TBA",
-    packages=find_packages(exclude=["ez_setup", "examples", "tests"]),
+    packages=find_packages(exclude=["ez_setup", "examples", "tests", "benchmarks"]),
     include_package_data=True,
     zip_safe=False,
     install_requires=[],
-    extras_require={"test": ["pytest", "hypothesis", "dill"]},
+    extras_require={"test": ["pytest", "hypothesis"]},
+    entry_points={"pytest11": ["pyrameters.plugin = pyrameters.plugin"]},
 )
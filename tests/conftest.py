@@ -3,8 +3,8 @@ import os
 import hypothesis
 import pytest
 
-# Provides the testdir fixture
-pytest_plugins = "pytester", "hypothesis"
+# Provides the testdir fixture, and lazy parametrization for our own tests.
+pytest_plugins = "pytester", "hypothesis", "pyrameters.plugin"
 
 # Change some hypothesis settings
 hypothesis.settings.register_profile("ci", max_examples=1000, print_blob=True)
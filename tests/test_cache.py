@@ -0,0 +1,186 @@
+import functools
+import os
+import pickle
+
+import pytest
+
+import pyrameters
+from pyrameters import Definition, Field
+from pyrameters.cache import CacheFile, CollectionCache, Uncacheable
+from pyrameters.loaders import CaseFile
+
+
+def cases():
+    return [1, 2]
+
+
+def other_cases():
+    return [1, 2, 3]
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return CollectionCache(tmp_path / "cache")
+
+
+def test_store_load(cache):
+    assert cache.load("missing") is None
+    assert cache.store("key", [(1, "a"), (2, "b")])
+    assert cache.load("key") == [(1, "a"), (2, "b")]
+
+
+def test_store_unpicklable(cache):
+    assert not cache.store("key", [lambda: None])
+    assert cache.load("key") is None
+
+
+def test_key_definition(cache):
+    key = cache.key(Definition("a", b=Field("b", default=1)), cases)
+    assert key == cache.key(Definition("a", b=Field("b", default=1)), cases)
+    assert key != cache.key(Definition("a", b=Field("b", default=2)), cases)
+    assert key != cache.key(Definition("a", b=Field("b", factory=list)), cases)
+    assert key != cache.key(Definition("a,b"), cases)
+    assert key != cache.key(Definition("a", b=Field("b", default=1)), other_cases)
+
+
+def numbered(n):
+    return list(range(n))
+
+
+def test_key_callables(cache):
+    assert cache.key(numbered) == cache.key(numbered)
+    assert cache.key(functools.partial(numbered, 2)) == cache.key(
+        functools.partial(numbered, 2)
+    )
+    assert cache.key(functools.partial(numbered, 2)) != cache.key(
+        functools.partial(numbered, 5)
+    )
+    assert cache.key(functools.partial(numbered, n=2)) != cache.key(
+        functools.partial(numbered, n=5)
+    )
+    assert cache.key(list) == cache.key(list)
+
+
+def test_key_module_source(cache, tmp_path):
+    path = tmp_path / "source.py"
+    path.write_text("CASES = [1, 2]\ndef cases():\n    return CASES\n")
+    namespace = {}
+    exec(compile(path.read_text(), str(path), "exec"), namespace)
+    key = cache.key(namespace["cases"])
+
+    # Module level data the callable reads is covered, not just its own source.
+    path.write_text("CASES = [1, 2, 3]\ndef cases():\n    return CASES\n")
+    assert cache.key(namespace["cases"]) != key
+
+
+@pytest.mark.parametrize(
+    "fn",
+    [
+        eval("lambda: [1, 2]"),
+        type("Cases", (object,), {"__call__": lambda self: [1, 2]})(),
+        functools.partial(eval("lambda n: [n]"), 1),
+    ],
+)
+def test_key_uncacheable(cache, fn):
+    with pytest.raises(Uncacheable):
+        cache.key(fn)
+
+
+def test_key_files(cache, tmp_path):
+    path = tmp_path / "cases.jsonl"
+    path.write_text('{"a": 1}\n')
+    key = cache.key(CaseFile(path))
+    assert key == cache.key((CacheFile(path), "jsonl", []))
+
+    path.write_text('{"a": 2}\n')
+    assert cache.key(CaseFile(path)) != key
+
+
+def test_file_digest_memo(cache, tmp_path):
+    path = tmp_path / "data"
+    path.write_bytes(b"abc")
+    digest = cache.file_digest(path)
+
+    # An unchanged size and mtime is trusted, without re-reading the file.
+    cache.file_digests[str(path)][2] = "memo"
+    assert cache.file_digest(path) == "memo"
+
+    path.write_bytes(b"abcd")
+    assert cache.file_digest(path) not in ("memo", digest)
+
+
+def test_definition_pickle():
+    definition = Definition("a", b=Field("b", default=1))
+    definition.builder()
+    restored = pickle.loads(pickle.dumps(definition))
+    assert restored.builder()(dict(a=0)) == (0, 1)
+
+
+def test_cases_reused_between_runs(testdir):
+    testdir.makepyfile("""
+        import os
+        import pyrameters
+
+        def cases():
+            with open("expanded", "a") as f:
+                f.write("x")
+            return [dict(x=1), dict(x=2)]
+
+        @pyrameters.test_cases(
+            pyrameters.Definition("x", y=pyrameters.Field("y", default=3)),
+            cases,
+            cache=True,
+        )
+        def test_cached(x, y):
+            assert y == 3
+        """)
+    for _ in range(2):
+        result = testdir.inline_run("-p", "pyrameters.plugin")
+        passed, skipped, failed = result.listoutcomes()
+        assert len(passed) == 2
+    assert testdir.tmpdir.join("expanded").read() == "x"
+
+
+def test_cache_requires_keyable_argvalues():
+    with pytest.raises(ValueError):
+        pyrameters.test_cases("x", [1, 2], cache=True)
+
+
+def test_cases_keyed_on_test_function(testdir):
+    testdir.makepyfile("""
+        import functools
+        import pyrameters
+
+        def cases(n):
+            return list(range(n))
+
+        @pyrameters.test_cases("x", functools.partial(cases, 2), cache=True)
+        def test_two(x):
+            pass
+
+        @pyrameters.test_cases("x", functools.partial(cases, 5), cache=True)
+        def test_five(x):
+            pass
+        """)
+    for _ in range(2):
+        result = testdir.inline_run("-p", "pyrameters.plugin")
+        passed, skipped, failed = result.listoutcomes()
+        assert len(passed) == 7
+
+
+def test_uncacheable_cases_warn(testdir, monkeypatch):
+    monkeypatch.setenv("PYTHONPATH", os.path.dirname(os.path.dirname(__file__)))
+    testdir.makepyfile("""
+        import pyrameters
+
+        class Cases(object):
+            def __call__(self):
+                return [1, 2]
+
+        @pyrameters.test_cases("x", Cases(), cache=True)
+        def test_uncached(x):
+            pass
+        """)
+    result = testdir.runpytest("-p", "pyrameters.plugin")
+    result.assert_outcomes(passed=2, warnings=1)
+    result.stdout.fnmatch_lines(["*pyrameters could not cache the cases*"])
@@ -1,12 +1,12 @@
-from datetime import timedelta
+import os
+from collections.abc import Mapping
 from string import printable
 
 import pytest
-from hypothesis import assume, given, seed, settings
+from hypothesis import HealthCheck, assume, given, seed, settings
 from hypothesis import strategies as st
 
 import pyrameters
-from utils.decorator import run_in_decorator
 from utils.hypothesis import any_style_definitions, cases_for, field_values
 
 
@@ -23,6 +23,219 @@ def test_cases_smoke_test_multi(x, y):
     assert isinstance(y, str)
 
 
+@pyrameters.test_cases(
+    pyrameters.Definition("x", y=pyrameters.Field("y", default="2")),
+    (dict(x=i) for i in range(3)),
+)
+def test_cases_generator(x, y):
+    """Verify that generators are accepted as argvalues."""
+    assert isinstance(x, int)
+    assert y == "2"
+
+
+def _lazy_cases():
+    yield from [1, 2, 3]
+
+
+@pyrameters.test_cases("x", _lazy_cases, lazy=True)
+def test_cases_lazy_smoke_test(x):
+    """Verify that lazy cases are expanded by the plugin at collection time."""
+    assert isinstance(x, int)
+
+
+def test_cases_lazy_not_expanded_on_decoration():
+    """Verify that lazy cases are not expanded when the decorator is applied."""
+    calls = []
+
+    def cases():
+        calls.append(None)
+        return [1, 2]
+
+    pyrameters.test_cases("x", cases, lazy=True)(lambda x: None)
+    assert calls == []
+
+
+def test_cases_lazy_expanded_on_collection(testdir):
+    """Verify that lazy cases are expanded once per collection of the function."""
+    result = testdir.inline_runsource(
+        """
+        import pyrameters
+
+        calls = []
+
+        def cases():
+            calls.append(None)
+            yield from [dict(x=1), dict(x=2), dict(x=3, y=4)]
+
+        @pyrameters.test_cases(
+            pyrameters.Definition("x", y=pyrameters.Field("y", default=0)),
+            cases,
+            lazy=True,
+        )
+        def test_lazy(x, y):
+            assert len(calls) == 1
+            assert y == (4 if x == 3 else 0)
+        """,
+        "-p",
+        "pyrameters.plugin",
+    )
+    passed, skipped, failed = result.listoutcomes()
+    assert len(passed) == 3
+    assert len(failed) == 0
+
+
+def test_cases_lazy_defaults_only_for_selected(testdir):
+    """
+    Verify that deferred factory defaults are only called when a selected test is set
+    up, and never during collection.
+    """
+    testdir.makepyfile(
+        """
+        import pyrameters
+
+        calls = []
+
+        def factory():
+            calls.append(None)
+            return len(calls)
+
+        @pyrameters.test_cases(
+            pyrameters.Definition("x", y=pyrameters.Field("y", factory=factory)),
+            [dict(x="a"), dict(x="b"), dict(x="c", y=0)],
+            ids=["first", "second", "third"],
+            lazy_defaults=True,
+        )
+        def test_deferred(x, y):
+            assert y == (0 if x == "c" else 1)
+            assert len(calls) == 1
+        """
+    )
+    result = testdir.inline_run("-p", "pyrameters.plugin", "--collect-only")
+    assert len(result.getcalls("pytest_itemcollected")) == 3
+    assert result.ret == 0
+
+    result = testdir.inline_run("-p", "pyrameters.plugin", "-k", "second or third")
+    passed, skipped, failed = result.listoutcomes()
+    assert len(passed) == 2
+    assert len(failed) == 0
+
+
+@pytest.mark.parametrize("lazy", [False, True])
+def test_cases_sharded(testdir, lazy):
+    """
+    Verify that every case runs in exactly one shard, and that only the innermost
+    parametrization of a function is sharded.
+    """
+    testdir.makepyfile(
+        """
+        import pyrameters
+
+        @pyrameters.test_cases("y", ["a", "b"], lazy={lazy})
+        @pyrameters.test_cases("x", range(20), lazy={lazy})
+        def test_sharded(x, y):
+            pass
+        """.format(
+            lazy=lazy
+        )
+    )
+    nodeids = []
+    for shard in ("1/3", "2/3", "3/3"):
+        result = testdir.inline_run(
+            "-p", "pyrameters.plugin", "--pyrameters-shard", shard
+        )
+        passed, skipped, failed = result.listoutcomes()
+        assert 0 < len(passed) < 40
+        nodeids.extend(r.nodeid for r in passed)
+    assert len(nodeids) == len(set(nodeids)) == 40
+
+
+@pytest.mark.parametrize("lazy", [False, True])
+def test_cases_sharded_ids(testdir, lazy):
+    """Verify that a sequence of ids stays with its cases when they're sharded."""
+    testdir.makepyfile(
+        """
+        import pyrameters
+
+        @pyrameters.test_cases(
+            "x", range(20), ids=["c{{}}".format(i) for i in range(20)], lazy={lazy}
+        )
+        def test_sharded(request, x):
+            assert request.node.callspec.id == "c{{}}".format(x)
+        """.format(
+            lazy=lazy
+        )
+    )
+    nodeids = []
+    for shard in ("1/2", "2/2"):
+        result = testdir.inline_run(
+            "-p", "pyrameters.plugin", "--pyrameters-shard", shard
+        )
+        passed, skipped, failed = result.listoutcomes()
+        assert 0 < len(passed) < 20
+        assert len(failed) == 0
+        nodeids.extend(r.nodeid for r in passed)
+    assert len(set(nodeids)) == 20
+
+
+def test_cases_shard_invalid(testdir):
+    testdir.makepyfile("def test_nothing(): pass")
+    result = testdir.runpytest_inprocess(
+        "-p", "pyrameters.plugin", "--pyrameters-shard", "4/3"
+    )
+    assert result.ret == pytest.ExitCode.USAGE_ERROR
+
+
+def test_cases_shard_env_invalid(testdir, monkeypatch):
+    """Verify that an invalid shard environment variable is a usage error."""
+    monkeypatch.setenv("PYTHONPATH", os.path.dirname(os.path.dirname(__file__)))
+    monkeypatch.setenv("PYRAMETERS_SHARD", "bad")
+    testdir.makepyfile("def test_nothing(): pass")
+    result = testdir.runpytest_subprocess("-p", "pyrameters.plugin")
+    assert result.ret == pytest.ExitCode.USAGE_ERROR
+    result.stderr.fnmatch_lines(["*Invalid shard*"])
+
+
+@pytest.mark.parametrize("lazy", [False, True])
+def test_cases_hash_ids(testdir, lazy):
+    """Verify that hash IDs are stable between runs, and explicit IDs are kept."""
+    testdir.makepyfile(
+        """
+        import pytest
+        import pyrameters
+
+        @pyrameters.test_cases(
+            pyrameters.Definition("x", y=pyrameters.Field("y", default={{"a": b"b"}})),
+            [dict(x=1), dict(x=2), pytest.param(3, {{}}, id="explicit")],
+            ids="hash",
+            lazy={lazy},
+        )
+        def test_hashed(x, y):
+            pass
+
+        @pyrameters.test_cases(
+            "name,value", [("first", object()), ("second", object())], id_field="name"
+        )
+        def test_keyed(name, value):
+            pass
+        """.format(
+            lazy=lazy
+        )
+    )
+    runs = []
+    for _ in range(2):
+        result = testdir.inline_run("-p", "pyrameters.plugin")
+        passed, skipped, failed = result.listoutcomes()
+        assert len(passed) == 5
+        runs.append([r.nodeid.split("::")[1] for r in passed])
+    assert runs[0] == runs[1]
+    assert runs[0][2:] == [
+        "test_hashed[explicit]",
+        "test_keyed[first]",
+        "test_keyed[second]",
+    ]
+    assert all(len(nodeid) == len("test_hashed[]") + 12 for nodeid in runs[0][:2])
+
+
 @given(st.text(printable))
 @settings(max_examples=settings().max_examples * 30)
 @pyrameters.test_cases("x", [1, 2, 3])
@@ -48,22 +261,92 @@ def test_cases_unused_smoke_test_multi(x, y, z):
         st.shared(any_style_definitions(), key="with_cases"), min_count=1, max_count=25
     ),
 )
-@settings(
-    deadline=timedelta(milliseconds=2000), max_examples=settings().max_examples * 1
-)
-# TODO make a specific example of the following:
-# definition='a', cases=[None, None]
-def test_invocation_count_with_tuples(testdir, definition, cases):
+# Drawing up to 25 cases for up to 20 fields is slow, but expanding them isn't.
+@settings(suppress_health_check=[HealthCheck.too_slow])
+def test_expand_matches_cases(definition, cases):
     """
-    Verify that the wrapped method is invoked once per test case when using
-    pyrameters.Definition or a @pytest.mark.parametrize-style string-based definition.
+    Verify that one case is expanded per test case, with values in field order, when
+    using pyrameters.Definition or a @pytest.mark.parametrize-style string-based
+    definition.
     """
-    result = run_in_decorator(testdir, definition, cases)
-    assert result.ret == 0
+    if isinstance(definition, str):
+        definition = pyrameters.Definition(definition)
+    fields = definition.fields
 
+    expanded = list(definition.expand(cases))
+    assert len(expanded) == len(cases)
+    for case, result in zip(cases, expanded):
+        if isinstance(case, Mapping):
+            expected = tuple(
+                case[f] if f in case else fields[f].default[0] for f in fields
+            )
+            if len(fields) == 1:
+                expected = expected[0]
+        else:
+            # Tuples and pytest.param() cases are passed through as-is.
+            expected = case
+        assert result == expected
+
+
+@pytest.mark.parametrize("lazy", [False, True])
+def test_invocation_count(testdir, lazy):
+    """
+    Verify that the wrapped method is invoked once per test case with the expanded
+    values, for string definitions, pyrameters.Definition Mapping cases with defaults,
+    and pytest.param() cases.
+    """
+    result = testdir.inline_runsource(
+        """
+        import pytest
+        import pyrameters
+
+        CALLS = []
+
+        @pyrameters.test_cases(
+            "a, b", [(1, "x"), pytest.param(2, "y"), (3, None)], lazy={lazy}
+        )
+        def test_string(a, b):
+            CALLS.append(("string", a, b))
+
+        @pyrameters.test_cases(
+            pyrameters.Definition(
+                "a", b=pyrameters.Field("b", default="d"), c=pyrameters.Field("c")
+            ),
+            [dict(a=1, c=2), dict(a=3, b="e", c=4), (5, "f", 6)],
+            lazy={lazy},
+        )
+        def test_mapping(a, b, c):
+            CALLS.append(("mapping", a, b, c))
+
+        @pyrameters.test_cases("a", [None, None, pytest.param(0)], lazy={lazy})
+        def test_single(a):
+            CALLS.append(("single", a))
+
+        def test_zz_calls():
+            assert sorted(CALLS, key=repr) == sorted(
+                [
+                    ("string", 1, "x"),
+                    ("string", 2, "y"),
+                    ("string", 3, None),
+                    ("mapping", 1, "d", 2),
+                    ("mapping", 3, "e", 4),
+                    ("mapping", 5, "f", 6),
+                    ("single", None),
+                    ("single", None),
+                    ("single", 0),
+                ],
+                key=repr,
+            )
+        """.format(
+            lazy=lazy
+        ),
+        "-p",
+        "pyrameters.plugin",
+        "-p",
+        "no:randomly",
+    )
     passed, skipped, failed = result.listoutcomes()
-    assert len(passed) == len(cases)
-    assert len(skipped) == 0
+    assert len(passed) == 10
     assert len(failed) == 0
 
 
@@ -74,3 +357,392 @@ def test_invocation_count_with_tuples(testdir, definition, cases):
 # TODO add test that ensures that @pytest.parameter is passed through unaffected,
 # same as a regular tuple param.
 # Do this by adding a @pytest.parameter builds to cases_for
+
+
+@pytest.mark.parametrize("lazy", [False, True])
+def test_cases_duplicates(testdir, lazy):
+    """
+    Verify that duplicate cases are dropped or reported, and summarised.
+    """
+    testdir.makepyfile(
+        """
+        import pyrameters
+
+        DEFINITION = pyrameters.Definition("x", y=pyrameters.Field("y", default=2))
+        CASES = [dict(x=1), dict(x=1, y=2), (1, 2), dict(x=3)]
+
+        @pyrameters.test_cases(DEFINITION, CASES, lazy={lazy}, duplicates="drop")
+        def test_dropped(x, y):
+            pass
+
+        @pyrameters.test_cases(DEFINITION, CASES, lazy={lazy}, duplicates="report")
+        def test_reported(x, y):
+            pass
+        """.format(lazy=lazy)
+    )
+    result = testdir.runpytest_inprocess("-p", "pyrameters.plugin")
+    result.assert_outcomes(passed=6)
+    result.stdout.fnmatch_lines(
+        [
+            "*pyrameters duplicate cases*",
+            "test_cases_duplicates*.test_dropped: 2 dropped",
+            "test_cases_duplicates*.test_reported: 2 found",
+            "4 duplicate cases found, 2 redundant runs saved",
+        ]
+    )
+
+
+@pytest.mark.parametrize("lazy", [False, True])
+def test_cases_duplicates_ids(testdir, lazy):
+    """Verify that the ids of dropped duplicates are dropped along with them."""
+    testdir.makepyfile(
+        """
+        import pyrameters
+
+        @pyrameters.test_cases(
+            "x",
+            [1, 1, 2, 3],
+            ids=["one", "uno", "two", "three"],
+            lazy={lazy},
+            duplicates="drop",
+        )
+        def test_dropped(x):
+            pass
+        """.format(
+            lazy=lazy
+        )
+    )
+    result = testdir.runpytest_inprocess("-p", "pyrameters.plugin", "-v")
+    result.assert_outcomes(passed=3)
+    result.stdout.fnmatch_lines(
+        [
+            "*test_dropped?one? PASSED*",
+            "*test_dropped?two? PASSED*",
+            "*test_dropped?three? PASSED*",
+        ]
+    )
+
+
+def test_cases_duplicates_invalid():
+    with pytest.raises(ValueError):
+        pyrameters.test_cases("x", [1], duplicates="yes")
+
+
+@pytest.mark.parametrize("lazy", [False, True])
+def test_cases_group_indirect(testdir, lazy):
+    """
+    Verify that cases sharing indirect values run together, saving fixture setups.
+    """
+    testdir.makepyfile(
+        """
+        import pytest
+        import pyrameters
+
+        SETUPS = []
+
+        @pytest.fixture(scope="module")
+        def db(request):
+            SETUPS.append(request.param)
+            return request.param
+
+        @pyrameters.test_cases(
+            "db, x",
+            [("a", 1), ("b", 2), ("a", 3), ("b", 4), ("a", 5)],
+            indirect=["db"],
+            scope="module",
+            lazy={lazy},
+            group_indirect=True,
+        )
+        def test_grouped(db, x):
+            pass
+
+        def test_setups():
+            assert SETUPS == ["a", "b"]
+        """.format(lazy=lazy)
+    )
+    result = testdir.runpytest_inprocess("-p", "pyrameters.plugin", "-v")
+    result.assert_outcomes(passed=6)
+    result.stdout.fnmatch_lines(
+        [
+            "*test_grouped?a-1? PASSED*",
+            "*test_grouped?a-3? PASSED*",
+            "*test_grouped?a-5? PASSED*",
+            "*test_grouped?b-2? PASSED*",
+            "*test_grouped?b-4? PASSED*",
+            "*pyrameters indirect fixture grouping*",
+            "test_cases_group_indirect*.test_grouped: 3 setups saved",
+            "3 indirect fixture setups saved",
+        ]
+    )
+
+
+@pytest.mark.parametrize("lazy", [False, True])
+def test_cases_group_indirect_ids(testdir, lazy):
+    """Verify that a sequence of ids is reordered along with grouped cases."""
+    testdir.makepyfile(
+        """
+        import pytest
+        import pyrameters
+
+        @pytest.fixture(scope="module")
+        def db(request):
+            return request.param
+
+        @pyrameters.test_cases(
+            "db, x",
+            [("a", 1), ("b", 2), ("a", 3)],
+            indirect=["db"],
+            ids=["a1", "b2", "a3"],
+            scope="module",
+            lazy={lazy},
+            group_indirect=True,
+        )
+        def test_grouped(request, db, x):
+            assert request.node.callspec.id == "{{}}{{}}".format(db, x)
+        """.format(
+            lazy=lazy
+        )
+    )
+    result = testdir.runpytest_inprocess("-p", "pyrameters.plugin", "-v")
+    result.assert_outcomes(passed=3)
+    result.stdout.fnmatch_lines(
+        [
+            "*test_grouped?a1? PASSED*",
+            "*test_grouped?a3? PASSED*",
+            "*test_grouped?b2? PASSED*",
+        ]
+    )
+
+
+@pytest.mark.parametrize(
+    "kwargs",
+    [
+        dict(scope="module"),
+        dict(indirect=True),
+        dict(indirect=True, scope="function"),
+    ],
+)
+def test_cases_group_indirect_invalid(kwargs):
+    with pytest.raises(ValueError):
+        pyrameters.test_cases("x", [1], group_indirect=True, **kwargs)
+
+
+@pytest.mark.parametrize("lazy", [False, True])
+def test_cases_sample(testdir, monkeypatch, lazy):
+    """
+    Verify that only the sample runs, unless full runs are enabled.
+    """
+    testdir.makepyfile(
+        """
+        import pyrameters
+
+        @pyrameters.test_cases("x", range(50), lazy={lazy}, sample=5, seed=3)
+        def test_sampled(x):
+            pass
+        """.format(lazy=lazy)
+    )
+    result = testdir.inline_run("-p", "pyrameters.plugin")
+    assert len(result.listoutcomes()[0]) == 5
+
+    result = testdir.inline_run("-p", "pyrameters.plugin", "--pyrameters-full")
+    assert len(result.listoutcomes()[0]) == 50
+
+    monkeypatch.setenv("PYRAMETERS_FULL", "1")
+    result = testdir.inline_run("-p", "pyrameters.plugin")
+    assert len(result.listoutcomes()[0]) == 50
+
+
+@pytest.mark.parametrize("lazy", [False, True])
+@pytest.mark.parametrize("sample", [5, 0.2])
+def test_cases_sample_ids(testdir, lazy, sample):
+    """Verify that a sequence of ids is sampled along with the cases."""
+    testdir.makepyfile(
+        """
+        import pyrameters
+
+        @pyrameters.test_cases(
+            "x",
+            range(50),
+            ids=["c{{}}".format(i) for i in range(50)],
+            lazy={lazy},
+            sample={sample},
+        )
+        def test_sampled(request, x):
+            assert request.node.callspec.id == "c{{}}".format(x)
+        """.format(
+            lazy=lazy, sample=sample
+        )
+    )
+    result = testdir.inline_run("-p", "pyrameters.plugin")
+    passed, skipped, failed = result.listoutcomes()
+    assert 0 < len(passed) < 50
+    assert len(failed) == 0
+
+
+@pytest.mark.parametrize(
+    "kwargs",
+    [
+        dict(sample=0),
+        dict(sample=1.5),
+        dict(sample=True),
+        dict(stratify="x"),
+        dict(sample=2, stratify="y"),
+    ],
+)
+def test_cases_sample_invalid(kwargs):
+    with pytest.raises(ValueError):
+        pyrameters.test_cases("x", [1], **kwargs)
+
+
+@pyrameters.test_cases(
+    pyrameters.Definition("x", y=pyrameters.Field("y", factory=list)),
+    [dict(x=1), dict(x=2, y=None)],
+    workers=2,
+)
+def test_cases_workers(x, y):
+    assert y == ([] if x == 1 else None)
+
+
+@pytest.mark.parametrize("kwargs", [dict(workers=0), dict(executor="fiber")])
+def test_cases_workers_invalid(kwargs):
+    with pytest.raises(ValueError):
+        pyrameters.test_cases("x", [1], **kwargs)
+
+
+@pyrameters.test_cases(
+    pyrameters.Definition("x", y=pyrameters.Field("y", default="2")),
+    pyrameters.Columns(x=[1, 2, 3]),
+)
+def test_cases_columns(x, y):
+    assert isinstance(x, int)
+    assert y == "2"
+
+
+@pytest.mark.parametrize("lazy", [False, True])
+def test_cases_batch(testdir, lazy):
+    """
+    Verify that batched cases run in fewer tests, and failing cases are reported
+    by their own IDs.
+    """
+    testdir.makepyfile(
+        """
+        import pytest
+        import pyrameters
+
+        DEFINITION = pyrameters.Definition(
+            "x", y=pyrameters.Field("y", factory=list)
+        )
+        CASES = [dict(x=i) for i in range(7)] + [
+            pytest.param(9, [], marks=pytest.mark.xfail(strict=True))
+        ]
+
+        @pyrameters.test_cases(
+            DEFINITION, CASES, lazy={lazy}, lazy_defaults=True, batch=3
+        )
+        def test_cases(x, y):
+            assert y == []
+            assert x not in (1, 5, 9)
+
+        @pyrameters.test_cases("x", range(5), lazy={lazy}, batch=2, batch_args="columns")
+        def test_columns(x):
+            assert x in ((0, 1), (2, 3), (4,))
+        """.format(lazy=lazy)
+    )
+    result = testdir.runpytest_inprocess("-p", "pyrameters.plugin", "-v")
+    result.assert_outcomes(passed=4, failed=2, xfailed=1)
+    result.stdout.fnmatch_lines(
+        [
+            "*test_cases?0-y0..2-y2? FAILED*",
+            "*test_cases?3-y3..5-y5? FAILED*",
+            "*test_cases?6-y6? PASSED*",
+            "*test_cases?9-y7? XFAIL*",
+            "*test_columns?0..1? PASSED*",
+            "*test_columns?2..3? PASSED*",
+            "*test_columns?4? PASSED*",
+        ]
+    )
+    result.stdout.fnmatch_lines(
+        ["*1 of 3 cases failed:", "*[1-y1] AssertionError: assert 1 not in (1, 5, 9)"]
+    )
+    result.stdout.fnmatch_lines(["*[5-y5] AssertionError*"])
+
+
+@pytest.mark.parametrize("lazy", [False, True])
+def test_cases_batch_skip_xfail(testdir, lazy):
+    """
+    Verify that cases that skip or xfail don't stop the rest of their batch, and
+    that a batch with nothing but skipped or xfailed cases is skipped or xfailed.
+    """
+    testdir.makepyfile(
+        """
+        import pytest
+        import pyrameters
+
+        RAN = []
+
+        @pyrameters.test_cases("x", range(12), lazy={lazy}, batch=3)
+        def test_batched(x):
+            RAN.append(x)
+            if x in (0, 6, 7):
+                pytest.skip("skipped")
+            if x in (1, 8, 9, 10, 11):
+                pytest.xfail("xfailed")
+            assert x not in (3, 4)
+
+        def test_ran():
+            assert sorted(RAN) == list(range(12))
+        """.format(
+            lazy=lazy
+        )
+    )
+    result = testdir.runpytest_inprocess("-p", "pyrameters.plugin", "-v")
+    result.assert_outcomes(passed=2, failed=1, skipped=1, xfailed=1)
+    result.stdout.fnmatch_lines(
+        [
+            "*test_batched?0..2? PASSED*",
+            "*test_batched?3..5? FAILED*",
+            "*test_batched?6..8? SKIPPED*",
+            "*test_batched?9..11? XFAIL*",
+        ]
+    )
+    result.stdout.fnmatch_lines(["*2 of 3 cases failed:", "*?3? AssertionError*"])
+
+
+@pytest.mark.parametrize("ids", ['["a", "b", "c", "d"]', '"v{}".format'])
+def test_cases_batch_ids(testdir, ids):
+    """Verify that each case in a sharded batch is reported by its own ID."""
+    testdir.makepyfile(
+        """
+        import pyrameters
+
+        @pyrameters.test_cases("x", [1, 2, 3, 4], ids={ids}, batch=10)
+        def test_batched(x):
+            assert x is None, x
+        """.format(
+            ids=ids
+        )
+    )
+    output = ""
+    for shard in ("1/2", "2/2"):
+        result = testdir.runpytest_inprocess(
+            "-p", "pyrameters.plugin", "--pyrameters-shard", shard
+        )
+        result.assert_outcomes(failed=1)
+        output += result.stdout.str()
+    expected = "abcd" if ids.startswith("[") else ["v1", "v2", "v3", "v4"]
+    for x, case_id in enumerate(expected, 1):
+        assert "[{}] AssertionError: {}".format(case_id, x) in output
+
+
+@pytest.mark.parametrize(
+    "kwargs",
+    [
+        dict(batch=0),
+        dict(batch=True),
+        dict(batch=2, batch_args="rows"),
+        dict(batch=2, indirect=True),
+    ],
+)
+def test_cases_batch_invalid(kwargs):
+    with pytest.raises(ValueError):
+        pyrameters.test_cases("x", [1], **kwargs)
@@ -0,0 +1,263 @@
+import asyncio
+import threading
+import time
+
+import pytest
+from hypothesis import given, settings
+from hypothesis import strategies as st
+
+from pyrameters import Definition, Field, Group
+from pyrameters.expansion import expand, grouped, unique, walk
+from utils.hypothesis import field_values
+
+
+@given(
+    st.lists(st.tuples(field_values(), field_values()), max_size=50),
+    st.integers(min_value=1, max_value=8),
+)
+@settings(max_examples=settings().max_examples * 10)
+def test_shards_partition_cases(cases, count):
+    shards = [list(expand("a,b", cases, shard=(i, count))) for i in range(1, count + 1)]
+    assert sorted(map(repr, sum(shards, []))) == sorted(map(repr, cases))
+
+
+def test_shard_before_defaults():
+    calls = []
+
+    def factory():
+        calls.append(None)
+
+    definition = Definition("x", y=Field("y", factory=factory))
+    cases = [dict(x=i) for i in range(20)]
+    sharded = list(expand(definition, cases, shard=(1, 4)))
+    assert 0 < len(sharded) < 20
+    assert len(calls) == len(sharded)
+
+
+@pytest.mark.parametrize(
+    "options",
+    [dict(shard=(2, 3)), dict(sample=5, seed=1), dict(sample=0.5, stratify="y")],
+)
+def test_ids_follow_cases(options):
+    definition = Definition("x", y=Field("y", factory=list))
+    cases = Group(y="a")(*[dict(x=i) for i in range(10)])
+    expanded = list(expand(definition, [cases, dict(x=10)], ids=range(11), **options))
+    assert 0 < len(expanded) < 11
+    assert all(case[0] == case_id for case, case_id in expanded)
+
+
+@pytest.mark.parametrize("ids", [range(2), range(4)])
+def test_ids_length(ids):
+    with pytest.raises(ValueError, match="3 cases specified"):
+        list(expand("x", [1, 2, 3], ids=ids))
+
+
+def test_group():
+    cases = Group(x="1")(
+        dict(y="2"),
+        dict(x="3", y="4"),
+    )
+    assert list(expand(Definition("x,y"), [cases])) == [("1", "2"), ("3", "4")]
+    assert list(expand(Definition("x,y"), cases)) == [("1", "2"), ("3", "4")]
+
+
+def test_nested_groups():
+    definition = Definition("x", "y", z=Field("z", default="d"))
+    cases = [
+        dict(x=0, y=0),
+        Group(x=1, y=1)(
+            dict(),
+            Group(y=2)(dict(), dict(x=3), Group(z=4)(dict(y=5))),
+            (6, 6, 6),
+        ),
+        dict(x=7, y=7),
+    ]
+    assert list(expand(definition, cases)) == [
+        (0, 0, "d"),
+        (1, 1, "d"),
+        (1, 2, "d"),
+        (3, 2, "d"),
+        (1, 5, 4),
+        (6, 6, 6),
+        (7, 7, "d"),
+    ]
+
+
+def test_group_string_definition():
+    # Only cases in a group are built without a Definition.
+    cases = [dict(x=1), Group(x=2)(dict(y=3))]
+    assert list(expand("x,y", cases)) == [dict(x=1), (2, 3)]
+
+
+def test_group_shares_layers():
+    group = Group(x=1)(dict(y=1), dict(y=2), Group(y=3)(dict()))
+    layers = [layers for _, layers in walk([group])]
+    assert layers[0] is layers[1]
+    assert layers[2][1] is layers[0][0]
+
+
+def test_group_reusable():
+    defaults = Group(x=1)
+    first, second = defaults(dict(y=1)), defaults(dict(y=2))
+    assert list(expand("x,y", [first, second])) == [(1, 1), (1, 2)]
+    assert defaults.cases == ()
+
+
+def test_group_shards_leaves():
+    cases = Group(x=1)(*[dict(y=i) for i in range(20)])
+    shards = [list(expand("x,y", cases, shard=(i, 4))) for i in range(1, 5)]
+    assert all(len(shard) < 20 for shard in shards)
+    assert sorted(sum(shards, [])) == [(1, i) for i in range(20)]
+
+
+def test_unique():
+    definition = Definition("x", y=Field("y", default=2))
+    duplicates = []
+    cases = [dict(x=1), dict(x=1, y=2), pytest.param(1, 2, id="named"), (1, 3)]
+
+    actual = list(unique(expand(definition, cases), duplicates.append))
+    assert actual == [(1, 2), (1, 3)]
+    assert len(duplicates) == 2
+
+    actual = list(unique(expand(definition, cases), duplicates.append, drop=False))
+    assert len(actual) == 4
+    assert len(duplicates) == 4
+
+
+def test_grouped():
+    cases = [(1, "a", 0), (2, "a", 1), (1, "b", 2), (1, "a", 3), (2, "a", 4)]
+    actual, saved = grouped(cases, [0, 1])
+    assert actual == [(1, "a", 0), (1, "a", 3), (1, "b", 2), (2, "a", 1), (2, "a", 4)]
+    # x: 4 setups -> 2, y: 3 -> 3 (position 2 isn't indirect).
+    assert saved == 2
+
+    # Already grouped cases aren't moved.
+    assert grouped(actual, [0, 1]) == (actual, 0)
+
+    params = [pytest.param([1], id="a"), pytest.param([2]), pytest.param([1])]
+    actual, saved = grouped(params, [0], single=True)
+    assert [p.values for p in actual] == [([1],), ([1],), ([2],)]
+    assert saved == 1
+    assert grouped([2, 1, 2], [0], single=True) == ([2, 2, 1], 1)
+
+
+@given(st.lists(st.tuples(st.integers(0, 3), st.integers(0, 3)), max_size=30))
+def test_grouped_is_a_stable_permutation(cases):
+    actual, saved = grouped(cases, [0])
+    assert saved >= 0
+    assert sorted(actual) == sorted(cases)
+    for x in {x for x, _ in cases}:
+        assert [c for c in actual if c[0] == x] == [c for c in cases if c[0] == x]
+
+
+@given(
+    st.lists(st.integers(), max_size=50, unique=True),
+    st.integers(min_value=1, max_value=10),
+    st.integers(),
+)
+def test_sample_count(cases, size, seed):
+    sample = list(expand("a", cases, sample=size, seed=seed))
+    assert len(sample) == min(size, len(cases))
+    # Cases keep their original order, and the sample is reproducible.
+    assert sample == [c for c in cases if c in sample]
+    assert sample == list(expand("a", reversed(cases), sample=size, seed=seed))[::-1]
+
+
+def test_sample_before_defaults():
+    calls = []
+
+    def factory():
+        calls.append(None)
+
+    definition = Definition("x", y=Field("y", factory=factory))
+    cases = [dict(x=i) for i in range(100)]
+    sample = list(expand(definition, cases, sample=0.2))
+    assert 0 < len(sample) < 100
+    assert len(calls) == len(sample)
+    assert sample == list(expand(definition, cases, sample=0.2))
+    assert sample != list(expand(definition, cases, sample=0.2, seed=1))
+
+
+def test_sample_stratified():
+    definition = Definition("x", kind=Field("kind", default="common"))
+    cases = [dict(x=i) for i in range(100)] + [dict(x=100, kind="rare")]
+
+    sample = list(expand(definition, cases, sample=0.01, stratify="kind"))
+    assert (100, "rare") in sample
+    assert any(kind == "common" for _, kind in sample)
+
+    sample = list(expand(definition, cases, sample=3, stratify="kind"))
+    assert len(sample) == 4
+    assert (100, "rare") in sample
+
+
+def slow_factory():
+    time.sleep(0.05)
+    return threading.get_ident()
+
+
+def failing_factory():
+    raise KeyError("missing blob")
+
+
+@pytest.mark.parametrize("executor", ["thread", "process"])
+def test_workers(executor):
+    definition = Definition("x", y=Field("y", factory=slow_factory))
+    cases = [dict(x=i) for i in range(8)] + [(8, None)]
+
+    actual = list(expand(definition, cases, workers=4, executor=executor))
+    assert [x for x, _ in actual] == list(range(9))
+    assert actual[-1] == (8, None)
+    if executor == "thread":
+        # The factories ran concurrently, on more than one thread.
+        assert len({y for _, y in actual[:-1]}) > 1
+
+
+def test_workers_errors():
+    definition = Definition("x", y=Field("y", factory=failing_factory))
+    cases = [dict(x=1, y=1), dict(x=2), dict(x=3)]
+    expanded = expand(definition, cases, workers=2)
+    with pytest.raises(KeyError, match="missing blob"):
+        list(expanded)
+
+
+def test_workers_single_field():
+    definition = Definition(x=Field("x", factory=list))
+    assert list(expand(definition, [{}, dict(x=1)], workers=2)) == [[], 1]
+
+
+async def async_factory():
+    await asyncio.sleep(0.01)
+    return "async"
+
+
+@pytest.mark.parametrize("concurrency", [None, 1, 100])
+def test_async_factories(concurrency):
+    definition = Definition(
+        "x", y=Field("y", factory=async_factory), z=Field("z", factory=list)
+    )
+    cases = [dict(x=i) for i in range(10)] + [dict(x=10, y="sync")]
+
+    actual = list(expand(definition, cases, concurrency=concurrency))
+    assert actual == [(i, "async", []) for i in range(10)] + [(10, "sync", [])]
+
+
+def test_async_factories_concurrency_limit():
+    running = []
+    peak = []
+
+    async def factory():
+        running.append(None)
+        peak.append(len(running))
+        await asyncio.sleep(0.01)
+        running.pop()
+
+    definition = Definition("x", y=Field("y", factory=factory))
+    list(expand(definition, [dict(x=i) for i in range(20)], concurrency=3))
+    assert max(peak) == 3
+
+
+def test_async_factory_default():
+    field = Field("y", factory=async_factory)
+    assert field.is_async
+    assert field.default == ("async", True)
@@ -0,0 +1,160 @@
+import threading
+from collections import OrderedDict, namedtuple
+from datetime import date
+from enum import Enum
+
+import pytest
+from hypothesis import given, settings
+from hypothesis import strategies as st
+
+from pyrameters import Definition, Field
+from pyrameters.hashing import CaseHasher, stable_digest, stable_hash
+from pyrameters.loaders import CaseFile
+from pyrameters.types.deferred import DeferredDefault
+from utils.hypothesis import field_values
+
+
+class Colour(Enum):
+    RED = 1
+
+
+Point = namedtuple("Point", "x y")
+
+
+class Thing(object):
+    def __init__(self, x):
+        self.x = x
+
+
+class Slotted(object):
+    __slots__ = "x", "__y"
+
+    def __init__(self, x, y):
+        self.x = x
+        self.__y = y
+
+
+def test_known_value():
+    # Hashes must never change between releases, as they identify cases between
+    # runs and machines.
+    assert stable_hash(("a", 1, 2.5, None, True, b"x")) == 2740026391969490265
+
+
+@given(st.lists(field_values(), max_size=5))
+@settings(max_examples=settings().max_examples * 10)
+def test_deterministic(values):
+    assert stable_digest(values) == stable_digest(list(values))
+
+
+@pytest.mark.parametrize(
+    "a,b",
+    [
+        (1, "1"),
+        (1, 1.0),
+        (True, 1),
+        ((1, 2), [(1, 2)]),
+        (("ab", "c"), ("a", "bc")),
+        (b"a", "a"),
+        (Point(1, 2), (1, 2)),
+        (Colour.RED, 1),
+        (Thing(1), Thing(2)),
+        (Slotted(1, 2), Slotted(1, 3)),
+        ({"a": 1}, {"a": 2}),
+    ],
+)
+def test_distinct(a, b):
+    assert stable_hash(a) != stable_hash(b)
+
+
+@pytest.mark.parametrize(
+    "a,b",
+    [
+        (dict(a=1, b=2), OrderedDict([("b", 2), ("a", 1)])),
+        ({1, 2, 3}, {3, 2, 1}),
+        (Thing(date(2020, 1, 1)), Thing(date(2020, 1, 1))),
+        (Slotted(1, [2]), Slotted(1, [2])),
+        (pytest.param(1, id="x"), pytest.param(1, id="x")),
+        (test_known_value, test_known_value),
+    ],
+)
+def test_equal(a, b):
+    assert stable_hash(a) == stable_hash(b)
+
+
+@pytest.mark.parametrize("value", [object(), [Thing(object())], threading.Lock()])
+def test_unstable_repr(value):
+    with pytest.raises(ValueError, match="memory address"):
+        stable_hash(value)
+
+
+class Node(object):
+    def __init__(self, parent=None):
+        self.parent = parent
+        self.children = []
+        if parent is not None:
+            parent.children.append(self)
+
+
+def test_cycles():
+    looped = [1]
+    looped.append(looped)
+    with pytest.raises(ValueError, match="contains itself"):
+        stable_hash(looped)
+    with pytest.raises(ValueError, match="contains itself"):
+        stable_hash(Node(Node()))
+
+    # Values shared without a cycle are fine.
+    shared = [1]
+    assert stable_hash([shared, shared]) == stable_hash([[1], [1]])
+
+
+def test_no_module():
+    namespace = {}
+    exec("def built(): pass", namespace)
+    assert namespace["built"].__module__ is None
+    assert stable_hash(namespace["built"]) == stable_hash(namespace["built"])
+
+
+def test_deferred(tmp_path):
+    path = tmp_path / "cases.jsonl"
+    path.write_text('{"a": 1}\n{"a": 1}\n')
+    case_file = CaseFile(path)
+    definition = Definition("a")
+    (_, (first,)), (_, (second,)) = case_file.deferred(definition)
+    # Rows are hashed by where they are, without loading them.
+    assert stable_hash(first) != stable_hash(second)
+    assert case_file._last is None
+
+    default = stable_hash(DeferredDefault(Field("b", factory=list)))
+    assert default == stable_hash(DeferredDefault(Field("b", factory=list)))
+    assert default != stable_hash(DeferredDefault(Field("c", factory=list)))
+
+
+def test_param_id():
+    assert stable_hash(pytest.param(1, id="x")) != stable_hash(pytest.param(1))
+
+
+def test_case_hasher():
+    hasher = CaseHasher(["a", "b"])
+    case_id = hasher((1, {"big": list(range(100))}))
+    assert len(case_id) == 12
+    assert case_id == CaseHasher(["a", "b"])((1, {"big": list(range(100))}))
+    assert case_id != CaseHasher(["a", "c"])((1, {"big": list(range(100))}))
+    assert case_id != hasher((2, {"big": list(range(100))}))
+
+
+def test_case_hasher_key():
+    hasher = CaseHasher(["name", "value"], key="name")
+    assert hasher(("first", object())) == "first"
+    assert hasher((1.5, None)) == "1.5"
+    assert hasher(((1, 2), None)) == CaseHasher(["x"], key="x")(((1, 2),))
+    with pytest.raises(ValueError):
+        CaseHasher(["name"], key="value")
+
+
+def test_case_hasher_memo():
+    shared = {"big": list(range(100))}
+    hasher = CaseHasher(["a", "b"])
+    ids = {hasher((i, shared)) for i in range(10)}
+    assert len(ids) == 10
+    assert len(hasher._memo) == 1
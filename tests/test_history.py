@@ -0,0 +1,152 @@
+from pyrameters import Definition, Field
+from pyrameters.history import CaseHistory, ChangedCases, fingerprint, source_digest
+from pyrameters.types.deferred import DeferredDefault
+
+
+def test_fingerprint():
+    fp = fingerprint("src", [("x", 1), ("y", "a")])
+    assert fp == fingerprint("src", [("x", 1), ("y", "a")])
+    assert fp != fingerprint("other", [("x", 1), ("y", "a")])
+    assert fp != fingerprint("src", [("x", 2), ("y", "a")])
+
+
+def test_fingerprint_deferred():
+    definition = Definition("x", y=Field("y", factory=list))
+    deferred = DeferredDefault(definition.fields["y"])
+    assert fingerprint("src", [("y", deferred)]) == fingerprint(
+        "src", [("y", DeferredDefault(definition.fields["y"]))]
+    )
+    other = DeferredDefault(Field("y", factory=dict))
+    assert fingerprint("src", [("y", deferred)]) != fingerprint("src", [("y", other)])
+
+
+def test_source_digest():
+    assert source_digest(test_source_digest) == source_digest(test_source_digest)
+    assert source_digest(test_source_digest) != source_digest(test_fingerprint)
+
+
+def test_changed_cases():
+    changed = ChangedCases({"test_a": ["1", "2"], "test_b": ["3"]})
+    assert changed.unchanged("test_a", "1")
+    assert not changed.unchanged("test_a", "3")
+    changed.record("test_a", "3", True)
+    changed.record("test_a", "4", True)
+    changed.record("test_a", "4", False)
+    # "2" wasn't collected this time, and test_b didn't run at all.
+    assert changed.dump() == {"test_a": ["1", "3"], "test_b": ["3"]}
+
+
+def test_changed_plugin(testdir):
+    """
+    Verify that only new, changed and failed cases run with --pyrameters-changed.
+    """
+    test_file = """
+        import pyrameters
+
+        CASES = {cases!r}
+
+        @pyrameters.test_cases("x", CASES)
+        def test_cases(x):
+            assert x != "fail"
+
+        def test_plain():
+            pass
+    """
+    testdir.makepyfile(test_file.format(cases=["a", "b", "fail"]))
+
+    result = testdir.inline_run("-p", "pyrameters.plugin", "--pyrameters-changed")
+    result.assertoutcome(passed=3, failed=1)
+
+    result = testdir.inline_run("-p", "pyrameters.plugin", "--pyrameters-changed")
+    result.assertoutcome(passed=1, failed=1)
+
+    testdir.makepyfile(test_file.format(cases=["a", "c", "fail"]))
+    result = testdir.inline_run("-p", "pyrameters.plugin", "--pyrameters-changed")
+    result.assertoutcome(passed=2, failed=1)
+
+    # Without the option, everything runs.
+    result = testdir.inline_run("-p", "pyrameters.plugin")
+    result.assertoutcome(passed=3, failed=1)
+
+
+def test_changed_plugin_params(testdir):
+    """
+    Verify that cases are told apart by their other parameters, and cases that
+    can't be fingerprinted always run, with --pyrameters-changed.
+    """
+    test_file = """
+        import pytest
+        import pyrameters
+
+        YS = {ys!r}
+
+        @pytest.mark.parametrize("y", YS)
+        @pyrameters.test_cases("x", ["a", "b"])
+        def test_cases(x, y):
+            pass
+
+        @pyrameters.test_cases("name, value", [("first", object())])
+        def test_unstable(name, value):
+            pass
+    """
+    testdir.makepyfile(test_file.format(ys=[1]))
+    result = testdir.inline_run("-p", "pyrameters.plugin", "--pyrameters-changed")
+    result.assertoutcome(passed=3)
+
+    result = testdir.inline_run("-p", "pyrameters.plugin", "--pyrameters-changed")
+    result.assertoutcome(passed=1)
+
+    testdir.makepyfile(test_file.format(ys=[1, 2]))
+    result = testdir.inline_run("-p", "pyrameters.plugin", "--pyrameters-changed")
+    result.assertoutcome(passed=3)
+
+
+def test_case_history():
+    history = CaseHistory({"a": [False, 2.0], "b": [True, 5.0], "c": [False, 1.0]})
+    assert history.failed("b") and not history.failed("a")
+    assert history.duration("missing") is None
+    assert history.order(["a", "b", "c", "new"]) == [1, 3, 2, 0]
+
+    history.record("a", "setup", False, 0.1)
+    history.record("a", "call", True, 3.0)
+    history.record("a", "teardown", False, 0.1)
+    history.record("c", "setup", True, 0.1)
+    assert history.dump() == {
+        "a": [True, 3.0],
+        "b": [True, 5.0],
+        "c": [True, 1.0],
+    }
+
+
+def test_order_plugin(testdir):
+    """
+    Verify that --pyrameters-order=history runs failed cases first, then fastest.
+    """
+    testdir.makepyfile("""
+        import time
+        import pyrameters
+
+        @pyrameters.test_cases(
+            "x", [0.02, 0.0, "fail", 0.01], ids=["slow", "fast", "fail", "mid"]
+        )
+        def test_cases(x):
+            assert x != "fail"
+            time.sleep(x)
+
+        def test_plain():
+            pass
+        """)
+    args = ("-p", "pyrameters.plugin", "--pyrameters-order=history", "-v")
+    result = testdir.runpytest_inprocess(*args)
+    result.assert_outcomes(passed=4, failed=1)
+
+    result = testdir.runpytest_inprocess(*args)
+    result.stdout.fnmatch_lines(
+        [
+            "*test_cases?fail? FAILED*",
+            "*test_cases?fast? PASSED*",
+            "*test_cases?mid? PASSED*",
+            "*test_cases?slow? PASSED*",
+            "*test_plain PASSED*",
+        ]
+    )
@@ -0,0 +1,184 @@
+import json
+
+import pytest
+
+import pyrameters
+from pyrameters.loaders import CaseFile, RowValue
+
+CSV = 'a,b\n1,"x, y"\n\n2,z\n'
+JSONL = '{"a": 1, "b": "x"}\n\n{"a": 2}\n'
+
+
+@pytest.fixture
+def csv_file(tmp_path):
+    path = tmp_path / "cases.csv"
+    path.write_text(CSV)
+    return path
+
+
+@pytest.fixture
+def jsonl_file(tmp_path):
+    path = tmp_path / "cases.jsonl"
+    path.write_text(JSONL)
+    return path
+
+
+def test_stream_csv(csv_file):
+    assert list(CaseFile(csv_file)) == [dict(a="1", b="x, y"), dict(a="2", b="z")]
+
+
+def test_stream_jsonl(jsonl_file):
+    assert list(CaseFile(jsonl_file)) == [dict(a=1, b="x"), dict(a=2)]
+
+
+def test_columns(csv_file, jsonl_file):
+    assert list(CaseFile(csv_file, columns={"b": "c"}))[0] == dict(a="1", c="x, y")
+    assert list(CaseFile(jsonl_file, columns={"a": "c"}))[1] == dict(c=2)
+
+
+def test_unknown_format(tmp_path):
+    with pytest.raises(ValueError):
+        CaseFile(tmp_path / "cases.txt")
+    with pytest.raises(ValueError):
+        CaseFile(tmp_path / "cases.csv", format="xml")
+
+
+@pytest.mark.parametrize("fixture", ["csv_file", "jsonl_file"])
+def test_index_load(request, fixture):
+    case_file = CaseFile(request.getfixturevalue(fixture))
+    linenos, offsets = case_file.index()
+    assert list(linenos) == ([2, 4] if fixture == "csv_file" else [1, 3])
+    assert [case_file.load(offset) for offset in offsets] == list(case_file)
+
+
+def test_index_rebuilt_on_change(jsonl_file):
+    case_file = CaseFile(jsonl_file)
+    assert len(case_file.index()[0]) == 2
+    jsonl_file.write_text(JSONL + json.dumps(dict(a=3)) + "\n")
+    assert len(case_file.index()[0]) == 3
+
+
+def test_multiline_csv_not_indexed(tmp_path):
+    path = tmp_path / "cases.csv"
+    path.write_text('a\n"multi\nline"\n')
+    case_file = CaseFile(path)
+    assert list(case_file) == [dict(a="multi\nline")]
+    with pytest.raises(ValueError, match="Multi-line"):
+        case_file.index()
+
+
+def test_deferred_values(jsonl_file):
+    definition = pyrameters.Definition("a", b=pyrameters.Field("b", default="d"))
+    deferred = list(CaseFile(jsonl_file).deferred(definition))
+    assert [lineno for lineno, _ in deferred] == [1, 3]
+    assert all(isinstance(v, RowValue) for _, case in deferred for v in case)
+    assert [tuple(v.resolve() for v in case) for _, case in deferred] == [
+        (1, "x"),
+        (2, "d"),
+    ]
+
+
+def test_deferred_fingerprint(csv_file):
+    definition = pyrameters.Definition("a,b")
+    (_, (a, b)), _ = CaseFile(csv_file).deferred(definition)
+    assert a.fingerprint() != b.fingerprint()
+
+    fingerprint = a.fingerprint()
+    csv_file.write_text(CSV.replace("1", "3"))
+    assert a.fingerprint() != fingerprint
+
+
+@pytest.mark.parametrize("deferred", [False, True])
+def test_from_file(testdir, deferred):
+    testdir.makefile(".jsonl", cases=JSONL)
+    testdir.makepyfile(
+        """
+        import pyrameters
+
+        @pyrameters.test_cases.from_file(
+            pyrameters.Definition("a", b=pyrameters.Field("b", default="d")),
+            "cases.jsonl",
+            deferred={},
+            lazy=True,
+        )
+        def test_file(a, b):
+            assert (a, b) in [(1, "x"), (2, "d")]
+        """.format(
+            deferred
+        )
+    )
+    result = testdir.inline_run("-p", "pyrameters.plugin", "-v")
+    passed, skipped, failed = result.listoutcomes()
+    assert len(passed) == 2
+    assert len(failed) == 0
+    if deferred:
+        assert {r.nodeid.split("[")[1] for r in passed} == {"line1]", "line3]"}
+
+
+def test_from_file_deferred_scoped_default(testdir):
+    """Verify that deferred rows resolve scoped defaults, once per scope."""
+    testdir.makefile(".jsonl", cases=JSONL)
+    testdir.makepyfile(
+        """
+        import pyrameters
+
+        CALLS = []
+
+        def factory():
+            CALLS.append(None)
+            return []
+
+        @pyrameters.test_cases.from_file(
+            pyrameters.Definition(
+                "a", b=pyrameters.Field("b", factory=factory, scope="module")
+            ),
+            "cases.jsonl",
+            deferred=True,
+        )
+        def test_file(a, b):
+            assert b == ("x" if a == 1 else [])
+            assert len(CALLS) <= 1
+        """
+    )
+    result = testdir.inline_run("-p", "pyrameters.plugin")
+    passed, skipped, failed = result.listoutcomes()
+    assert len(passed) == 2
+    assert len(failed) == 0
+
+
+@pytest.mark.parametrize(
+    "kwargs, args, count",
+    [
+        ("", ["--pyrameters-shard", "1/2"], range(1, 20)),
+        ("sample=5,", [], [5]),
+        ('duplicates="drop",', [], [20]),
+    ],
+)
+def test_from_file_deferred_filtered(testdir, kwargs, args, count):
+    """
+    Verify that deferred rows can be sharded, sampled and deduplicated by their row,
+    without loading them.
+    """
+    testdir.makefile(
+        ".jsonl", cases="\n".join(json.dumps(dict(a=i)) for i in range(20))
+    )
+    testdir.makepyfile(
+        """
+        import pyrameters
+
+        @pyrameters.test_cases.from_file(
+            pyrameters.Definition("a", b=pyrameters.Field("b", default="d")),
+            "cases.jsonl",
+            deferred=True,
+            {}
+        )
+        def test_file(a, b):
+            assert b == "d"
+        """.format(
+            kwargs
+        )
+    )
+    result = testdir.inline_run("-p", "pyrameters.plugin", *args)
+    passed, skipped, failed = result.listoutcomes()
+    assert len(passed) in count
+    assert len(failed) == 0
@@ -0,0 +1,64 @@
+import os
+
+import pytest
+
+from pyrameters.history import CaseHistory
+
+pytest.importorskip("xdist")
+
+from pyrameters.scheduling import DEFAULT_COST, balance, expected_costs  # noqa: E402
+
+
+def test_balance():
+    assignments = balance([5.0, 1.0, 1.0, 3.0, 2.0, 2.0], 2)
+    assert sorted(sum(assignments, [])) == list(range(6))
+    assert [sum([5.0, 1.0, 1.0, 3.0, 2.0, 2.0][i] for i in a) for a in assignments] == [
+        7.0,
+        7.0,
+    ]
+    assert all(a == sorted(a) for a in assignments)
+
+
+def test_balance_more_workers_than_tests():
+    assert balance([1.0], 3) == [[0], [], []]
+
+
+def test_expected_costs():
+    history = CaseHistory({"a": [False, 4.0], "b": [False, 2.0], "c": [True, None]})
+    assert expected_costs(["a", "b", "c", "d"], history, {"c": 0.5}) == [
+        4.0,
+        2.0,
+        0.5,
+        3.0,
+    ]
+    assert expected_costs(["x"], CaseHistory({}), {}) == [DEFAULT_COST]
+
+
+def test_balance_plugin(testdir, monkeypatch):
+    """
+    Verify that --pyrameters-balance runs every test across xdist workers, and
+    records their durations for the next run.
+    """
+    testdir.makepyfile("""
+        import pyrameters
+        from pyrameters import Definition, Field
+
+        @pyrameters.test_cases(
+            Definition("x", y=Field("y", default=0, cost=lambda y: y)),
+            [dict(x=1, y=3), dict(x=2), dict(x=3, y=1), dict(x=4)],
+        )
+        def test_cases(x, y):
+            pass
+
+        def test_plain():
+            pass
+        """)
+    monkeypatch.setenv("PYTHONPATH", os.path.dirname(os.path.dirname(__file__)))
+    args = ("-p", "pyrameters.plugin", "-n", "2", "--pyrameters-balance")
+    result = testdir.runpytest_subprocess(*args)
+    result.assert_outcomes(passed=5)
+
+    result = testdir.runpytest_subprocess(*args)
+    result.assert_outcomes(passed=5)
+    history = testdir.runpytest_subprocess("--cache-show", "pyrameters/history")
+    history.stdout.fnmatch_lines(["*test_cases*", "*test_plain*"])
@@ -0,0 +1,138 @@
+import pytest
+
+from pyrameters import Field, scopes
+from pyrameters.scopes import FactoryCache
+
+
+def counting_field(scope, torn_down):
+    calls = []
+
+    def factory():
+        calls.append(None)
+        return len(calls)
+
+    return Field("x", factory=factory, scope=scope, teardown=torn_down.append)
+
+
+def test_get_memoizes_per_key():
+    torn_down = []
+    cache = FactoryCache()
+    field = counting_field("module", torn_down)
+
+    assert cache.get(field, "a") == 1
+    assert cache.get(field, "a") == 1
+    assert cache.get(field, "b") == 2
+    assert len(cache) == 2
+    assert torn_down == []
+
+
+def test_release_only_matching_scope_and_key():
+    torn_down = []
+    cache = FactoryCache()
+    module = counting_field("module", torn_down)
+    function = counting_field("function", torn_down)
+
+    cache.get(module, "a")
+    cache.get(module, "b")
+    cache.get(function, "a")
+    cache.release("module", "a")
+
+    assert torn_down == [1]
+    assert len(cache) == 2
+    assert cache.get(module, "a") == 3
+
+
+def test_eviction_is_least_recently_used():
+    torn_down = []
+    cache = FactoryCache(maxsize=2)
+    field = counting_field("module", torn_down)
+
+    cache.get(field, "a")
+    cache.get(field, "b")
+    cache.get(field, "a")
+    cache.get(field, "c")
+
+    assert torn_down == [2]
+    assert len(cache) == 2
+
+    cache.clear()
+    assert torn_down == [2, 3, 1]
+    assert len(cache) == 0
+
+
+def test_field_default_uses_active_scope():
+    torn_down = []
+    field = counting_field("function", torn_down)
+    previous, scopes.cache = scopes.cache, FactoryCache()
+    try:
+        with scopes.active(function="test_a"):
+            assert field.default == (1, True)
+            assert field.default == (1, True)
+        with scopes.active(function="test_b"):
+            assert field.default == (2, True)
+    finally:
+        scopes.cache = previous
+
+
+@pytest.mark.parametrize(
+    "kwargs",
+    [
+        dict(factory=list, scope="class"),
+        dict(scope="module"),
+        dict(default=1, scope="module"),
+        dict(teardown=print),
+    ],
+)
+def test_field_scope_invalid(kwargs):
+    with pytest.raises(ValueError):
+        Field("x", **kwargs)
+
+
+def test_scoped_factories(testdir):
+    """
+    Verify that scoped factory results are shared within their scope, and torn down
+    when it ends.
+    """
+    testdir.makepyfile(
+        test_one="""
+        import pyrameters
+        from pyrameters import Definition, Field
+
+        calls = {"function": 0, "module": 0, "session": 0}
+        torn_down = []
+
+        def counter(scope):
+            def factory():
+                calls[scope] += 1
+                return calls[scope]
+            return factory
+
+        DEFINITION = Definition(
+            "x",
+            f=Field("f", factory=counter("function"), scope="function",
+                    teardown=torn_down.append),
+            m=Field("m", factory=counter("module"), scope="module",
+                    teardown=torn_down.append),
+            s=Field("s", factory=counter("session"), scope="session"),
+        )
+
+        @pyrameters.test_cases(DEFINITION, [dict(x=1), dict(x=2)])
+        def test_first(x, f, m, s):
+            assert (f, m, s) == (1, 1, 1)
+
+        @pyrameters.test_cases(DEFINITION, [dict(x=1), dict(x=2)])
+        def test_second(x, f, m, s):
+            assert torn_down == [1]
+            assert (f, m, s) == (2, 1, 1)
+        """,
+        test_two="""
+        from test_one import torn_down
+
+        def test_after():
+            assert torn_down == [1, 2, 1]
+        """,
+    )
+    result = testdir.inline_run("-p", "pyrameters.plugin", "test_one.py", "test_two.py")
+    passed, skipped, failed = result.listoutcomes()
+    assert len(passed) == 5
+    assert len(failed) == 0
@@ -0,0 +1,135 @@
+import json
+import os
+
+import pytest
+
+from pyrameters import Definition, Field, stats
+from pyrameters.expansion import expand
+from pyrameters.stats import Stats
+
+
+@pytest.fixture
+def timed_stats(monkeypatch):
+    current = Stats(timing=True)
+    monkeypatch.setattr(stats, "current", current)
+    return current
+
+
+def factory():
+    return []
+
+
+def test_timed_disabled():
+    current = Stats()
+    assert current.timed("factory", "f", factory) == []
+    assert current.timings["factory"] == {}
+
+
+def test_timings(timed_stats):
+    recorded = []
+    stats.add_listener(lambda *timing: recorded.append(timing))
+    try:
+        definition = Definition("x", y=Field("y", factory=factory))
+        assert list(expand(definition, [dict(x=1), dict(x=2)])) == [(1, []), (2, [])]
+    finally:
+        del stats.listeners[:]
+
+    name = "{}.factory".format(__name__)
+    assert [(kind, n) for kind, n, _ in recorded] == [("factory", name)] * 2
+    assert timed_stats.timings["factory"][name][0] == 2
+    assert timed_stats.slowest("factory") == [
+        (name, 2, timed_stats.timings["factory"][name][1])
+    ]
+
+
+def test_slowest():
+    current = Stats(timing=True)
+    current.add_timing("case", "a", 1.0)
+    current.add_timing("case", "b", 3.0)
+    current.add_timing("case", "a", 1.5)
+    assert current.slowest("case") == [("b", 1, 3.0), ("a", 2, 2.5)]
+    assert current.slowest("case", 1) == [("b", 1, 3.0)]
+
+
+def test_timings_plugin(testdir):
+    """
+    Verify that timings are summarised and written to the timings file.
+    """
+    testdir.makepyfile("""
+        import pyrameters
+
+        def make_y():
+            return 1
+
+        DEFINITION = pyrameters.Definition(
+            "x", y=pyrameters.Field("y", factory=make_y)
+        )
+
+        @pyrameters.test_cases(DEFINITION, [dict(x=1), dict(x=2)])
+        def test_eager(x, y):
+            pass
+
+        @pyrameters.test_cases(DEFINITION, [dict(x=3)], lazy=True)
+        def test_lazy(x, y):
+            pass
+
+        def test_plain():
+            pass
+        """)
+    result = testdir.runpytest_inprocess(
+        "-p", "pyrameters.plugin", "--pyrameters-timings-file", "timings.json"
+    )
+    result.assert_outcomes(passed=4)
+    result.stdout.fnmatch_lines(
+        [
+            "*pyrameters slowest expansions*",
+            "*1x test_timings_plugin.test_eager",
+            "*pyrameters slowest factories*",
+            "*3x test_timings_plugin.make_y",
+            "*pyrameters slowest cases*",
+        ]
+    )
+
+    with open(testdir.tmpdir.join("timings.json")) as f:
+        timings = json.load(f)
+    assert sorted(t["name"] for t in timings["case"]) == [
+        "test_timings_plugin.py::test_eager[1-1]",
+        "test_timings_plugin.py::test_eager[2-1]",
+        "test_timings_plugin.py::test_lazy[3-1]",
+    ]
+
+
+def test_merge_timings(timed_stats):
+    timed_stats.add_timing("case", "a", 1.0)
+    timed_stats.merge_timings({"case": {"a": [2, 3.0], "b": [1, 0.5]}})
+    assert timed_stats.slowest("case") == [("a", 3, 4.0), ("b", 1, 0.5)]
+
+
+def test_timings_xdist(testdir, monkeypatch):
+    """
+    Verify that the timings of pytest-xdist workers are written by the controller.
+    """
+    testdir.makepyfile("""
+        import pyrameters
+
+        @pyrameters.test_cases("x", range(12))
+        def test_cases(x):
+            pass
+        """)
+    monkeypatch.setenv("PYTHONPATH", os.path.dirname(os.path.dirname(__file__)))
+    result = testdir.runpytest_subprocess(
+        "-p",
+        "pyrameters.plugin",
+        "-n",
+        "2",
+        "--pyrameters-timings-file",
+        "timings.json",
+    )
+    result.assert_outcomes(passed=12)
+    result.stdout.fnmatch_lines(["*pyrameters slowest cases*"])
+
+    with open(testdir.tmpdir.join("timings.json")) as f:
+        timings = json.load(f)
+    assert len(timings["case"]) == 12
+    # Each worker expands the cases when it collects them.
+    assert [t["calls"] for t in timings["expansion"]] == [2]
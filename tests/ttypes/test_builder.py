@@ -0,0 +1,72 @@
+from collections import defaultdict
+
+import pytest
+from hypothesis import HealthCheck, given, settings
+from hypothesis import strategies as st
+
+from pyrameters import Definition, Field
+from pyrameters.types.deferred import DeferredDefault
+from utils.hypothesis import cases_for, valid_definitions
+
+
+@given(
+    st.shared(valid_definitions(), key="builder"),
+    cases_for(
+        st.shared(valid_definitions(), key="builder"),
+        tuples=False,
+        parameters=False,
+        mappings=True,
+    ),
+)
+# Drawing cases for up to 20 fields is slow, but building them isn't.
+@settings(
+    max_examples=settings().max_examples * 10,
+    suppress_health_check=[HealthCheck.too_slow],
+)
+def test_builds_in_field_order(definition, cases):
+    build = definition.builder()
+    for case in cases:
+        expected = [
+            case[name] if name in case else f.default[0]
+            for name, f in definition.fields.items()
+        ]
+        if len(expected) == 1:
+            assert build(case) == expected[0]
+        else:
+            assert build(case) == tuple(expected)
+
+
+def test_missing_value():
+    build = Definition("a,b").builder()
+    with pytest.raises(ValueError, match="No value provided for b"):
+        build(dict(a=1))
+
+
+def test_mapping_overrides_default():
+    build = Definition("a", b=Field("b", default=2)).builder()
+    assert build(defaultdict(lambda: 3, a=1)) == (1, 3)
+
+
+def test_factory_called_per_case():
+    build = Definition("a", b=Field("b", factory=list)).builder()
+    first, second = build(dict(a=1)), build(dict(a=2))
+    assert first == (1, []) and second == (2, [])
+    assert first[1] is not second[1]
+
+
+def test_lazy_defaults():
+    f = Field("b", factory=list)
+    _, val = Definition("a", b=f).builder(lazy_defaults=True)(dict(a=1))
+    assert isinstance(val, DeferredDefault)
+    assert val.field is f
+
+
+def test_cached_until_fields_change():
+    definition = Definition("a,b")
+    builder = definition.builder()
+    assert definition.builder() is builder
+    assert definition.builder(lazy_defaults=True) is not builder
+
+    definition.fields["b"] = Field("b", default=2)
+    assert definition.builder() is not builder
+    assert definition.builder()(dict(a=1)) == (1, 2)
@@ -0,0 +1,46 @@
+from array import array
+
+import pytest
+
+from pyrameters import Columns, Definition, Field
+from pyrameters.expansion import expand
+
+
+def test_columns():
+    definition = Definition(
+        "x", y=Field("y", default="y"), z=Field("z", factory=list), w="w"
+    )
+    columns = Columns(w=array("i", [4, 5]), x=(1, 2), unused=[None, None])
+    assert len(columns) == 2
+    assert columns.names(definition.fields) == ("x", "w")
+    assert list(expand(definition, columns)) == [(1, "y", [], 4), (2, "y", [], 5)]
+
+
+def test_columns_single_field():
+    assert list(expand("x", Columns(x=range(3)))) == [0, 1, 2]
+
+
+def test_columns_lazy_defaults():
+    definition = Definition("x", y=Field("y", factory=list))
+    (case,) = expand(definition, Columns(x=[1]), lazy_defaults=True)
+    assert case[0] == 1
+    assert case[1].resolve() == []
+
+
+def test_columns_builder_cached():
+    builder = Definition("x,y").builder()
+    assert builder.row_builder(("y", "x")) is builder.row_builder(("y", "x"))
+    assert builder.row_builder(("y", "x"))((1, 2)) == (2, 1)
+
+
+def test_columns_missing_field():
+    with pytest.raises(ValueError, match="No column for y"):
+        list(expand("x,y", Columns(x=[1])))
+
+
+@pytest.mark.parametrize(
+    "columns", [dict(), dict(x=[1], y=[1, 2])], ids=["empty", "unequal"]
+)
+def test_columns_invalid(columns):
+    with pytest.raises(ValueError):
+        Columns(columns)
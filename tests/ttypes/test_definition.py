@@ -1,10 +1,16 @@
+import os
+import pickle
+import subprocess
+import sys
 from datetime import timedelta
 
 import pytest
 from hypothesis import assume, given, settings
 from hypothesis import strategies as st
 
+import pyrameters
 from pyrameters import Definition, Field
+from pyrameters.types.definition import parse_argnames
 from utils.hypothesis import (everything_except, extra_fields,
                               non_empty_strings, valid_definition_strings,
                               valid_definitions)
@@ -125,3 +131,75 @@ def test_ordering(arg_def, extras, data):
         expected_order.extend(kwargs.keys())
 
     assert extract_args(str(definition)) == expected_order
+
+
+def test_parse_argnames_cached():
+    assert parse_argnames(" a, b ,c,") == ("a", "b", "c")
+    assert parse_argnames(" a, b ,c,") is parse_argnames(" a, b ,c,")
+    with pytest.raises(ValueError):
+        parse_argnames("a,b,a")
+
+
+def test_freeze():
+    definition = Definition("a", b=Field("b", default=[]))
+    frozen = definition.freeze()
+    assert frozen is not definition
+    assert frozen.freeze() is frozen
+    assert frozen.frozen and not definition.frozen
+    assert list(frozen.fields) == ["a", "b"]
+    with pytest.raises(TypeError):
+        frozen.fields["c"] = Field("c")
+
+    # Mutable definitions compare by identity, frozen ones by their fields.
+    assert definition != Definition(definition)
+    assert frozen == Definition(definition).freeze()
+    assert hash(frozen) == hash(Definition(definition).freeze())
+    assert frozen != Definition("a", b=Field("b", default=[])).freeze()
+    assert Definition("a", b=Field("b", default=1)).freeze() != Definition(
+        "a", b=Field("b", default=True)
+    ).freeze()
+
+
+def test_intern():
+    interned = Definition.intern("x, y")
+    assert interned.frozen
+    assert Definition.intern("x, y") is interned
+    assert Definition.intern("x,y") is interned
+    assert Definition.intern("x", "y") is interned
+    assert Definition.intern(Definition("x, y")) is interned
+    assert Definition.intern("x, y").builder() is interned.builder()
+    assert Definition.intern("x", y=Field("y", default=1)) is not interned
+
+
+def test_frozen_pickle():
+    frozen = Definition("a", b=Field("b", default=1)).freeze()
+    assert pickle.loads(pickle.dumps(frozen)) == frozen
+    assert not pickle.loads(pickle.dumps(Definition("a"))).frozen
+
+
+def test_expand():
+    definition = Definition("a", b=Field("b", default=1), c=Field("c", factory=list))
+    cases = definition.expand([dict(a=0), (1, 2, 3), dict(a=2, b=3)], sample=2)
+    assert iter(cases) is cases
+    assert list(cases) == [(0, 1, []), (1, 2, 3)]
+    with pytest.raises(ValueError):
+        list(definition.expand([dict(b=2)]))
+
+
+def test_expand_without_pytest():
+    """
+    Verify that expanding cases doesn't import pytest.
+    """
+    script = (
+        "import sys; from pyrameters import Definition; "
+        "print(list(Definition('x, y').expand([(1, 2)])), 'pytest' in sys.modules)"
+    )
+    env = dict(os.environ, PYTHONPATH=os.path.dirname(pyrameters.__path__[0]))
+    output = subprocess.run(
+        [sys.executable, "-c", script],
+        env=env,
+        check=True,
+        stdout=subprocess.PIPE,
+        universal_newlines=True,
+    ).stdout
+    assert output.split() == ["[(1,", "2)]", "False"]
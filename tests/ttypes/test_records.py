@@ -0,0 +1,87 @@
+import pickle
+from collections.abc import Sequence
+
+import pytest
+from hypothesis import given
+from hypothesis import strategies as st
+
+from pyrameters import Definition, Field
+from pyrameters.types.records import Constant, Records
+from utils.hypothesis import field_values
+
+
+def test_records():
+    definition = Definition(
+        "x", y=Field("y", default="y"), z=Field("z", factory=list), w="w"
+    )
+    cases = [dict(x=i, w=i / 2) for i in range(3)] + [
+        pytest.param(3, "b", [], 1.5, id="named")
+    ]
+    records = definition.records(cases)
+
+    assert isinstance(records, Sequence)
+    assert len(records) == 4
+    assert list(records) == list(definition.expand(cases))
+    assert records[1] == (1, "y", [], 0.5)
+    assert records[-1] is records[3]
+    assert records[3].id == "named"
+    with pytest.raises(IndexError):
+        records[4]
+
+    x, y, z, w = records.columns
+    assert x == [0, 1, 2, 3]
+    assert isinstance(y, list)
+    assert len(z) == 4
+    assert w == [0.0, 0.5, 1.0, 1.5]
+
+    assert list(pickle.loads(pickle.dumps(records))) == list(records)
+
+
+def test_records_single():
+    records = Records(["x"], [True, True, True])
+    assert isinstance(records.columns[0], Constant)
+    assert list(records) == [True, True, True]
+    assert records[2] is True
+
+    records = Records(["x", "y"], [(1, None), (2, None)])
+    assert records.columns[0] == [1, 2]
+    assert isinstance(records.columns[1], Constant)
+
+
+@given(st.lists(st.tuples(field_values(), field_values()), max_size=20))
+def test_records_roundtrip(cases):
+    records = Records(["a", "b"], cases)
+    assert list(records) == cases
+    assert [records[i] for i in range(len(cases))] == cases
+
+
+def test_cases_compact(testdir):
+    """
+    Verify that compact cases are collected like a list of cases.
+    """
+    testdir.makepyfile("""
+        import pytest
+        import pyrameters
+
+        DEFINITION = pyrameters.Definition("x", y=pyrameters.Field("y", default=2))
+        CASES = [dict(x=1), dict(x=2, y=3), pytest.param(3, 4, id="named")]
+
+        @pyrameters.test_cases(DEFINITION, CASES, compact=True)
+        def test_compact(x, y):
+            assert x in (1, 2, 3)
+
+        @pyrameters.test_cases("x", ["a", "b"], compact=True, lazy=True)
+        def test_lazy(x):
+            assert x in ("a", "b")
+        """)
+    result = testdir.runpytest_inprocess("-p", "pyrameters.plugin", "-v", "-W", "error")
+    result.assert_outcomes(passed=5)
+    result.stdout.fnmatch_lines(
+        [
+            "*test_compact?1-2? PASSED*",
+            "*test_compact?2-3? PASSED*",
+            "*test_compact?named? PASSED*",
+            "*test_lazy?a? PASSED*",
+            "*test_lazy?b? PASSED*",
+        ]
+    )
@@ -0,0 +1,90 @@
+import mmap
+
+import pytest
+
+from pyrameters import FileRegion
+
+
+@pytest.fixture
+def blob(tmp_path):
+    path = tmp_path / "blob.bin"
+    path.write_bytes(bytes(range(256)) * (mmap.ALLOCATIONGRANULARITY // 64))
+    return path
+
+
+@pytest.mark.parametrize(
+    "offset, length",
+    [(0, 10), (5, 3), (mmap.ALLOCATIONGRANULARITY + 7, 300), (100, 0)],
+)
+def test_resolve(blob, offset, length):
+    region = FileRegion(blob, offset, length)
+    view = region.resolve()
+    assert view.readonly
+    assert bytes(view) == blob.read_bytes()[offset : offset + length]
+
+    region.release(view)
+    with pytest.raises(ValueError):
+        view[0]
+
+
+def test_resolve_to_end(blob):
+    size = blob.stat().st_size
+    view = FileRegion(blob, size - 4).resolve()
+    assert bytes(view) == blob.read_bytes()[-4:]
+
+
+def test_release_with_kept_view(blob):
+    region = FileRegion(blob, 0, 10)
+    view = region.resolve()
+    kept = view[2:4]
+    region.release(view)
+    assert bytes(kept) == b"\x02\x03"
+
+
+def test_past_end(blob):
+    with pytest.raises(ValueError, match="past the end"):
+        FileRegion(blob, blob.stat().st_size, 1).resolve()
+
+
+@pytest.mark.parametrize("offset, length", [(-1, None), (0, -1)])
+def test_invalid(offset, length):
+    with pytest.raises(ValueError):
+        FileRegion("blob.bin", offset, length)
+
+
+def test_file_region_plugin(testdir):
+    """
+    Verify that FileRegions are mapped at setup, and unmapped after the test.
+    """
+    testdir.tmpdir.join("blob.bin").write_binary(b"0123456789")
+    testdir.makepyfile(
+        """
+        import pyrameters
+        from pyrameters import FileRegion
+
+        seen = []
+
+        @pyrameters.test_cases(
+            "name, payload",
+            [("a", FileRegion("blob.bin", 0, 4)), ("b", FileRegion("blob.bin", 6))],
+        )
+        def test_payload(name, payload):
+            assert isinstance(payload, memoryview)
+            assert bytes(payload) == {"a": b"0123", "b": b"6789"}[name]
+            seen.append(payload)
+
+        def test_released():
+            assert len(seen) == 2
+            for payload in seen:
+                try:
+                    payload[0]
+                except ValueError:
+                    pass
+                else:
+                    raise AssertionError("payload wasn't released")
+        """
+    )
+    result = testdir.inline_run("-p", "pyrameters.plugin")
+    passed, skipped, failed = result.listoutcomes()
+    assert len(passed) == 3
+    assert len(failed) == 0
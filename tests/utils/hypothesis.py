@@ -6,7 +6,6 @@ from hypothesis import assume
 from hypothesis import strategies as st
 
 import pyrameters
-import utils.decorator
 
 
 def everything_except(*args):
@@ -45,11 +44,6 @@ def valid_field_names(draw, exclude_names=None):
     assume(name.isidentifier())
     assume(not iskeyword(name))
 
-    # This a comprehensive list of field names we use in the decorator test util.
-    # We need to exclude these here so that we don't accidentally overwrite them
-    # in the local scope there.
-    assume(name not in utils.decorator.RESERVED_NAMES)
-
     return name
 
 